@@ -0,0 +1,81 @@
+"""
+throughput of the pandas engine against the arrow engine for every
+format, the arrow engine is measured once per cpu count
+
+usage: PYTHONPATH=. python benchmark/bench_arrow_engine.py [size in MB]
+"""
+
+import io
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+import pyarrow as pa
+
+from benchmark.common import file_size_mb, generate_csv
+from utils.file_to_df import file_to_df
+from utils.file_to_table import file_to_table
+from utils.redact_pii import redact_pii
+from utils.redact_table import redact_table
+from utils.table_to_byte_stream import table_to_byte_stream
+from utils.to_byte_stream import to_byte_stream
+
+PII_FIELDS = ["name", "email"]
+
+
+def run_pandas(data, file_format):
+    df = file_to_df(io.BytesIO(data), file_format)
+    return to_byte_stream(redact_pii(df, PII_FIELDS), file_format)
+
+
+def run_arrow(data, file_format):
+    table = file_to_table(io.BytesIO(data), file_format)
+    return table_to_byte_stream(redact_table(table, PII_FIELDS), file_format)
+
+
+def core_counts():
+    counts, n = [], 1
+    while n < os.cpu_count():
+        counts.append(n)
+        n *= 2
+    return counts + [os.cpu_count()]
+
+
+def throughput(func, data, file_format):
+    start = time.perf_counter()
+    func(data, file_format)
+    return len(data) / 2**20 / (time.perf_counter() - start)
+
+
+def main(size):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.csv")
+        generate_csv(path, size)
+        print(f"source csv {file_size_mb(path):.0f} MB")
+
+        with open(path, "rb") as f:
+            csv_data = f.read()
+        df = pd.read_csv(io.BytesIO(csv_data))
+        parquet_buffer = io.BytesIO()
+        df.to_parquet(parquet_buffer, index=False)
+        inputs = {
+            "csv": csv_data,
+            "json": df.to_json(orient="records").encode("utf-8"),
+            "parquet": parquet_buffer.getvalue(),
+        }
+        del df
+
+    print(f"{'format':>8} {'engine':>8} {'cores':>6} {'MB/s':>8}")
+    for file_format, data in inputs.items():
+        mbs = throughput(run_pandas, data, file_format)
+        print(f"{file_format:>8} {'pandas':>8} {1:>6} {mbs:8.1f}")
+        for cores in core_counts():
+            pa.set_cpu_count(cores)
+            mbs = throughput(run_arrow, data, file_format)
+            print(f"{file_format:>8} {'arrow':>8} {cores:>6} {mbs:8.1f}")
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 100)
@@ -0,0 +1,150 @@
+"""
+load test of obfuscator_main_async: 100 concurrent callers on one
+event loop against a local moto server, compared with calling the
+blocking obfuscator_main from the same coroutines
+
+reports requests per second, the latency seen by the callers and
+the longest stall of the event loop, measured by a ticker coroutine
+that should wake up every millisecond
+
+a simulated round trip is added to every s3 call, the local server
+answers in well under a millisecond which no real bucket does
+
+needs moto[server] (flask) for the local s3 endpoint
+
+usage: PYTHONPATH=. python benchmark/bench_async.py \
+    [callers] [requests] [latency ms]
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.setdefault("AWS_DEFAULT_REGION", "eu-west-2")
+
+
+async def load(call, payloads, callers):
+    """
+    runs every payload through call with callers of them in flight,
+    returns (seconds, sorted latencies, longest loop stall)
+    """
+
+    queue = asyncio.Queue()
+    for payload in payloads:
+        queue.put_nowait(payload)
+
+    latencies = []
+    stall = 0.0
+    last = time.perf_counter()
+
+    async def caller():
+        while not queue.empty():
+            payload = queue.get_nowait()
+            start = time.perf_counter()
+            await call(payload)
+            latencies.append(time.perf_counter() - start)
+
+    async def ticker():
+        nonlocal stall, last
+        while True:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            stall = max(stall, now - last - 0.001)
+            last = now
+
+    tick = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    start = last = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(callers)))
+    seconds = time.perf_counter() - start
+    stall = max(stall, time.perf_counter() - last - 0.001)
+    tick.cancel()
+
+    return seconds, sorted(latencies), stall
+
+
+def main(callers, n_requests, latency_ms):
+    import boto3
+    from moto.server import ThreadedMotoServer
+    from benchmark.common import generate_csv
+    from src.obfuscate_main import (
+        obfuscator_main,
+        obfuscator_main_async,
+        shutdown_async_executor,
+    )
+    from utils.s3_client import get_s3_client
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = ThreadedMotoServer(port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    os.environ["AWS_ENDPOINT_URL"] = f"http://{host}:{port}"
+
+    try:
+        s3 = boto3.client("s3")
+        s3.create_bucket(
+            Bucket="bench",
+            CreateBucketConfiguration={"LocationConstraint": "eu-west-2"},
+        )
+        generate_csv("bench_async.csv", 0.1)
+        with open("bench_async.csv", "rb") as f:
+            body = f.read()
+        os.remove("bench_async.csv")
+
+        payloads = []
+        for i in range(n_requests):
+            s3.put_object(Bucket="bench", Key=f"in/{i}.csv", Body=body)
+            payloads.append(
+                json.dumps(
+                    {
+                        "file_to_obfuscate": f"s3://bench/in/{i}.csv",
+                        "pii_fields": ["name", "email"],
+                    }
+                )
+            )
+
+        get_s3_client().meta.events.register(
+            "before-call.s3", lambda **kwargs: time.sleep(latency_ms / 1000)
+        )
+
+        async def blocking(payload):
+            return obfuscator_main(payload)
+
+        print(
+            f"{callers} callers, {n_requests} requests, "
+            f"{latency_ms} ms per s3 call"
+        )
+        print(
+            f"{'mode':>10} {'req/s':>8} {'p50 s':>8} "
+            f"{'p95 s':>8} {'stall s':>8}"
+        )
+        for name, call in (
+            ("blocking", blocking),
+            ("async", obfuscator_main_async),
+        ):
+            seconds, latencies, stall = asyncio.run(
+                load(call, payloads, callers)
+            )
+            print(
+                f"{name:>10} {n_requests / seconds:8.1f} "
+                f"{latencies[len(latencies) // 2]:8.3f} "
+                f"{latencies[int(0.95 * (len(latencies) - 1))]:8.3f} "
+                f"{stall:8.3f}"
+            )
+    finally:
+        shutdown_async_executor()
+        server.stop()
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(
+        args[0] if args else 100,
+        args[1] if len(args) > 1 else 500,
+        args[2] if len(args) > 2 else 20,
+    )
@@ -0,0 +1,86 @@
+"""
+compares obfuscating many files one after the other with
+obfuscator_main against obfuscate_batch
+
+runs against moto with a simulated round trip added to every
+s3 call, without it moto answers instantly and there would be
+no waiting on s3 for the batch to overlap with redaction
+
+usage: PYTHONPATH=. python benchmark/bench_batch.py [files] [latency ms]
+"""
+
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.setdefault("AWS_DEFAULT_REGION", "eu-west-2")
+
+
+def main(n_files, latency_ms):
+    import boto3
+    from moto import mock_aws
+    from benchmark.common import generate_csv
+    from src.obfuscate_main import obfuscator_main, obfuscate_batch
+    from utils.s3_client import get_s3_client
+
+    with mock_aws():
+        s3 = boto3.client("s3")
+        s3.create_bucket(
+            Bucket="bench",
+            CreateBucketConfiguration={"LocationConstraint": "eu-west-2"},
+        )
+        generate_csv("bench_batch.csv", 0.5)
+        with open("bench_batch.csv", "rb") as f:
+            body = f.read()
+        os.remove("bench_batch.csv")
+
+        payloads = []
+        for i in range(n_files):
+            s3.put_object(Bucket="bench", Key=f"in/{i}.csv", Body=body)
+            payloads.append(
+                json.dumps(
+                    {
+                        "file_to_obfuscate": f"s3://bench/in/{i}.csv",
+                        "pii_fields": ["name", "email"],
+                    }
+                )
+            )
+
+        get_s3_client().meta.events.register(
+            "before-call.s3", lambda **kwargs: time.sleep(latency_ms / 1000)
+        )
+
+        print(
+            f"{'mode':>10} {'files/s':>8} {'mean s':>8} "
+            f"{'p95 s':>8} {'total s':>8}"
+        )
+
+        latencies = []
+        start = time.perf_counter()
+        for payload in payloads:
+            file_start = time.perf_counter()
+            obfuscator_main(payload)
+            latencies.append(time.perf_counter() - file_start)
+        seconds = time.perf_counter() - start
+        latencies.sort()
+        print(
+            f"{'loop':>10} {n_files / seconds:8.1f} "
+            f"{sum(latencies) / n_files:8.3f} "
+            f"{latencies[int(0.95 * (n_files - 1))]:8.3f} {seconds:8.2f}"
+        )
+
+        for workers in (4, 8, 16):
+            result = obfuscate_batch(payloads, max_workers=workers)
+            print(
+                f"{f'batch {workers}':>10} {result['files_per_second']:8.1f} "
+                f"{result['latency']['mean']:8.3f} "
+                f"{result['latency']['p95']:8.3f} {result['seconds']:8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    args = [float(a) for a in sys.argv[1:]]
+    main(int(args[0]) if args else 100, args[1] if len(args) > 1 else 50)
@@ -0,0 +1,79 @@
+"""
+times parquet decoding of a wide table with and without skipping
+the pii columns, next to the share of the file taken by them
+
+usage: PYTHONPATH=. python benchmark/bench_column_projection.py [rows]
+"""
+
+import io
+import random
+import string
+import sys
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.file_to_df import file_to_df
+
+PII_FIELDS = ["notes", "address", "full_name", "comment"]
+
+
+def make_wide_table(rows: int) -> pa.Table:
+    rng = random.Random(0)
+
+    def text(length):
+        return "".join(rng.choices(string.ascii_letters + " ", k=length))
+
+    columns = {
+        f"metric_{i}": [rng.random() for _ in range(rows)] for i in range(4)
+    }
+    for field in PII_FIELDS:
+        columns[field] = [text(rng.randint(50, 300)) for _ in range(rows)]
+
+    return pa.table(columns)
+
+
+def pii_byte_share(data: bytes) -> float:
+    metadata = pq.ParquetFile(io.BytesIO(data)).metadata
+    total = pii = 0
+    for rg in range(metadata.num_row_groups):
+        row_group = metadata.row_group(rg)
+        for col in range(row_group.num_columns):
+            column = row_group.column(col)
+            total += column.total_compressed_size
+            if column.path_in_schema in PII_FIELDS:
+                pii += column.total_compressed_size
+    return pii / total
+
+
+def best_of(func, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(rows):
+    buffer = io.BytesIO()
+    pq.write_table(make_wide_table(rows), buffer)
+    data = buffer.getvalue()
+
+    full = best_of(lambda: file_to_df(io.BytesIO(data), "parquet"))
+    projected = best_of(
+        lambda: file_to_df(
+            io.BytesIO(data), "parquet", skip_columns=PII_FIELDS
+        )
+    )
+
+    print(f"file size        {len(data) / 2**20:8.1f} MB")
+    print(f"pii byte share   {pii_byte_share(data):8.1%}")
+    print(f"full decode      {full:8.3f} s")
+    print(f"projected decode {projected:8.3f} s")
+    print(f"saved            {1 - projected / full:8.1%}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
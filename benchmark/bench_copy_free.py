@@ -0,0 +1,44 @@
+"""
+peak RSS of the in-memory (non streaming) pipeline, used to track
+how many copies of the data are alive at the same time
+
+usage: PYTHONPATH=. python benchmark/bench_copy_free.py [size in MB]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from benchmark.common import generate_csv, generate_parquet, run_isolated
+
+PII_FIELDS = ["name", "email"]
+
+
+def run_pipeline(path, file_format):
+    from utils.file_to_df import file_to_df
+    from utils.redact_pii import redact_pii
+    from utils.to_byte_stream import to_byte_stream
+
+    start = time.perf_counter()
+    with open(path, "rb") as body:
+        df = file_to_df(body, file_format)
+        output = to_byte_stream(redact_pii(df, PII_FIELDS), file_format)
+    return time.perf_counter() - start, len(output.getbuffer())
+
+
+def main(size):
+    print(f"{'format':>8} {'seconds':>8} {'peak RSS MB':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for file_format, generate in (
+            ("csv", generate_csv),
+            ("parquet", generate_parquet),
+        ):
+            path = os.path.join(tmp, f"bench.{file_format}")
+            generate(path, size)
+            (seconds, _), rss = run_isolated(run_pipeline, path, file_format)
+            print(f"{file_format:>8} {seconds:8.2f} {rss:12.0f}")
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 1024)
@@ -0,0 +1,68 @@
+"""
+throughput of the byte level csv redaction against a plain copy of
+the same bytes and against the pandas pipeline
+
+usage: PYTHONPATH=. python benchmark/bench_csv_bytes.py [size in MB]
+"""
+
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmark.common import NullSink, generate_csv
+from utils.file_to_df import file_to_df
+from utils.redact_csv_bytes import redact_csv_bytes
+from utils.redact_pii import redact_pii
+from utils.to_byte_stream import to_byte_stream
+
+PII_FIELDS = ["name", "email"]
+
+
+def run_copy(data):
+    shutil.copyfileobj(io.BytesIO(data), NullSink())
+
+
+def run_bytes(data):
+    redact_csv_bytes(io.BytesIO(data), PII_FIELDS, NullSink())
+
+
+def run_quoted_bytes(data):
+    # every field quoted so every record goes through the tokenizer
+    redact_csv_bytes(io.BytesIO(data), PII_FIELDS, NullSink())
+
+
+def run_pandas(data):
+    df = file_to_df(io.BytesIO(data), "csv")
+    to_byte_stream(redact_pii(df, PII_FIELDS), "csv")
+
+
+def main(size):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.csv")
+        generate_csv(path, size)
+        with open(path, "rb") as f:
+            data = f.read()
+
+    quoted = b"\n".join(
+        b",".join(b'"' + field + b'"' for field in line.split(b","))
+        for line in data.split(b"\n")
+    )
+
+    print(f"{'mode':>14} {'MB/s':>8}")
+    for name, func, payload in (
+        ("memcpy", run_copy, data),
+        ("bytes", run_bytes, data),
+        ("bytes quoted", run_quoted_bytes, quoted),
+        ("pandas", run_pandas, data),
+    ):
+        start = time.perf_counter()
+        func(payload)
+        seconds = time.perf_counter() - start
+        print(f"{name:>14} {len(payload) / 2**20 / seconds:8.1f}")
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 100)
@@ -0,0 +1,142 @@
+"""
+masks nested values of deeply nested json records: paths compiled
+once and applied to every batch while streaming, the same paths
+parsed again for every record, and flattening every record with
+pd.json_normalize first; json_normalize can't reach into lists so
+the contacts[*] paths are left out of its run
+
+"no paths" streams the file without masking anything, the cost of
+reading and writing the nested records
+
+usage: PYTHONPATH=. python benchmark/bench_json_paths.py [rows] [depth]
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from benchmark.common import NullSink, file_size_mb, run_isolated
+
+# records per chunk when streaming
+CHUNK_SIZE = 10_000
+
+
+def nested_paths(depth):
+    address = ".".join(f"level_{i}" for i in range(depth))
+    return [
+        f"customer.{address}.street",
+        f"customer.{address}.postcode",
+        "contacts[*].email",
+        "contacts[*].device.ip",
+    ]
+
+
+def generate_nested(path, rows, depth, seed=0):
+    """writes a json array of records nesting depth objects deep"""
+
+    rng = random.Random(seed)
+
+    def address(level):
+        if level == depth:
+            return {
+                "street": f"{rng.randint(1, 999)} Main St",
+                "postcode": f"AB{rng.randint(1, 99)} {rng.randint(1, 9)}CD",
+                "city": "Leeds",
+            }
+        return {f"level_{level}": address(level + 1), "note": level}
+
+    with open(path, "w") as f:
+        f.write("[")
+        for i in range(rows):
+            record = {
+                "id": i,
+                "customer": address(0),
+                "contacts": [
+                    {
+                        "email": f"user{i}_{j}@example.com",
+                        "device": {"ip": f"10.0.{j}.{i % 255}", "os": "x"},
+                    }
+                    for j in range(3)
+                ],
+            }
+            f.write(("," if i else "") + json.dumps(record))
+        f.write("]")
+
+
+def stream(path, paths=None, redacted=None):
+    from utils.chunks_to_byte_stream import chunks_to_byte_stream
+    from utils.file_to_chunks import file_to_chunks
+
+    start = time.perf_counter()
+    sink = NullSink()
+    with open(path, "rb") as body:
+        chunks = file_to_chunks(body, "json", CHUNK_SIZE, paths=paths)
+        if redacted is not None:
+            chunks = redacted(chunks)
+        chunks_to_byte_stream(chunks, "json", sink)
+    return time.perf_counter() - start
+
+
+def run_no_paths(path, paths):
+    return stream(path)
+
+
+def run_compiled(path, paths):
+    from utils.json_paths import JsonPaths
+
+    return stream(path, paths=JsonPaths(paths))
+
+
+def run_per_record(path, paths):
+    from utils.json_paths import JsonPaths, parse_path
+
+    def redacted(chunks):
+        for chunk in chunks:
+            for field in paths:
+                column = parse_path(field)[0]
+                for value in chunk[column].to_numpy():
+                    JsonPaths([field]).redact({column: value})
+            yield chunk
+
+    return stream(path, redacted=redacted)
+
+
+def run_normalize(path, paths):
+    import pandas as pd
+
+    columns = [field for field in paths if "[" not in field]
+
+    start = time.perf_counter()
+    with open(path, "rb") as body:
+        df = pd.json_normalize(json.load(body))
+    df[columns] = "***"
+    df.to_json(NullSink(), orient="records")
+    return time.perf_counter() - start
+
+
+def main(rows, depth):
+    paths = nested_paths(depth)
+
+    print(f"{'mode':>11} {'rows/s':>9} {'peak RSS MB':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "nested.json")
+        generate_nested(path, rows, depth)
+        print(f"{rows} records, depth {depth}, {file_size_mb(path):.0f} MB")
+        for name, func in (
+            ("no paths", run_no_paths),
+            ("compiled", run_compiled),
+            ("per record", run_per_record),
+            ("normalize", run_normalize),
+        ):
+            seconds, rss = run_isolated(func, path, paths)
+            print(f"{name:>11} {rows / seconds:9,.0f} {rss:12.0f}")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 200_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 10,
+    )
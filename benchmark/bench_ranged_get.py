@@ -0,0 +1,84 @@
+"""
+compares reading a large object through a single GET against
+concurrent ranged GETs, the s3 client is simulated with a fixed
+first byte latency and a per connection bandwidth cap so the
+numbers reflect a link where one TCP stream is the bottleneck
+
+usage: PYTHONPATH=. python benchmark/bench_ranged_get.py [size MB]
+       [latency ms] [per stream MB/s]
+"""
+
+import sys
+import time
+
+from benchmark.common import NullSink
+
+
+class ThrottledBody:
+    """StreamingBody stand in delivering bytes at a capped rate"""
+
+    def __init__(self, data, latency, bandwidth):
+        self._data = memoryview(data)
+        self._bandwidth = bandwidth
+        self._first_read = True
+        self._latency = latency
+
+    def read(self, size=-1):
+        if self._first_read:
+            time.sleep(self._latency)
+            self._first_read = False
+        if size is None or size < 0:
+            size = len(self._data)
+        piece = self._data[:size]
+        self._data = self._data[len(piece) :]  # noqa: E203
+        time.sleep(len(piece) / self._bandwidth)
+        return bytes(piece)
+
+
+class ThrottledClient:
+    def __init__(self, data, latency, bandwidth):
+        self.data = data
+        self.latency = latency
+        self.bandwidth = bandwidth
+
+    def head_object(self, Bucket, Key):
+        return {"ContentLength": len(self.data), "ETag": '"bench"'}
+
+    def get_object(self, Bucket, Key, Range=None, IfMatch=None):
+        data = self.data
+        if Range is not None:
+            start, end = Range.removeprefix("bytes=").split("-")
+            data = data[int(start) : int(end) + 1]  # noqa: E203
+        return {"Body": ThrottledBody(data, self.latency, self.bandwidth)}
+
+
+def copy(body):
+    sink = NullSink()
+    while chunk := body.read(1024 * 1024):
+        sink.write(chunk)
+    return sink.bytes_written
+
+
+def main(size_mb, latency_ms, bandwidth_mb):
+    from utils.ranged_stream import RangedStream
+
+    data = bytes(int(size_mb * 1024 * 1024))
+    client = ThrottledClient(data, latency_ms / 1000, bandwidth_mb * 2**20)
+
+    print(f"{'mode':>12} {'seconds':>8} {'MB/s':>8}")
+
+    start = time.perf_counter()
+    copy(client.get_object(Bucket="b", Key="k")["Body"])
+    seconds = time.perf_counter() - start
+    print(f"{'single GET':>12} {seconds:8.2f} {size_mb / seconds:8.0f}")
+
+    start = time.perf_counter()
+    with RangedStream(client, "b", "k", len(data), etag='"bench"') as body:
+        copy(body)
+    seconds = time.perf_counter() - start
+    print(f"{'ranged GETs':>12} {seconds:8.2f} {size_mb / seconds:8.0f}")
+
+
+if __name__ == "__main__":
+    args = [float(a) for a in sys.argv[1:]]
+    main(*(args + [256, 30, 40][len(args) :]))  # noqa: E203
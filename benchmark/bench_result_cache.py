@@ -0,0 +1,79 @@
+"""
+latency of asking for the same redacted file again, without the
+result cache, on its first (miss) and on its following (hit) calls
+
+runs against moto, so a hit saves the download, parse, redact and
+write of the file but not the round trip a real endpoint adds to
+the conditional GET
+
+usage: PYTHONPATH=. python benchmark/bench_result_cache.py [size in MB]
+"""
+
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.setdefault("AWS_DEFAULT_REGION", "eu-west-2")
+
+# calls per mode
+REPEATS = 10
+
+
+def timed(payload):
+    from src.obfuscate_main import obfuscator_main
+
+    start = time.perf_counter()
+    obfuscator_main(payload)
+    return (time.perf_counter() - start) * 1000
+
+
+def main(size):
+    import boto3
+    from moto import mock_aws
+    from benchmark.common import generate_csv
+    from utils.result_cache import (
+        configure_result_cache,
+        get_result_cache,
+        reset_result_cache,
+    )
+
+    payload = json.dumps(
+        {
+            "file_to_obfuscate": "s3://bench/daily/bench.csv",
+            "pii_fields": ["name", "email"],
+        }
+    )
+
+    with tempfile.TemporaryDirectory() as tmp, mock_aws():
+        path = os.path.join(tmp, "bench.csv")
+        generate_csv(path, size)
+        s3 = boto3.client("s3")
+        s3.create_bucket(
+            Bucket="bench",
+            CreateBucketConfiguration={"LocationConstraint": "eu-west-2"},
+        )
+        with open(path, "rb") as f:
+            s3.put_object(Bucket="bench", Key="daily/bench.csv", Body=f.read())
+
+        uncached = [timed(payload) for _ in range(REPEATS)]
+
+        configure_result_cache(os.path.join(tmp, "results"))
+        miss = timed(payload)
+        hits = [timed(payload) for _ in range(REPEATS)]
+        stats = get_result_cache().stats()
+        reset_result_cache()
+
+    print(f"{'mode':>8} {'median ms':>10}")
+    print(f"{'uncached':>8} {statistics.median(uncached):10.1f}")
+    print(f"{'miss':>8} {miss:10.1f}")
+    print(f"{'hit':>8} {statistics.median(hits):10.1f}")
+    print(f"hit rate {stats['hit_rate']:.3f}, {stats['bytes']} bytes cached")
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,68 @@
+"""
+compares the per file latency of fetching many small objects with
+a new boto3 client per file against the shared pooled client
+
+runs against moto, so it measures client creation (credential
+resolution, endpoint and pool setup) but not the TLS handshakes a
+real endpoint adds on top for every new connection
+
+usage: PYTHONPATH=. python benchmark/bench_s3_client.py [objects]
+"""
+
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.setdefault("AWS_DEFAULT_REGION", "eu-west-2")
+
+
+def new_client_per_file(bucket, key):
+    import boto3
+
+    s3_client = boto3.client("s3")
+    return s3_client.get_object(Bucket=bucket, Key=key)["Body"].read()
+
+
+def shared_client(bucket, key):
+    from utils.get_file_content import get_file_content
+
+    return get_file_content(f"s3://{bucket}/{key}").read()
+
+
+def main(n_objects):
+    import boto3
+    from moto import mock_aws
+
+    with mock_aws():
+        s3 = boto3.client("s3")
+        s3.create_bucket(
+            Bucket="bench",
+            CreateBucketConfiguration={"LocationConstraint": "eu-west-2"},
+        )
+        keys = [f"small/{i}.csv" for i in range(n_objects)]
+        for key in keys:
+            s3.put_object(Bucket="bench", Key=key, Body=b"id,name\n1,x\n")
+
+        print(f"{'mode':>12} {'mean ms':>8} {'p95 ms':>8} {'total s':>8}")
+        for name, fetch in (
+            ("new client", new_client_per_file),
+            ("shared", shared_client),
+        ):
+            latencies = []
+            for key in keys:
+                start = time.perf_counter()
+                fetch("bench", key)
+                latencies.append((time.perf_counter() - start) * 1000)
+
+            p95 = statistics.quantiles(latencies, n=20)[-1]
+            print(
+                f"{name:>12} {statistics.mean(latencies):8.2f} "
+                f"{p95:8.2f} {sum(latencies) / 1000:8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
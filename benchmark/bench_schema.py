@@ -0,0 +1,82 @@
+"""
+read and read + redact + write throughput of csv and json lines
+files with types inferred by pandas against a caller supplied schema
+and the "string" schema
+
+usage: PYTHONPATH=. python benchmark/bench_schema.py [size in MB]
+"""
+
+import io
+import os
+import sys
+import tempfile
+import time
+
+from benchmark.common import NullSink, generate_csv, generate_jsonl
+from utils.file_to_df import file_to_df
+from utils.redact_pii import redact_pii
+from utils.to_byte_stream import to_byte_stream
+
+PII_FIELDS = ["name", "email"]
+
+SCHEMAS = {
+    "inferred": None,
+    "schema": {
+        "id": "int64",
+        "name": "str",
+        "age": "int64",
+        "email": "str",
+        "course": "str",
+    },
+    "string": "string",
+}
+
+
+def read(data, fmt, schema):
+    df = file_to_df(io.BytesIO(data), fmt, schema=schema)
+    if df is None:
+        raise RuntimeError(f"Failed to read the {fmt} file")
+    return df
+
+
+def run(data, fmt, schema):
+    df = read(data, fmt, schema)
+    to_byte_stream(redact_pii(df, PII_FIELDS), fmt, NullSink())
+
+
+def best_of(func, repeats=3):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def main(size):
+    files = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt, generate in (
+            ("csv", generate_csv),
+            ("jsonl", generate_jsonl),
+        ):
+            path = os.path.join(tmp, f"bench.{fmt}")
+            generate(path, size)
+            with open(path, "rb") as f:
+                files[fmt] = f.read()
+
+    print(f"{'format':>6} {'schema':>9} {'read MB/s':>10} {'total MB/s':>10}")
+    for fmt, data in files.items():
+        size_mb = len(data) / 2**20
+        for name, schema in SCHEMAS.items():
+            read_s = best_of(lambda: read(data, fmt, schema))
+            total_s = best_of(lambda: run(data, fmt, schema))
+            print(
+                f"{fmt:>6} {name:>9} {size_mb / read_s:10.1f} "
+                f"{size_mb / total_s:10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -0,0 +1,73 @@
+"""
+files per second of many small csv files sharing one s3 prefix,
+read + redact + write with the types inferred for every file
+against the "cached" schema of utils.schema_cache
+
+usage: PYTHONPATH=. python benchmark/bench_schema_cache.py [files] [size in MB]
+"""
+
+import io
+import os
+import sys
+import tempfile
+import time
+
+from benchmark.common import NullSink, generate_csv
+from utils.file_to_df import file_to_df
+from utils.redact_pii import redact_pii
+from utils.schema_cache import get_schema_cache, reset_schema_cache
+from utils.to_byte_stream import to_byte_stream
+
+PII_FIELDS = ["name", "email"]
+
+KEY = ("bench", "daily/", "csv")
+
+# distinct files, reused round robin so generating them stays cheap
+SAMPLES = 10
+
+
+def run(data, schema):
+    df = file_to_df(
+        io.BytesIO(data), "csv", PII_FIELDS, schema=schema, cache_key=KEY
+    )
+    if df is None:
+        raise RuntimeError("Failed to read the csv file")
+    to_byte_stream(redact_pii(df, PII_FIELDS), "csv", NullSink())
+
+
+def files_per_second(samples, files, schema):
+    reset_schema_cache()
+    start = time.perf_counter()
+    for i in range(files):
+        run(samples[i % len(samples)], schema)
+    return files / (time.perf_counter() - start)
+
+
+def main(files, size):
+    print(
+        f"{'columns':>7} {'inferred files/s':>16} "
+        f"{'cached files/s':>14} {'hit rate':>8}"
+    )
+    for extra_columns in (0, 15):
+        samples = []
+        with tempfile.TemporaryDirectory() as tmp:
+            for seed in range(SAMPLES):
+                path = os.path.join(tmp, f"{seed}.csv")
+                generate_csv(path, size, seed, extra_columns)
+                with open(path, "rb") as f:
+                    samples.append(f.read())
+
+        inferred = files_per_second(samples, files, None)
+        cached = files_per_second(samples, files, "cached")
+        hit_rate = get_schema_cache().stats()["hit_rate"]
+        print(
+            f"{5 + extra_columns:>7} {inferred:16.1f} "
+            f"{cached:14.1f} {hit_rate:8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 0.1,
+    )
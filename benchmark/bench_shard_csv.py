@@ -0,0 +1,65 @@
+"""
+wall time of a large csv redacted in a single process against the
+same csv sharded across 1, 2 and 4 processes, for both engines
+
+the speed up is bounded by the number of cores of the machine, the
+process pool start up is paid once per call
+
+usage: PYTHONPATH=. python benchmark/bench_shard_csv.py [size in MB]
+"""
+
+import io
+import os
+import sys
+import tempfile
+import time
+
+from benchmark.common import NullSink, generate_csv
+from utils.file_to_df import file_to_df
+from utils.redact_csv_bytes import redact_csv_bytes
+from utils.redact_pii import redact_pii
+from utils.shard_csv import shard_csv
+from utils.to_byte_stream import to_byte_stream
+
+PII_FIELDS = ["name", "email"]
+
+
+def run_pandas(data):
+    df = file_to_df(io.BytesIO(data), "csv")
+    to_byte_stream(redact_pii(df, PII_FIELDS), "csv", NullSink())
+
+
+def run_bytes(data):
+    redact_csv_bytes(io.BytesIO(data), PII_FIELDS, NullSink())
+
+
+def sharded(engine, processes):
+    def run(data):
+        shard_csv(io.BytesIO(data), PII_FIELDS, processes, engine, NullSink())
+
+    return run
+
+
+def main(size):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.csv")
+        generate_csv(path, size)
+        with open(path, "rb") as f:
+            data = f.read()
+
+    print(f"{os.cpu_count()} cores, {len(data) / 2**20:.0f} MB")
+    print(f"{'mode':>18} {'seconds':>8} {'MB/s':>8}")
+    runs = [("pandas", run_pandas), ("bytes", run_bytes)]
+    for engine in ("pandas", "bytes"):
+        for processes in (1, 2, 4):
+            runs.append((f"{engine} x{processes}", sharded(engine, processes)))
+
+    for name, func in runs:
+        start = time.perf_counter()
+        func(data)
+        seconds = time.perf_counter() - start
+        print(f"{name:>18} {seconds:8.2f} {len(data) / 2**20 / seconds:8.1f}")
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,115 @@
+"""
+cold start of the package: every run is a fresh interpreter that
+imports src.obfuscate_main and redacts one small file from s3, the
+way a new lambda instance handles its first request
+
+reports the import time, the time to the first result (import
+included) and the heavy dependencies the run had to load, median
+of the runs for every format and engine
+
+the files are served by a local moto server so the runs import
+boto3 themselves instead of finding it loaded by moto; needs
+moto[server] (flask)
+
+usage: PYTHONPATH=. python benchmark/bench_startup.py [runs]
+"""
+
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.setdefault("AWS_DEFAULT_REGION", "eu-west-2")
+
+HEAVY = ("boto3", "numpy", "pandas", "pyarrow")
+
+RUN = """
+import json, sys, time
+start = time.perf_counter()
+from src.obfuscate_main import obfuscator_main
+imported = time.perf_counter()
+obfuscator_main(sys.argv[1])
+done = time.perf_counter()
+print(json.dumps({
+    "import": imported - start,
+    "first_result": done - start,
+    "loaded": [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY,)
+
+CASES = (
+    ("csv", "data.csv", {}),
+    ("csv bytes", "data.csv", {"engine": "bytes"}),
+    ("jsonl", "data.jsonl", {}),
+    ("parquet", "data.parquet", {}),
+    ("parquet arrow", "data.parquet", {"engine": "arrow"}),
+)
+
+
+def cold_run(payload: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", RUN, payload],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+
+    return json.loads(result.stdout)
+
+
+def main(runs):
+    import boto3
+    import pandas as pd
+    from moto.server import ThreadedMotoServer
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = ThreadedMotoServer(port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    os.environ["AWS_ENDPOINT_URL"] = f"http://{host}:{port}"
+
+    try:
+        s3 = boto3.client("s3")
+        s3.create_bucket(
+            Bucket="bench",
+            CreateBucketConfiguration={"LocationConstraint": "eu-west-2"},
+        )
+        df = pd.DataFrame(
+            {"id": range(100), "name": "a name", "email": "a@b.c"}
+        )
+        s3.put_object(
+            Bucket="bench", Key="data.csv", Body=df.to_csv(index=False)
+        )
+        s3.put_object(
+            Bucket="bench",
+            Key="data.jsonl",
+            Body=df.to_json(orient="records", lines=True),
+        )
+        s3.put_object(Bucket="bench", Key="data.parquet", Body=df.to_parquet())
+
+        print(f"{'case':>14} {'import ms':>10} {'first ms':>10}  loaded")
+        for name, key, options in CASES:
+            payload = json.dumps(
+                {
+                    "file_to_obfuscate": f"s3://bench/{key}",
+                    "pii_fields": ["name", "email"],
+                    **options,
+                }
+            )
+            results = [cold_run(payload) for _ in range(runs)]
+            imported = statistics.median(r["import"] for r in results)
+            first = statistics.median(r["first_result"] for r in results)
+            print(
+                f"{name:>14} {imported * 1000:10.0f} {first * 1000:10.0f}"
+                f"  {', '.join(results[0]['loaded'])}"
+            )
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,88 @@
+"""
+rows per second of the partial masking strategies applied with a
+python function per row against the arrow compute kernels of
+utils.strategies, on a DataFrame column (converted to arrow and
+back, as the pandas engine does) and on an arrow column (as the
+arrow engine does)
+
+usage: PYTHONPATH=. python benchmark/bench_strategies.py [rows]
+"""
+
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import pyarrow as pa
+
+from utils.strategies import MASK, partially_mask, partially_mask_series
+
+
+def email_domain(value):
+    if "@" not in value:
+        return MASK
+    return MASK + "@" + value.rsplit("@", 1)[1]
+
+
+def last_digits(value, keep=4):
+    digits = re.sub(r"\D", "", value)
+    return MASK + digits[-keep:] if len(digits) > keep else MASK
+
+
+def truncate(value, keep=3):
+    return value[:keep] + MASK if len(value) > keep else MASK
+
+
+def columns(rows):
+    rng = np.random.default_rng(0)
+    ids = rng.integers(0, 10_000_000, rows)
+
+    return {
+        "email_domain": pd.Series(
+            [f"user{i}@example{i % 50}.com" for i in ids]
+        ),
+        "last_digits": pd.Series([f"+44 7700 {i:07d}" for i in ids]),
+        "truncate": pd.Series([f"SW{i % 99} {i % 9}AA" for i in ids]),
+    }
+
+
+def best_of(func, repeats=3):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def main(rows):
+    per_row = {
+        "email_domain": email_domain,
+        "last_digits": last_digits,
+        "truncate": truncate,
+    }
+
+    print(
+        f"{'strategy':>13} {'per row rows/s':>15} "
+        f"{'pandas rows/s':>14} {'arrow rows/s':>13} {'speedup':>8}"
+    )
+    for strategy, series in columns(rows).items():
+        func = per_row[strategy]
+        assert series.map(func).equals(partially_mask_series(series, strategy))
+
+        per_row_s = best_of(lambda: series.map(func))
+        pandas_s = best_of(lambda: partially_mask_series(series, strategy))
+        column = pa.array(series)
+        arrow_s = best_of(lambda: partially_mask(column, strategy))
+        print(
+            f"{strategy:>13} {rows / per_row_s:15,.0f} "
+            f"{rows / pandas_s:14,.0f} {rows / arrow_s:13,.0f} "
+            f"{per_row_s / pandas_s:8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,68 @@
+"""
+compares peak RSS of the in-memory json lines pipeline against
+the streaming one for growing file sizes
+
+usage: PYTHONPATH=. python benchmark/bench_streaming_jsonl.py [sizes in MB]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from benchmark.common import (
+    NullSink,
+    file_size_mb,
+    generate_jsonl,
+    run_isolated,
+)
+
+PII_FIELDS = ["name", "email"]
+
+
+def run_in_memory(path):
+    from utils.file_to_df import file_to_df
+    from utils.redact_pii import redact_pii
+    from utils.to_byte_stream import to_byte_stream
+
+    start = time.perf_counter()
+    with open(path, "rb") as body:
+        df = file_to_df(body, "jsonl")
+        output = to_byte_stream(redact_pii(df, PII_FIELDS), "jsonl")
+    return time.perf_counter() - start, len(output.getbuffer())
+
+
+def run_streaming(path):
+    from utils.file_to_chunks import file_to_chunks
+    from utils.redact_pii import redact_pii
+    from utils.chunks_to_byte_stream import chunks_to_byte_stream
+
+    start = time.perf_counter()
+    sink = NullSink()
+    with open(path, "rb") as body:
+        chunks = file_to_chunks(body, "jsonl")
+        chunks_to_byte_stream(
+            (redact_pii(chunk, PII_FIELDS) for chunk in chunks), "jsonl", sink
+        )
+    return time.perf_counter() - start, sink.bytes_written
+
+
+def main(sizes):
+    print(f"{'size MB':>8} {'mode':>10} {'seconds':>8} {'peak RSS MB':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            path = os.path.join(tmp, f"bench_{size}.jsonl")
+            generate_jsonl(path, size)
+            for name, func in (
+                ("in-memory", run_in_memory),
+                ("streaming", run_streaming),
+            ):
+                (seconds, _), rss = run_isolated(func, path)
+                print(
+                    f"{file_size_mb(path):8.0f} {name:>10} "
+                    f"{seconds:8.2f} {rss:12.0f}"
+                )
+
+
+if __name__ == "__main__":
+    main([float(s) for s in sys.argv[1:]] or [10, 50, 200])
@@ -0,0 +1,185 @@
+import csv
+import io
+import multiprocessing
+import os
+import queue as queue_module
+import random
+import resource
+import string
+
+
+class NullSink(io.RawIOBase):
+    """
+    writable binary sink that discards everything written to it,
+    used so benchmarks measure the pipeline and not the output buffer
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.bytes_written = 0
+
+    def write(self, data):
+        self.bytes_written += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.bytes_written
+
+    def writable(self):
+        return True
+
+
+def peak_rss_mb() -> float:
+    """peak resident set size of the current process in MB"""
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _random_word(rng, length):
+    return "".join(rng.choices(string.ascii_lowercase, k=length))
+
+
+def generate_csv(
+    path: str, target_mb: float, seed: int = 0, extra_columns: int = 0
+) -> int:
+    """
+    write a csv of roughly target_mb megabytes with a mix of
+    pii and non pii columns, returns the number of rows written
+
+    extra_columns adds that many non pii columns (col_1, col_2, ...)
+    alternating integers and short words, for wide schemas
+    """
+
+    rng = random.Random(seed)
+    target_bytes = int(target_mb * 1024 * 1024)
+    rows = 0
+
+    extra_rng = random.Random(seed + 1)
+    words = [_random_word(extra_rng, 8) for _ in range(1000)]
+
+    def extra_values():
+        return [
+            extra_rng.choice(words) if i % 2 else extra_rng.randint(0, 10**6)
+            for i in range(extra_columns)
+        ]
+
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(
+            ["id", "name", "age", "email", "course"]
+            + [f"col_{i}" for i in range(1, extra_columns + 1)]
+        )
+        while f.tell() < target_bytes:
+            for _ in range(1000):
+                rows += 1
+                writer.writerow(
+                    [
+                        rows,
+                        _random_word(rng, 12),
+                        rng.randint(18, 65),
+                        f"{_random_word(rng, 8)}@example.com",
+                        _random_word(rng, 10),
+                    ]
+                    + extra_values()
+                )
+
+    return rows
+
+
+def generate_jsonl(path: str, target_mb: float, **options) -> int:
+    """
+    write a json lines file with the same records as generate_csv,
+    one object per line, options are passed to generate_csv
+    """
+
+    import json
+
+    csv_path = path + ".csv"
+    rows = generate_csv(csv_path, target_mb, **options)
+
+    with open(csv_path, newline="") as src, open(path, "w") as dst:
+        for record in csv.DictReader(src):
+            dst.write(json.dumps(record) + "\n")
+    os.remove(csv_path)
+
+    return rows
+
+
+def generate_json(path: str, target_mb: float, **options) -> int:
+    """
+    write a single top level json array with the same records
+    as generate_csv, options are passed to generate_csv
+    """
+
+    import json
+
+    csv_path = path + ".csv"
+    rows = generate_csv(csv_path, target_mb, **options)
+
+    with open(csv_path, newline="") as src, open(path, "w") as dst:
+        dst.write("[")
+        for i, record in enumerate(csv.DictReader(src)):
+            dst.write(("," if i else "") + json.dumps(record))
+        dst.write("]")
+    os.remove(csv_path)
+
+    return rows
+
+
+def generate_parquet(
+    path: str, target_mb: float, row_group_rows: int = 100_000, **options
+) -> int:
+    """
+    write a parquet file with the same columns as generate_csv,
+    split into row groups of row_group_rows rows, options are
+    passed to generate_csv
+    """
+
+    import pyarrow.csv as pv
+    import pyarrow.parquet as pq
+
+    csv_path = path + ".csv"
+    rows = generate_csv(csv_path, target_mb, **options)
+
+    reader = pv.open_csv(csv_path)
+    with pq.ParquetWriter(path, reader.schema) as writer:
+        for batch in reader:
+            writer.write_batch(batch, row_group_size=row_group_rows)
+    os.remove(csv_path)
+
+    return rows
+
+
+def _child(queue, func, args):
+    result = func(*args)
+    queue.put((result, peak_rss_mb()))
+
+
+def run_isolated(func, *args):
+    """
+    run func(*args) in a fresh process so its peak RSS is not
+    polluted by earlier runs, returns (result, peak_rss_mb)
+    """
+
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_child, args=(queue, func, args))
+    proc.start()
+
+    # polling so a child killed by the OOM killer does not hang us
+    while True:
+        try:
+            result = queue.get(timeout=1)
+            break
+        except queue_module.Empty:
+            if not proc.is_alive():
+                raise RuntimeError(
+                    f"benchmark process died with exit code {proc.exitcode}"
+                )
+    proc.join()
+
+    return result
+
+
+def file_size_mb(path: str) -> float:
+    return os.path.getsize(path) / (1024 * 1024)
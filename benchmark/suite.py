@@ -0,0 +1,387 @@
+"""
+benchmark suite of the redaction pipelines, every case reads,
+redacts and writes one generated file in a fresh process and
+reports MB/s, rows/s and peak RSS per stage
+
+cases cover csv, json and parquet files, narrow (5 columns) and
+wide (50 columns) schemas, two ratios of pii columns and both the
+in-memory and the streaming pipelines; the quick profile runs 1 and
+10 MB files, the full one goes from 1 MB to 4 GB (files above
+MEMORY_MAX_MB only run through the streaming pipeline)
+
+the results are compared against benchmark/baseline.json and the
+suite exits with 1 when a stage got slower or a case used more
+memory than the baseline allows; the baseline is only meaningful on
+the machine it was recorded on, re-record it with --update-baseline
+
+usage: PYTHONPATH=. python benchmark/suite.py [--profile quick|full]
+    [--tolerance 0.3] [--only csv-1mb] [--update-baseline]
+    [--data-dir dir] [--baseline path]
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from benchmark.common import (
+    NullSink,
+    file_size_mb,
+    generate_csv,
+    generate_json,
+    generate_parquet,
+    peak_rss_mb,
+    run_isolated,
+)
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+FORMATS = ("csv", "json", "parquet")
+
+# extra non pii columns on top of the 5 of generate_csv
+SCHEMAS = {"narrow": 0, "wide": 45}
+
+# share of the columns redacted
+PII_RATIOS = (0.2, 0.6)
+
+PROFILES = {
+    "quick": {"sizes": (1, 10), "repeats": 3},
+    "full": {"sizes": (1, 100, 1000, 4000), "repeats": 1},
+}
+
+# larger files are only run through the streaming pipeline
+MEMORY_MAX_MB = 1000
+
+STAGES = ("read", "redact", "write", "total")
+
+# allowed slowdown / memory growth before a case fails
+DEFAULT_TOLERANCE = 0.3
+
+# stages faster than this in the baseline are too noisy to compare
+MIN_COMPARED_SECONDS = 0.05
+
+# peak RSS growth always allowed, covers allocator noise
+RSS_SLACK_MB = 25
+
+# columns redacted first, the rest are picked in schema order
+_PII_ORDER = ("name", "email", "id", "course", "age")
+
+_GENERATORS = {
+    "csv": generate_csv,
+    "json": generate_json,
+    "parquet": generate_parquet,
+}
+
+
+def build_cases(profile: str) -> list:
+    """every case of the profile as a dict, keyed by its name"""
+
+    cases = []
+
+    for fmt in FORMATS:
+        for size in PROFILES[profile]["sizes"]:
+            for schema in SCHEMAS:
+                for ratio in PII_RATIOS:
+                    pipelines = ("memory", "streaming")
+                    if size > MEMORY_MAX_MB:
+                        pipelines = ("streaming",)
+                    for pipeline in pipelines:
+                        cases.append(
+                            {
+                                "name": (
+                                    f"{fmt}-{size}mb-{schema}-"
+                                    f"pii{round(ratio * 100)}-{pipeline}"
+                                ),
+                                "format": fmt,
+                                "size": size,
+                                "schema": schema,
+                                "ratio": ratio,
+                                "pipeline": pipeline,
+                            }
+                        )
+
+    return cases
+
+
+def pii_fields(schema: str, ratio: float) -> list:
+    """the columns redacted for a schema and pii ratio"""
+
+    extra = [f"col_{i}" for i in range(1, SCHEMAS[schema] + 1)]
+    columns = list(_PII_ORDER) + extra
+    count = max(1, math.ceil(ratio * len(columns)))
+
+    return columns[:count]
+
+
+def data_file(data_dir: str, case: dict) -> str:
+    """generates the file of a case unless it already exists"""
+
+    path = os.path.join(
+        data_dir, f"{case['schema']}_{case['size']}mb.{case['format']}"
+    )
+
+    if not os.path.exists(path):
+        _GENERATORS[case["format"]](
+            path, case["size"], extra_columns=SCHEMAS[case["schema"]]
+        )
+
+    return path
+
+
+def run_case(path: str, fmt: str, fields: list, pipeline: str, repeats):
+    """
+    runs one case repeats times, meant for a fresh process
+
+    Return:
+        (best seconds per stage, peak RSS in MB per stage, rows),
+        the streaming pipeline interleaves its stages so only its
+        total has a peak RSS
+    """
+
+    run = _run_memory if pipeline == "memory" else _run_streaming
+
+    best = None
+    for _ in range(repeats):
+        seconds, rss, rows = run(path, fmt, fields)
+        if best is None:
+            best, first_rss = seconds, rss
+        else:
+            best = {stage: min(best[stage], seconds[stage]) for stage in best}
+
+    return best, first_rss, rows
+
+
+def _run_memory(path, fmt, fields):
+    from utils.file_to_df import file_to_df
+    from utils.redact_pii import redact_pii
+    from utils.to_byte_stream import to_byte_stream
+
+    seconds, rss = {}, {}
+    start = time.perf_counter()
+
+    with open(path, "rb") as body:
+        df = file_to_df(body, fmt)
+    if df is None:
+        raise RuntimeError(f"Failed to read {path}")
+    seconds["read"] = time.perf_counter() - start
+    rss["read"] = peak_rss_mb()
+
+    stage = time.perf_counter()
+    redacted = redact_pii(df, fields)
+    seconds["redact"] = time.perf_counter() - stage
+    rss["redact"] = peak_rss_mb()
+
+    stage = time.perf_counter()
+    if to_byte_stream(redacted, fmt, NullSink()) is None:
+        raise RuntimeError(f"Failed to write {path}")
+    seconds["write"] = time.perf_counter() - stage
+    rss["write"] = peak_rss_mb()
+
+    seconds["total"] = time.perf_counter() - start
+    rss["total"] = peak_rss_mb()
+
+    return seconds, rss, len(df)
+
+
+def _run_streaming(path, fmt, fields):
+    from utils.file_to_chunks import file_to_chunks
+    from utils.redact_pii import redact_pii
+    from utils.chunks_to_byte_stream import chunks_to_byte_stream
+
+    seconds = {"read": 0.0, "redact": 0.0}
+    rows = 0
+
+    def timed(chunks):
+        nonlocal rows
+        chunks = iter(chunks)
+        while True:
+            stage = time.perf_counter()
+            chunk = next(chunks, None)
+            seconds["read"] += time.perf_counter() - stage
+            if chunk is None:
+                return
+
+            stage = time.perf_counter()
+            redacted = redact_pii(chunk, fields)
+            seconds["redact"] += time.perf_counter() - stage
+            rows += len(chunk)
+            yield redacted
+
+    start = time.perf_counter()
+
+    with open(path, "rb") as body:
+        chunks = file_to_chunks(body, fmt)
+        if chunks is None:
+            raise RuntimeError(f"Failed to read {path}")
+        if chunks_to_byte_stream(timed(chunks), fmt, NullSink()) is None:
+            raise RuntimeError(f"Failed to write {path}")
+
+    seconds["total"] = time.perf_counter() - start
+    seconds["write"] = seconds["total"] - seconds["read"] - seconds["redact"]
+
+    return seconds, {"total": peak_rss_mb()}, rows
+
+
+def measure(path: str, case: dict, repeats: int) -> dict:
+    """runs a case in a fresh process, returns its metrics per stage"""
+
+    (seconds, rss, rows), _ = run_isolated(
+        run_case,
+        path,
+        case["format"],
+        pii_fields(case["schema"], case["ratio"]),
+        case["pipeline"],
+        repeats,
+    )
+    size = file_size_mb(path)
+
+    return {
+        stage: {
+            "seconds": round(seconds[stage], 4),
+            "mb_per_s": round(size / seconds[stage], 2),
+            "rows_per_s": round(rows / seconds[stage]),
+            "peak_rss_mb": rss.get(stage),
+        }
+        for stage in STAGES
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    checks results against the baseline cases
+
+    Return:
+        one message per stage slower than the baseline throughput
+        by more than tolerance, or using more than tolerance (plus
+        RSS_SLACK_MB) over its baseline peak RSS
+    """
+
+    regressions = []
+
+    for case, stages in results.items():
+        expected = baseline.get(case, {})
+
+        for stage, metrics in stages.items():
+            base = expected.get(stage)
+            if base is None:
+                continue
+
+            if base["seconds"] >= MIN_COMPARED_SECONDS and metrics[
+                "mb_per_s"
+            ] < base["mb_per_s"] * (1 - tolerance):
+                regressions.append(
+                    f"{case} {stage}: {metrics['mb_per_s']:.1f} MB/s, "
+                    f"baseline {base['mb_per_s']:.1f} MB/s"
+                )
+
+            if (
+                metrics["peak_rss_mb"] is not None
+                and base["peak_rss_mb"] is not None
+                and metrics["peak_rss_mb"]
+                > base["peak_rss_mb"] * (1 + tolerance) + RSS_SLACK_MB
+            ):
+                regressions.append(
+                    f"{case} {stage}: peak RSS {metrics['peak_rss_mb']:.0f}"
+                    f" MB, baseline {base['peak_rss_mb']:.0f} MB"
+                )
+
+    return regressions
+
+
+def machine() -> dict:
+    return {
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        "platform": platform.platform(terse=True),
+    }
+
+
+def _change(metrics: dict, base) -> str:
+    if base is None:
+        return ""
+
+    return f"{(metrics['mb_per_s'] / base['mb_per_s'] - 1) * 100:+7.0f}%"
+
+
+def _print_case(name: str, stages: dict, expected: dict):
+    for stage, metrics in stages.items():
+        rss = metrics["peak_rss_mb"]
+        print(
+            f"{name:<36} {stage:>6} {metrics['seconds']:8.3f} "
+            f"{metrics['mb_per_s']:8.1f} {metrics['rows_per_s']:10d} "
+            f"{'-' if rss is None else f'{rss:.0f}':>8} "
+            f"{_change(metrics, expected.get(stage))}"
+        )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--profile", choices=PROFILES, default="quick")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--only", help="run the cases containing this")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--data-dir", help="keeps the generated files")
+    parser.add_argument("--baseline", default=BASELINE)
+    args = parser.parse_args(argv)
+
+    stored = {"machine": None, "cases": {}}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            stored = json.load(f)
+    if stored["machine"] not in (None, machine()):
+        print(
+            f"warning: baseline recorded on {stored['machine']}, "
+            f"running on {machine()}"
+        )
+
+    cases = [
+        case
+        for case in build_cases(args.profile)
+        if not args.only or args.only in case["name"]
+    ]
+    repeats = PROFILES[args.profile]["repeats"]
+
+    print(
+        f"{'case':<36} {'stage':>6} {'seconds':>8} {'MB/s':>8} "
+        f"{'rows/s':>10} {'RSS MB':>8} {'vs base':>8}"
+    )
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir or tmp
+        os.makedirs(data_dir, exist_ok=True)
+        for case in cases:
+            path = data_file(data_dir, case)
+            results[case["name"]] = measure(path, case, repeats)
+            _print_case(
+                case["name"],
+                results[case["name"]],
+                stored["cases"].get(case["name"], {}),
+            )
+
+    if args.update_baseline:
+        stored["machine"] = machine()
+        stored["cases"].update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(stored, f, indent=1, sort_keys=True)
+            f.write("\n")
+        print(f"baseline updated with {len(results)} cases")
+        return 0
+
+    missing = [name for name in results if name not in stored["cases"]]
+    if missing:
+        print(f"{len(missing)} cases have no baseline yet")
+
+    regressions = compare(results, stored["cases"], args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,24 +1,64 @@
 import json
+import hashlib
 import logging
+import functools
+import statistics
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from io import BytesIO
-from utils.get_file_content import get_file_content
+from typing import Callable, Optional, Union
+from utils.get_file_content import get_file_content, fetch_if_changed
 from utils.extract_file_format import extract_file_format
 from utils.file_to_df import file_to_df
 from utils.redact_pii import redact_pii
 from utils.to_byte_stream import to_byte_stream
+from utils.file_to_chunks import file_to_chunks, DEFAULT_CHUNK_SIZE
+from utils.chunks_to_byte_stream import chunks_to_byte_stream
+from utils.file_to_table import file_to_table
+from utils.redact_table import redact_table
+from utils.table_to_byte_stream import table_to_byte_stream
+from utils.redact_csv_bytes import redact_csv_bytes
+from utils.shard_csv import shard_csv
+from utils.cancellable_stream import CancellableStream
+from utils.stage_metrics import StageRecorder, output_size
+from utils.schema import CACHED, is_valid_schema, JSON_FORMATS
+from utils.schema_cache import schema_key
+from utils.result_cache import ResultCache, get_result_cache, result_key
+from utils.tokenizer import Tokenizer, token_key, KEY_ENV
+from utils.strategies import parse_pii_fields, field_names
+from utils.json_paths import JsonPaths, is_path
+from utils.s3_multipart_writer import S3MultipartWriter
+from utils.s3_url import parse_s3_url, parse_s3_prefix
+from utils.list_s3_objects import list_s3_objects, read_manifest
+from utils.lazy_import import lazy_import
 
-
-logging.basicConfig(
-    filename="app.log",
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    force=True,
-)
+# only loaded by obfuscator_main_async
+asyncio = lazy_import("asyncio")
 
 logger = logging.getLogger(__name__)
 
+# files obfuscated at the same time by obfuscate_batch and
+# the prefix and manifest modes
+DEFAULT_BATCH_WORKERS = 8
+
+# payload keys selecting a whole folder instead of a single file
+FOLDER_KEYS = ("prefix_to_obfuscate", "manifest")
+
+# requests run at the same time by obfuscator_main_async, the size
+# of its thread pool and of the per event loop limit in front of it
+DEFAULT_ASYNC_WORKERS = 8
+
+_async_lock = threading.Lock()
+_async_executor = None
+_async_workers = DEFAULT_ASYNC_WORKERS
+_async_limits = weakref.WeakKeyDictionary()
+
 
-def obfuscator_main(json_str: str) -> BytesIO:
+def obfuscator_main(
+    json_str: str, on_stage: Optional[Callable[[dict], None]] = None
+) -> Union[BytesIO, dict]:
     """
     redact Personaly Identifying Inforamtion (pii)
     from the provided file and fields in the
@@ -35,21 +75,100 @@ def obfuscator_main(json_str: str) -> BytesIO:
             "pii_fields: ["list","of", "fields","to","obfuscator]
         }
 
+        optional fields:
+            "streaming": true to read, redact and write the
+            file chunk by chunk with bounded memory
+            (csv, json, jsonl, ndjson, parquet)
+            "chunk_size": number of rows per chunk when streaming
+            "engine": "pandas" (default), "arrow" to run the
+            whole pipeline on pyarrow Tables or "bytes" to redact
+            csv files without parsing them into a DataFrame
+            "processes": number of processes redacting a csv at
+            once, the file is split in record aligned byte ranges
+            (pandas and bytes engines)
+            "schema": {"column": "pandas dtype", ...} read into the
+            csv and json columns instead of inferring their types,
+            "string" to keep every csv value exactly as written, or
+            "cached" to read a csv with the types inferred for the
+            previous files of its s3 prefix (pandas engine)
+            "ranged_get": true to download large files as
+            concurrent ranged GETs
+            "destination": "s3://bucket/key" to upload the output
+            there with a multipart upload while it is being written
+            instead of returning it
+            "redaction": the strategy of the pii fields given by
+            name, "mask" (default) to replace the values with "***",
+            "token" to replace every value with a deterministic
+            keyed hash, see utils.tokenizer, or "compact" to keep
+            the column types with nulls for numbers and dates and a
+            categorical "***" for the other columns
+            "pii_fields" can also hold objects giving the strategy
+            of a field, e.g. {"field": "email", "strategy":
+            "email_domain"}, {"field": "phone", "strategy":
+            "last_digits", "keep": 4} or {"field": "postcode",
+            "strategy": "truncate", "keep": 3}, see
+            utils.strategies; the bytes engine only masks
+            in json files, fields such as "customer.address.street"
+            or "contacts[*].email" name nested values, which are
+            masked while the records are read (pandas engine), see
+            utils.json_paths
+            "cache": false to skip the result cache turned on by
+            utils.result_cache.configure_result_cache, outputs
+            uploaded to a destination are never cached
+
+        folder mode, replacing "file_to_obfuscate":
+            "prefix_to_obfuscate": "s3://bucket/prefix/" to redact
+            every object under the prefix
+            "manifest": "s3://bucket/manifest.txt" listing one
+            object per line, as an s3 url or a key of its bucket
+            "destination": "s3://bucket/prefix/" (required) every
+            output is uploaded under it, mirroring the key below
+            the source prefix (or the whole key for a manifest)
+            "max_workers": number of files processed at the same time
+
+        on_stage: optional callback receiving the metrics of every
+        stage of the pipeline (wall and CPU time, memory delta,
+        bytes and rows in and out) as a dict once the stage is over,
+        see utils.stage_metrics.StageRecorder; log_stage writes
+        them to the logs
+
     Return
-        ByteStream contaning the new obfuscatored file content
-        or {"status": 400} if it fails
+        ByteStream contaning the new obfuscatored file content,
+        {"status": 200, "destination": "s3://..."} once uploaded
+        to the destination or {"status": 400} if it fails;
+        in folder mode the obfuscate_batch summary with a status
+        of 200 when every file succeeded
+    """
+
+    return _obfuscator_main(json_str, on_stage=on_stage)
+
+
+def _obfuscator_main(
+    json_str: str,
+    cancelled: Optional[threading.Event] = None,
+    on_stage: Optional[Callable[[dict], None]] = None,
+) -> Union[BytesIO, dict]:
+    """
+    obfuscator_main, reading the file through a CancellableStream
+    when a cancelled event is given so setting it stops the pipeline
+    at its next read
     """
 
     # loading the string into a dict to be processed by python
     json_payload = json.loads(json_str)
 
+    folder_mode = any(key in json_payload for key in FOLDER_KEYS)
+
     # checking to see if the string in contains required fields
-    if "file_to_obfuscate" not in json_payload:
+    if "file_to_obfuscate" not in json_payload and not folder_mode:
         raise ValueError("Missing 'file_to_obfuscate' in input JSON")
 
     if "pii_fields" not in json_payload:
         raise ValueError("Missing 'pii_fields' in input JSON")
 
+    if folder_mode:
+        return _obfuscate_folder(json_payload, on_stage)
+
     # extracting the file format from the s3 url
     file_format = extract_file_format(json_payload["file_to_obfuscate"])
 
@@ -58,16 +177,264 @@ def obfuscator_main(json_str: str) -> BytesIO:
         logger.error("Failed to retreive file format")
         return {"status": 400}
 
+    engine = json_payload.get("engine", "pandas")
+
+    # checking the requested engine before fetching anything
+    if engine not in ("pandas", "arrow", "bytes"):
+        logger.error(f"Unknown engine: {engine}")
+        return {"status": 400}
+
+    if engine == "bytes" and file_format != "csv":
+        logger.error(f"The bytes engine doesn't support {file_format}")
+        return {"status": 400}
+
+    if "processes" in json_payload and (
+        file_format != "csv" or engine == "arrow"
+    ):
+        logger.error(
+            f"Sharding across processes doesn't support {file_format} "
+            f"with the {engine} engine"
+        )
+        return {"status": 400}
+
+    schema = json_payload.get("schema")
+
+    if schema is not None and not is_valid_schema(schema):
+        logger.error(f"Invalid schema: {schema}")
+        return {"status": 400}
+
+    if schema is not None and engine == "arrow":
+        logger.error("The arrow engine doesn't support a schema")
+        return {"status": 400}
+
+    # the cached schema is only looked up when a whole csv is read
+    if schema == CACHED and (
+        file_format != "csv"
+        or json_payload.get("streaming", False)
+        or "processes" in json_payload
+    ):
+        logger.error(
+            "The cached schema only supports csv files read at once, "
+            "without streaming or processes"
+        )
+        return {"status": 400}
+
+    try:
+        strategies = parse_pii_fields(
+            json_payload["pii_fields"], json_payload.get("redaction", "mask")
+        )
+    except ValueError as error:
+        logger.error(str(error))
+        return {"status": 400}
+
+    used = {strategy for strategy, _ in strategies.values()}
+
+    if engine == "bytes" and used - {"mask"}:
+        logger.error(
+            f"The bytes engine doesn't support the {sorted(used)} strategies"
+        )
+        return {"status": 400}
+
+    if "token" in used and token_key() is None:
+        logger.error(f"Tokens need a key, configure one or set {KEY_ENV}")
+        return {"status": 400}
+
+    # fields such as "customer.address.street" name nested values
+    # of json records instead of columns
+    paths = []
+    if file_format in JSON_FORMATS:
+        paths = [field for field in strategies if is_path(field)]
+
+    if paths and engine == "arrow":
+        logger.error("The arrow engine doesn't support nested paths")
+        return {"status": 400}
+
+    for path in paths:
+        if strategies[path][0] != "mask":
+            logger.error(f"Nested paths can only be masked: {path}")
+            return {"status": 400}
+
+    try:
+        JsonPaths(paths)
+    except ValueError as error:
+        logger.error(str(error))
+        return {"status": 400}
+
+    # the pipeline works on the strategy of every field from now on
+    json_payload = {**json_payload, "pii_fields": _explicit(strategies)}
+
+    destination = json_payload.get("destination")
+
+    if destination is not None and parse_s3_url(destination) is None:
+        logger.error(f"Invalid destination: {destination}")
+        return {"status": 400}
+
+    stages = StageRecorder(on_stage, json_payload["file_to_obfuscate"])
+
+    # outputs returned to the caller are cached when it is turned on
+    cache = get_result_cache()
+    if destination is not None or not json_payload.get("cache", True):
+        cache = None
+    key = cached = etag = version_id = None
+
     # retreiving file content
-    file_content = get_file_content(json_payload["file_to_obfuscate"])
+    with stages.stage("get_file_content") as stage:
+        if cache is None:
+            file_content = get_file_content(
+                json_payload["file_to_obfuscate"],
+                ranged=json_payload.get("ranged_get", False),
+            )
+        else:
+            key = result_key(_cache_identity(json_payload), file_format)
+            file_content, cached, etag, version_id = _fetch_cached(
+                cache, key, json_payload
+            )
+        stage.update(ok=file_content is not None or cached is not None)
+
+    # the object didn't change since its output was cached
+    if cached is not None:
+        return BytesIO(cached)
 
     # checking for errors
     if file_content is None:
         logger.error("Failed to retreive file content")
         return {"status": 400}
 
-    # turning the file content into df
-    df = file_to_df(file_content, file_format)
+    if cancelled is not None:
+        file_content = CancellableStream(file_content, cancelled)
+
+    file_content = stages.count_reads(file_content)
+
+    if destination is not None:
+        return _obfuscate_to_s3(
+            file_content, file_format, json_payload, stages
+        )
+
+    final_output = _obfuscate(file_content, file_format, json_payload, stages)
+
+    if cache is not None and isinstance(final_output, BytesIO):
+        cache.put(key, final_output.getbuffer(), etag, version_id)
+
+    return final_output
+
+
+def _fetch_cached(cache: ResultCache, key: str, json_payload: dict):
+    """
+    fetches the file of json_payload unless the output cached under
+    key was made from the same version of it
+
+    Return:
+        (file content, cached output, etag, version id), only one of
+        the first two is set; both are None if the fetch failed
+    """
+
+    url = json_payload["file_to_obfuscate"]
+    ranged = json_payload.get("ranged_get", False)
+
+    fetched = fetch_if_changed(url, cache.etag(key), ranged)
+
+    if fetched is None:
+        return None, None, None, None
+
+    file_content, etag, version_id = fetched
+
+    if file_content is None:
+        cached = cache.get(key, etag)
+        if cached is not None:
+            return None, cached, etag, version_id
+
+        # evicted since the etag was looked up
+        fetched = fetch_if_changed(url, None, ranged)
+        if fetched is None:
+            return None, None, None, None
+        file_content, etag, version_id = fetched
+    else:
+        cache.miss()
+
+    return file_content, None, etag, version_id
+
+
+def _obfuscate(
+    file_content,
+    file_format: str,
+    json_payload: dict,
+    stages: StageRecorder,
+    output=None,
+):
+    """
+    runs the pipeline of the requested engine, writing
+    into output when provided or a new BytesIO otherwise
+    """
+
+    engine = json_payload.get("engine", "pandas")
+    tokenizer = _tokenizer(json_payload)
+
+    if engine == "arrow":
+        return _obfuscate_arrow(
+            file_content, file_format, json_payload, stages, output
+        )
+
+    if "processes" in json_payload:
+        # splitting the csv in record aligned shards, one per core
+        with stages.stage("shard_csv", source=file_content) as stage:
+            final_output = shard_csv(
+                file_content,
+                json_payload["pii_fields"],
+                json_payload["processes"],
+                engine,
+                output,
+                schema=json_payload.get("schema"),
+                tokenizer=tokenizer,
+            )
+            stage.update(
+                ok=final_output is not None,
+                bytes_out=output_size(final_output),
+            )
+
+        # checking for errors
+        if final_output is None:
+            logger.error("Failed to redact csv shards")
+            return {"status": 400}
+
+        return final_output
+
+    if engine == "bytes":
+        # swapping the pii byte ranges straight from the body
+        with stages.stage("redact_csv_bytes", source=file_content) as stage:
+            final_output = redact_csv_bytes(
+                file_content, _pii_names(json_payload), output
+            )
+            stage.update(
+                ok=final_output is not None,
+                bytes_out=output_size(final_output),
+            )
+
+        # checking for errors
+        if final_output is None:
+            logger.error("Failed to redact csv bytes")
+            return {"status": 400}
+
+        return final_output
+
+    if json_payload.get("streaming", False):
+        return _obfuscate_streaming(
+            file_content, file_format, json_payload, stages, output
+        )
+
+    # turning the file content into df, the masked columns
+    # are overwritten anyway so they are not decoded
+    with stages.stage("file_to_df", source=file_content) as stage:
+        df = file_to_df(
+            file_content,
+            file_format,
+            skip_columns=_skipped_fields(json_payload),
+            schema=json_payload.get("schema"),
+            cache_key=schema_key(
+                json_payload["file_to_obfuscate"], file_format
+            ),
+            paths=_json_paths(json_payload, file_format),
+        )
+        stage.update(ok=df is not None, rows_out=_rows(df))
 
     # checking for errors
     if df is None:
@@ -75,10 +442,169 @@ def obfuscator_main(json_str: str) -> BytesIO:
         return {"status": 400}
 
     # redacting pii fields
-    df_redacted = redact_pii(df, json_payload["pii_fields"])
+    with stages.stage("redact_pii", rows_in=len(df)) as stage:
+        try:
+            df_redacted = redact_pii(
+                df, _column_fields(json_payload, file_format), tokenizer
+            )
+        except Exception:
+            logger.error("Something went wrong ", exc_info=True)
+            df_redacted = None
+        stage.update(ok=df_redacted is not None, rows_out=_rows(df_redacted))
+
+    # checking for errors
+    if df_redacted is None:
+        logger.error("Failed to redact pii fields")
+        return {"status": 400}
 
     # turning the output from df to bytestream
-    final_output = to_byte_stream(df_redacted, file_format)
+    with stages.stage("to_byte_stream", rows_in=len(df_redacted)) as stage:
+        final_output = to_byte_stream(df_redacted, file_format, output)
+        stage.update(
+            ok=final_output is not None, bytes_out=output_size(final_output)
+        )
+
+    # checking for errors
+    if final_output is None:
+        logger.error("Failed to convert file to byte stream")
+        return {"status": 400}
+
+    return final_output
+
+
+def _obfuscate_streaming(
+    file_content,
+    file_format: str,
+    json_payload: dict,
+    stages: StageRecorder,
+    output=None,
+):
+    """
+    streaming variant of the df pipeline, each chunk is read,
+    redacted and written before the next one is pulled from
+    the file so memory stays bounded by the chunk size
+    """
+
+    # one tokenizer so its memo is shared by the chunks
+    tokenizer = _tokenizer(json_payload)
+    pii_fields = _column_fields(json_payload, file_format)
+
+    # the stages take turns on every chunk, their metrics are summed
+    read = stages.stage("file_to_chunks", source=file_content, repeated=True)
+    redact = stages.stage("redact_pii", repeated=True)
+    write = stages.stage("chunks_to_byte_stream", repeated=True)
+
+    # lazily reading the file content in chunks
+    with read:
+        chunks = file_to_chunks(
+            file_content,
+            file_format,
+            json_payload.get("chunk_size", DEFAULT_CHUNK_SIZE),
+            skip_columns=_skipped_fields(json_payload),
+            schema=json_payload.get("schema"),
+            paths=_json_paths(json_payload, file_format),
+        )
+
+    # checking for errors
+    if chunks is None:
+        read.update(ok=False)
+        read.done()
+        logger.error("Failed to convert file content to df")
+        return {"status": 400}
+
+    def redacted_chunks():
+        chunks_iter = iter(chunks)
+        while True:
+            with read:
+                chunk = next(chunks_iter, None)
+            if chunk is None:
+                return
+            read.add(rows_out=len(chunk))
+
+            # redacting every chunk as it gets pulled by the writer
+            with redact:
+                redacted = redact_pii(chunk, pii_fields, tokenizer)
+            redact.add(rows_in=len(chunk), rows_out=len(redacted))
+
+            # the writer works on the chunk until it pulls the next one
+            write.add(rows_in=len(redacted))
+            with write:
+                yield redacted
+
+    try:
+        # writing the chunks one by one into the output stream
+        final_output = chunks_to_byte_stream(
+            redacted_chunks(), file_format, output
+        )
+        write.update(
+            ok=final_output is not None, bytes_out=output_size(final_output)
+        )
+    finally:
+        for stage in (read, redact, write):
+            stage.done()
+
+    # checking for errors
+    if final_output is None:
+        logger.error("Failed to convert file to byte stream")
+        return {"status": 400}
+
+    return final_output
+
+
+def _obfuscate_arrow(
+    file_content,
+    file_format: str,
+    json_payload: dict,
+    stages: StageRecorder,
+    output=None,
+):
+    """
+    arrow variant of the df pipeline, the file is read with the
+    multithreaded arrow readers and redacted with arrow arrays
+    """
+
+    # turning the file content into an arrow table
+    with stages.stage("file_to_table", source=file_content) as stage:
+        table = file_to_table(
+            file_content,
+            file_format,
+            skip_columns=_skipped_fields(json_payload),
+        )
+        stage.update(ok=table is not None, rows_out=_rows(table))
+
+    # checking for errors
+    if table is None:
+        logger.error("Failed to convert file content to table")
+        return {"status": 400}
+
+    # redacting pii fields
+    with stages.stage("redact_table", rows_in=len(table)) as stage:
+        try:
+            table_redacted = redact_table(
+                table, json_payload["pii_fields"], _tokenizer(json_payload)
+            )
+        except Exception:
+            logger.error("Something went wrong ", exc_info=True)
+            table_redacted = None
+        stage.update(
+            ok=table_redacted is not None, rows_out=_rows(table_redacted)
+        )
+
+    # checking for errors
+    if table_redacted is None:
+        logger.error("Failed to redact pii fields")
+        return {"status": 400}
+
+    # turning the output from table to bytestream
+    with stages.stage(
+        "table_to_byte_stream", rows_in=len(table_redacted)
+    ) as stage:
+        final_output = table_to_byte_stream(
+            table_redacted, file_format, output
+        )
+        stage.update(
+            ok=final_output is not None, bytes_out=output_size(final_output)
+        )
 
     # checking for errors
     if final_output is None:
@@ -86,3 +612,465 @@ def obfuscator_main(json_str: str) -> BytesIO:
         return {"status": 400}
 
     return final_output
+
+
+def _explicit(strategies: dict) -> list:
+    """pii_fields naming the strategy of every field"""
+
+    return [
+        {"field": field, "strategy": strategy, "keep": keep}
+        for field, (strategy, keep) in strategies.items()
+    ]
+
+
+def _pii_names(json_payload: dict, strategy: Optional[str] = None) -> list:
+    """names of the pii fields, only those redacted with strategy"""
+
+    return field_names(parse_pii_fields(json_payload["pii_fields"]), strategy)
+
+
+def _json_paths(json_payload: dict, file_format: str) -> Optional[JsonPaths]:
+    """
+    the nested paths among the pii fields of a json file compiled
+    for its reader, None if there are none
+    """
+
+    if file_format not in JSON_FORMATS:
+        return None
+
+    paths = [field for field in _pii_names(json_payload) if is_path(field)]
+
+    return JsonPaths(paths) if paths else None
+
+
+def _column_fields(json_payload: dict, file_format: str) -> list:
+    """pii_fields redacted as columns, without the nested json paths"""
+
+    if file_format not in JSON_FORMATS:
+        return json_payload["pii_fields"]
+
+    return [
+        entry
+        for entry in json_payload["pii_fields"]
+        if not is_path(entry["field"])
+    ]
+
+
+def _tokenizer(json_payload: dict) -> Optional[Tokenizer]:
+    """the Tokenizer of the "token" fields, None if there are none"""
+
+    if not _pii_names(json_payload, "token"):
+        return None
+
+    return Tokenizer(token_key())
+
+
+def _skipped_fields(json_payload: dict) -> list:
+    """
+    pii fields the readers don't need to decode, the masked ones
+    are overwritten with "***" but the other strategies are
+    applied to the values
+    """
+
+    return _pii_names(json_payload, "mask")
+
+
+def _cache_identity(json_payload: dict) -> dict:
+    """
+    json_payload as keyed by the result cache, tokens depend on
+    the key too so a fingerprint of it is added
+    """
+
+    if not _pii_names(json_payload, "token"):
+        return json_payload
+
+    fingerprint = hashlib.sha256(token_key()).hexdigest()
+
+    return {**json_payload, "token_key": fingerprint}
+
+
+def _rows(data) -> Optional[int]:
+    """rows of a df or table read by a stage, None if it failed"""
+
+    return None if data is None else len(data)
+
+
+def _obfuscate_to_s3(
+    file_content, file_format: str, json_payload: dict, stages: StageRecorder
+):
+    """
+    runs the pipeline straight into a multipart upload of the
+    destination, parts are uploaded while the rest of the file
+    is still being redacted and the upload is aborted on failure
+    """
+
+    bucket, key = parse_s3_url(json_payload["destination"])
+    writer = S3MultipartWriter(bucket, key)
+
+    try:
+        final_output = _obfuscate(
+            file_content, file_format, json_payload, stages, writer
+        )
+
+        # checking for errors
+        if final_output is not writer:
+            writer.abort()
+            return final_output
+
+        # completing the upload with the last part
+        with stages.stage("upload") as stage:
+            stage.update(bytes_out=writer.tell())
+            writer.close()
+
+    except Exception:
+        logger.error(
+            f"Failed to upload to {json_payload['destination']}",
+            exc_info=True,
+        )
+        writer.abort()
+        return {"status": 400}
+
+    return {"status": 200, "destination": json_payload["destination"]}
+
+
+async def obfuscator_main_async(
+    json_str: str, on_stage: Optional[Callable[[dict], None]] = None
+) -> Union[BytesIO, dict]:
+    """
+    obfuscator_main for asyncio services, the s3 calls and the
+    redaction run on a shared pool of DEFAULT_ASYNC_WORKERS threads
+    so the event loop keeps serving other requests meanwhile
+
+    at most DEFAULT_ASYNC_WORKERS calls run at once per event loop,
+    the others wait for a free slot on the loop without holding a
+    thread
+
+    cancelling the calling task stops a call still waiting for a
+    slot straight away; a running one stops at its next read of the
+    file, its upload to a destination is aborted, and the slot is
+    only freed once the worker thread has stopped
+
+    Args
+        json_str: a string in the structure expected
+        by obfuscator_main
+        on_stage: optional stage callback, see obfuscator_main;
+        it is called on the worker thread, not on the event loop
+
+    Return
+        the same as obfuscator_main
+
+    Raise
+        asyncio.CancelledError: if the task was cancelled
+    """
+
+    loop = asyncio.get_running_loop()
+    executor, limit = _async_runner(loop)
+
+    async with limit:
+        cancelled = threading.Event()
+        job = executor.submit(_obfuscator_main, json_str, cancelled, on_stage)
+        future = asyncio.wrap_future(job)
+
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # stopping the worker and holding the slot until it did
+            cancelled.set()
+            job.cancel()
+            await asyncio.wait([future])
+            raise
+
+
+def shutdown_async_executor():
+    """
+    stops the thread pool of obfuscator_main_async once the running
+    calls are done, e.g. when the service shuts down; the next call
+    starts a new one sized by DEFAULT_ASYNC_WORKERS
+    """
+
+    global _async_executor
+
+    with _async_lock:
+        executor, _async_executor = _async_executor, None
+        _async_limits.clear()
+
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+def _async_runner(loop) -> tuple:
+    """
+    the shared executor and the limit of the given event loop, an
+    asyncio.Semaphore can only be used by the loop it was made for
+    """
+
+    global _async_executor, _async_workers
+
+    with _async_lock:
+        if _async_executor is None:
+            _async_workers = DEFAULT_ASYNC_WORKERS
+            _async_executor = ThreadPoolExecutor(
+                _async_workers, thread_name_prefix="obfuscator"
+            )
+            _async_limits.clear()
+
+        if loop not in _async_limits:
+            _async_limits[loop] = asyncio.Semaphore(_async_workers)
+
+        return _async_executor, _async_limits[loop]
+
+
+def obfuscate_batch(
+    payloads: list,
+    max_workers: int = DEFAULT_BATCH_WORKERS,
+    on_stage: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    runs obfuscator_main on many payloads concurrently on a pool of
+    max_workers threads, so one file is redacted while others are
+    being downloaded or uploaded
+
+    Args
+        payloads: list of json strings (or dicts) in the structure
+        expected by obfuscator_main
+        max_workers: number of files processed at the same time
+        on_stage: optional stage callback, see obfuscator_main;
+        it is called from the worker threads, the "file" of every
+        record tells which payload it belongs to
+
+    Return
+        dict with one result per payload, in the same order:
+        {
+            "results": [
+                {
+                    "file_to_obfuscate": "s3://...",
+                    "status": 200 or 400,
+                    "output": ByteStream or None,
+                    "destination": "s3://..." (destination only),
+                    "error": None or the reason it failed,
+                    "seconds": time spent on the file
+                },
+            ],
+            "succeeded": number of files with status 200,
+            "failed": number of files with status 400,
+            "seconds": wall time of the whole batch,
+            "files_per_second": aggregate throughput,
+            "latency": {"mean", "p50", "p95", "max"} in seconds
+        }
+    """
+
+    start = time.perf_counter()
+
+    results, _ = _run_bounded(
+        functools.partial(_obfuscate_one, on_stage=on_stage),
+        payloads,
+        max_workers,
+    )
+
+    seconds = time.perf_counter() - start
+    summary = _batch_summary(results, seconds)
+
+    logger.info(
+        f"Obfuscated {len(results)} files in {seconds:.2f}s, "
+        f"{summary['failed']} failed, "
+        f"{summary['files_per_second']:.1f} files/s"
+    )
+
+    return {"results": results, **summary}
+
+
+def _run_bounded(func, items, max_workers: int):
+    """
+    runs func over items on a pool of max_workers threads, the next
+    item is only pulled once a worker is free so a lazy iterator
+    (e.g. a paginated listing) is consumed while the first items are
+    already being processed
+
+    Return
+        (results in the order of items, the exception raised by the
+        items iterator or None), the items submitted before the
+        iterator failed are still run to completion
+    """
+
+    futures = []
+    running = set()
+    error = None
+
+    with ThreadPoolExecutor(max_workers) as executor:
+        try:
+            for item in items:
+                if len(running) >= max_workers:
+                    _, running = wait(running, return_when=FIRST_COMPLETED)
+
+                future = executor.submit(func, item)
+                futures.append(future)
+                running.add(future)
+        except Exception as e:
+            logger.error("Failed to list the files to process", exc_info=True)
+            error = e
+
+    return [future.result() for future in futures], error
+
+
+def _obfuscate_one(payload, on_stage=None) -> dict:
+    """runs one payload of a batch, turning any outcome into a result"""
+
+    json_str = payload if isinstance(payload, str) else json.dumps(payload)
+    result = {
+        "file_to_obfuscate": None,
+        "status": 400,
+        "output": None,
+        "error": None,
+    }
+
+    start = time.perf_counter()
+
+    try:
+        result["file_to_obfuscate"] = json.loads(json_str).get(
+            "file_to_obfuscate"
+        )
+        response = obfuscator_main(json_str, on_stage)
+    except Exception as e:
+        logger.error("Failed to obfuscate batch payload", exc_info=True)
+        response = None
+        result["error"] = f"{type(e).__name__}: {e}"
+
+    result["seconds"] = time.perf_counter() - start
+
+    if isinstance(response, dict) and response.get("status") == 200:
+        result.update(response)
+    elif response is not None and not isinstance(response, dict):
+        result["status"] = 200
+        result["output"] = response
+    elif result["error"] is None:
+        result["error"] = "Failed to obfuscate the file, see the logs"
+
+    return result
+
+
+def _batch_summary(results: list, seconds: float) -> dict:
+    """aggregate throughput and latency of a batch"""
+
+    latencies = sorted(result["seconds"] for result in results)
+    succeeded = sum(result["status"] == 200 for result in results)
+
+    latency = {"mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+    if latencies:
+        latency = {
+            "mean": statistics.fmean(latencies),
+            "p50": latencies[(len(latencies) - 1) // 2],
+            "p95": latencies[int(0.95 * (len(latencies) - 1))],
+            "max": latencies[-1],
+        }
+
+    return {
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "seconds": seconds,
+        "files_per_second": len(results) / seconds if seconds else 0.0,
+        "latency": latency,
+    }
+
+
+def _obfuscate_folder(json_payload: dict, on_stage=None) -> dict:
+    """
+    redacts every object of a prefix or a manifest into the
+    destination prefix, the objects are processed while the
+    listing is still being paged through
+    """
+
+    if "file_to_obfuscate" in json_payload or all(
+        key in json_payload for key in FOLDER_KEYS
+    ):
+        raise ValueError(
+            "Use only one of 'file_to_obfuscate', "
+            "'prefix_to_obfuscate' or 'manifest' in input JSON"
+        )
+
+    destination = parse_s3_prefix(json_payload.get("destination"))
+
+    if destination is None:
+        logger.error("Folder mode needs an s3 'destination' prefix")
+        return {"status": 400}
+
+    if "prefix_to_obfuscate" in json_payload:
+        source = parse_s3_prefix(json_payload["prefix_to_obfuscate"])
+
+        if source is None:
+            logger.error(
+                f"Invalid S3 prefix: {json_payload['prefix_to_obfuscate']}"
+            )
+            return {"status": 400}
+
+        # outputs written under the source prefix would be listed again
+        if source[0] == destination[0] and destination[1].startswith(
+            source[1]
+        ):
+            logger.error("The destination can't be inside the source prefix")
+            return {"status": 400}
+
+        locations = _prefix_locations(*source)
+    else:
+        locations = (
+            (bucket, key, key)
+            for bucket, key in read_manifest(json_payload["manifest"])
+        )
+
+    # every file gets the options of the folder payload
+    options = {
+        k: v
+        for k, v in json_payload.items()
+        if k not in FOLDER_KEYS + ("destination", "max_workers")
+    }
+    payloads = (
+        {
+            **options,
+            "file_to_obfuscate": f"s3://{bucket}/{key}",
+            "destination": _mirror(destination, relative),
+        }
+        for bucket, key, relative in locations
+    )
+
+    start = time.perf_counter()
+
+    results, error = _run_bounded(
+        functools.partial(_obfuscate_one, on_stage=on_stage),
+        payloads,
+        json_payload.get("max_workers", DEFAULT_BATCH_WORKERS),
+    )
+
+    seconds = time.perf_counter() - start
+    summary = _batch_summary(results, seconds)
+
+    logger.info(
+        f"Obfuscated {len(results)} files into "
+        f"{json_payload['destination']} in {seconds:.2f}s, "
+        f"{summary['failed']} failed"
+    )
+
+    status = 200 if error is None and summary["failed"] == 0 else 400
+    response = {"status": status, "results": results, **summary}
+
+    if error is not None:
+        response["error"] = f"{type(error).__name__}: {error}"
+
+    return response
+
+
+def _prefix_locations(bucket: str, prefix: str):
+    """(bucket, key, key below the prefix) of every listed object"""
+
+    for key in list_s3_objects(bucket, prefix):
+        yield bucket, key, key[len(prefix) :]  # noqa: E203
+
+
+def _mirror(destination: tuple, relative: str) -> str:
+    """s3 url of relative under the destination prefix"""
+
+    bucket, prefix = destination
+    relative = relative.lstrip("/")
+
+    if prefix and not prefix.endswith("/"):
+        prefix += "/"
+
+    return f"s3://{bucket}/{prefix}{relative}"
@@ -0,0 +1,40 @@
+import pytest
+from utils.s3_client import reset_s3_client
+from utils.schema_cache import reset_schema_cache
+from utils.result_cache import reset_result_cache
+from utils.tokenizer import reset_token_key
+
+
+@pytest.fixture(autouse=True)
+def fresh_s3_client():
+    """
+    every test gets its own shared client so it is created inside
+    the moto mock and with the credentials of that test
+    """
+    reset_s3_client()
+    yield
+    reset_s3_client()
+
+
+@pytest.fixture(autouse=True)
+def fresh_schema_cache():
+    """schemas cached by a test don't leak into the next one"""
+    reset_schema_cache()
+    yield
+    reset_schema_cache()
+
+
+@pytest.fixture(autouse=True)
+def no_result_cache():
+    """the result cache stays off unless a test turns it on"""
+    reset_result_cache()
+    yield
+    reset_result_cache()
+
+
+@pytest.fixture(autouse=True)
+def no_token_key():
+    """keys configured by a test don't leak into the next one"""
+    reset_token_key()
+    yield
+    reset_token_key()
@@ -0,0 +1,86 @@
+from benchmark.suite import (
+    build_cases,
+    compare,
+    pii_fields,
+    run_case,
+    MEMORY_MAX_MB,
+)
+from benchmark.common import generate_csv, generate_parquet
+import pytest
+
+
+def metrics(mb_per_s, seconds=1.0, peak_rss_mb=100.0):
+    return {
+        "seconds": seconds,
+        "mb_per_s": mb_per_s,
+        "rows_per_s": 1000,
+        "peak_rss_mb": peak_rss_mb,
+    }
+
+
+def test_cases_cover_the_matrix():
+    names = [case["name"] for case in build_cases("quick")]
+
+    assert len(names) == len(set(names)) == 48
+    assert "csv-1mb-narrow-pii20-memory" in names
+    assert "parquet-10mb-wide-pii60-streaming" in names
+
+
+def test_large_files_only_stream():
+    large = [
+        case for case in build_cases("full") if case["size"] > MEMORY_MAX_MB
+    ]
+
+    assert large
+    assert {case["pipeline"] for case in large} == {"streaming"}
+
+
+def test_pii_fields_follow_ratio():
+    assert pii_fields("narrow", 0.2) == ["name"]
+    assert pii_fields("narrow", 0.6) == ["name", "email", "id"]
+    assert len(pii_fields("wide", 0.2)) == 10
+
+
+def test_compare_flags_slowdown():
+    baseline = {"case": {"total": metrics(50.0)}}
+
+    assert compare({"case": {"total": metrics(40.0)}}, baseline, 0.3) == []
+
+    regressions = compare({"case": {"total": metrics(10.0)}}, baseline, 0.3)
+
+    assert regressions == ["case total: 10.0 MB/s, baseline 50.0 MB/s"]
+
+
+def test_compare_flags_memory_growth():
+    baseline = {"case": {"total": metrics(50.0, peak_rss_mb=200.0)}}
+    results = {"case": {"total": metrics(50.0, peak_rss_mb=400.0)}}
+
+    assert compare(results, baseline, 0.3) == [
+        "case total: peak RSS 400 MB, baseline 200 MB"
+    ]
+
+
+def test_compare_skips_noisy_and_unknown_stages():
+    baseline = {"case": {"redact": metrics(500.0, seconds=0.001)}}
+    results = {
+        "case": {"redact": metrics(50.0, peak_rss_mb=None)},
+        "new case": {"total": metrics(1.0)},
+    }
+
+    assert compare(results, baseline, 0.3) == []
+
+
+@pytest.mark.parametrize("pipeline", ["memory", "streaming"])
+@pytest.mark.parametrize(
+    "generate, fmt", [(generate_csv, "csv"), (generate_parquet, "parquet")]
+)
+def test_run_case_times_every_stage(tmp_path, generate, fmt, pipeline):
+    path = str(tmp_path / f"data.{fmt}")
+    rows = generate(path, 0.05, extra_columns=3)
+
+    seconds, rss, counted = run_case(path, fmt, ["name"], pipeline, 2)
+
+    assert counted == rows
+    assert set(seconds) == {"read", "redact", "write", "total"}
+    assert all(value >= 0 for value in seconds.values())
+    assert rss["total"] > 0
@@ -0,0 +1,52 @@
+from utils.body_stream import BodyStream
+import io
+from botocore.response import StreamingBody
+import pytest
+
+
+def make_body(body_bytes):
+    return StreamingBody(io.BytesIO(body_bytes), len(body_bytes))
+
+
+class UpperStream(BodyStream):
+    def read(self, size: int = -1) -> bytes:
+        return super().read(size).upper()
+
+
+def test_reads_the_body():
+    stream = BodyStream(make_body(b"abcdef"))
+
+    assert stream.read(2) == b"ab"
+    assert stream.read(None) == b"cdef"
+    assert stream.read() == b""
+
+
+def test_subclass_read_used_by_every_read():
+    reader = io.BufferedReader(UpperStream(make_body(b"ab\ncd\n")))
+
+    assert reader.readlines() == [b"AB\n", b"CD\n"]
+    assert UpperStream(make_body(b"ab")).readall() == b"AB"
+
+
+def test_close_closes_body():
+    body = make_body(b"abc")
+    stream = BodyStream(body)
+
+    stream.close()
+
+    assert stream.closed
+    with pytest.raises(ValueError):
+        body.read()
+
+
+def test_body_kept_open():
+    class KeepingStream(BodyStream):
+        closes_body = False
+
+    body = make_body(b"abc")
+    stream = KeepingStream(body)
+
+    stream.close()
+
+    assert stream.closed
+    assert body.read() == b"abc"
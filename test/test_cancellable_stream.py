@@ -0,0 +1,59 @@
+from utils.cancellable_stream import CancellableStream, ObfuscationCancelled
+import io
+import threading
+from botocore.response import StreamingBody
+import pandas as pd
+import pytest
+
+
+def make_body(body_bytes):
+    return StreamingBody(io.BytesIO(body_bytes), len(body_bytes))
+
+
+def test_reads_through_until_cancelled():
+    cancelled = threading.Event()
+    stream = CancellableStream(make_body(b"id,name\n1,James\n"), cancelled)
+
+    assert stream.read(3) == b"id,"
+
+    cancelled.set()
+
+    with pytest.raises(ObfuscationCancelled):
+        stream.read(3)
+
+
+def test_read_all():
+    stream = CancellableStream(make_body(b"abc"), threading.Event())
+
+    assert stream.read() == b"abc"
+    assert stream.read() == b""
+
+
+def test_usable_by_pandas():
+    stream = CancellableStream(
+        make_body(b"id,name\n1,James\n2,Sam\n"), threading.Event()
+    )
+
+    df = pd.read_csv(stream)
+
+    assert list(df["name"]) == ["James", "Sam"]
+
+
+def test_usable_as_text():
+    stream = CancellableStream(make_body(b"a\nb\n"), threading.Event())
+
+    assert io.TextIOWrapper(stream, encoding="utf-8").readlines() == [
+        "a\n",
+        "b\n",
+    ]
+
+
+def test_close_closes_body():
+    body = make_body(b"abc")
+    stream = CancellableStream(body, threading.Event())
+
+    stream.close()
+
+    assert stream.closed
+    with pytest.raises(ValueError):
+        body.read()
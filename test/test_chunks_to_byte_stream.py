@@ -0,0 +1,139 @@
+from utils.chunks_to_byte_stream import chunks_to_byte_stream
+import io
+import pandas as pd
+from unittest.mock import patch
+import logging
+import pytest
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+@pytest.fixture(scope="function")
+def create_chunks():
+    df = pd.DataFrame(
+        {
+            "id": range(1, 8),
+            "name": ["***"] * 7,
+            "age": range(20, 27),
+        }
+    )
+
+    yield df, [df.iloc[0:3], df.iloc[3:6], df.iloc[6:7]]
+
+
+def test_return_byte_stream_csv(create_chunks):
+    _, chunks = create_chunks
+
+    response = chunks_to_byte_stream(iter(chunks), "csv")
+
+    assert isinstance(response, io.BytesIO)
+
+
+def test_header_written_once(create_chunks):
+    df, chunks = create_chunks
+
+    response = chunks_to_byte_stream(iter(chunks), "csv")
+
+    content = response.getvalue().decode("utf-8")
+
+    assert content.count("id,name,age") == 1
+    assert content == df.to_csv(index=False)
+
+
+def test_writes_into_provided_output(create_chunks):
+    df, chunks = create_chunks
+    output = io.BytesIO()
+
+    response = chunks_to_byte_stream(iter(chunks), "csv", output)
+
+    assert response is output
+    assert output.getvalue().decode("utf-8") == df.to_csv(index=False)
+
+
+def test_parquet_keeps_row_groups(create_chunks):
+    df, chunks = create_chunks
+
+    response = chunks_to_byte_stream(iter(chunks), "parquet")
+
+    parquet_file = pq.ParquetFile(response)
+    row_groups = [
+        parquet_file.metadata.row_group(i).num_rows
+        for i in range(parquet_file.num_row_groups)
+    ]
+    assert row_groups == [3, 3, 1]
+    assert parquet_file.read().to_pandas().equals(df)
+
+
+def test_parquet_casts_later_chunks_to_first_schema():
+    chunks = [
+        pd.DataFrame({"id": [1, 2], "note": ["a", "b"]}),
+        pd.DataFrame({"id": [3], "note": [None]}),
+    ]
+
+    response = chunks_to_byte_stream(iter(chunks), "parquet")
+
+    df = pq.read_table(response).to_pandas()
+    assert list(df["id"]) == [1, 2, 3]
+    assert df["note"].loc[2] is None
+
+
+def test_parquet_schema_from_source():
+    source_schema = pa.schema([("id", pa.int64()), ("note", pa.string())])
+    chunks = [
+        pd.DataFrame({"id": [1, 2], "note": [None, None], "name": None}),
+        pd.DataFrame({"id": [3], "note": ["a"], "name": ["***"]}),
+    ]
+    for chunk in chunks:
+        chunk.attrs["source_schema"] = source_schema
+
+    response = chunks_to_byte_stream(iter(chunks), "parquet")
+
+    table = pq.read_table(response)
+    assert table.schema.field("note").type == pa.string()
+    # a redacted column, not in the source schema, holding nulls
+    assert table.schema.field("name").type == pa.string()
+    assert table.column("note").to_pylist() == [None, None, "a"]
+    assert table.column("name").to_pylist() == [None, None, "***"]
+
+
+def test_json_array(create_chunks):
+    df, chunks = create_chunks
+
+    response = chunks_to_byte_stream(iter(chunks), "json")
+
+    assert response.getvalue().decode("utf-8") == df.to_json(orient="records")
+
+
+def test_json_lines(create_chunks):
+    df, chunks = create_chunks
+    empty = df.iloc[0:0]
+
+    response = chunks_to_byte_stream(iter(chunks + [empty]), "jsonl")
+
+    assert response.getvalue().decode("utf-8") == df.to_json(
+        orient="records", lines=True
+    )
+
+
+@patch("utils.chunks_to_byte_stream.pd.DataFrame.to_csv")
+def test_csv_error(to_csv_mock, create_chunks, caplog):
+    _, chunks = create_chunks
+    to_csv_mock.side_effect = Exception("error")
+
+    caplog.set_level(logging.INFO)
+
+    response = chunks_to_byte_stream(iter(chunks), "csv")
+
+    assert response == None
+    assert "Something went wrong ," in caplog.text
+
+
+def test_no_match_format(create_chunks, caplog):
+    _, chunks = create_chunks
+
+    caplog.set_level(logging.INFO)
+
+    response = chunks_to_byte_stream(iter(chunks), "fdf")
+
+    assert response == None
+    assert "No Byte stream format matches fdf" in caplog.text
@@ -0,0 +1,74 @@
+import os
+import subprocess
+import sys
+
+
+def run(code: str, cwd) -> str:
+    """
+    runs code in a fresh interpreter, pytest puts its own handlers
+    on the root logger of the test session
+    """
+
+    env = {**os.environ, "PYTHONPATH": os.getcwd()}
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        check=True,
+        text=True,
+        cwd=cwd,
+        env=env,
+    )
+
+    return result.stdout
+
+
+def test_logs_to_app_log(tmp_path):
+    run(
+        "import logging\n"
+        "from utils.configure_logging import configure_logging\n"
+        "configure_logging()\n"
+        "logging.getLogger('utils.test').info('hello')\n",
+        tmp_path,
+    )
+
+    assert "[INFO] utils.test: hello" in (tmp_path / "app.log").read_text()
+
+
+def test_importing_does_not_configure(tmp_path):
+    output = run(
+        "import logging, src.obfuscate_main\n"
+        "print(len(logging.getLogger().handlers))\n",
+        tmp_path,
+    )
+
+    assert output.strip() == "0"
+    assert not (tmp_path / "app.log").exists()
+
+
+def test_configures_once(tmp_path):
+    output = run(
+        "import logging\n"
+        "from utils.configure_logging import configure_logging\n"
+        "configure_logging('first.log')\n"
+        "configure_logging('second.log', logging.DEBUG)\n"
+        "root = logging.getLogger()\n"
+        "print(len(root.handlers), root.level)\n",
+        tmp_path,
+    )
+
+    assert output.split() == ["1", "20"]
+    assert not (tmp_path / "second.log").exists()
+
+
+def test_keeps_host_setup(tmp_path):
+    output = run(
+        "import logging\n"
+        "from utils.configure_logging import configure_logging\n"
+        "logging.getLogger().addHandler(logging.NullHandler())\n"
+        "configure_logging()\n"
+        "print([type(h).__name__ for h in logging.getLogger().handlers])\n",
+        tmp_path,
+    )
+
+    assert output.strip() == "['NullHandler']"
+    assert not (tmp_path / "app.log").exists()
@@ -48,3 +48,13 @@ def test_return_correct_format(create_data):
     response = extract_file_format(jstring["file_to_obfuscator"])
 
     assert response == "json"
+
+
+def test_return_json_lines_formats():
+    response = extract_file_format("s3://test_bucket/events.jsonl")
+
+    assert response == "jsonl"
+
+    response = extract_file_format("s3://test_bucket/events.ndjson")
+
+    assert response == "ndjson"
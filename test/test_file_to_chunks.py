@@ -0,0 +1,236 @@
+from utils.file_to_chunks import file_to_chunks
+import io
+import csv
+from botocore.response import StreamingBody
+import pandas as pd
+from unittest.mock import patch
+import pytest
+import logging
+import json
+import pyarrow as pa
+import pyarrow.parquet as pq
+from utils.json_paths import JsonPaths
+
+
+def make_csv_body(n_rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["id", "name", "age"])
+    for i in range(1, n_rows + 1):
+        writer.writerow([i, f"name_{i}", 20 + i])
+
+    body_bytes = buffer.getvalue().encode("utf-8")
+
+    return StreamingBody(io.BytesIO(body_bytes), len(body_bytes))
+
+
+def make_parquet_body(row_group_sizes):
+    buffer = io.BytesIO()
+    schema = pa.schema([("id", pa.int64()), ("name", pa.string())])
+    writer = pq.ParquetWriter(buffer, schema)
+    start = 1
+    for size in row_group_sizes:
+        ids = list(range(start, start + size))
+        table = pa.table(
+            {"id": ids, "name": [f"name_{i}" for i in ids]}, schema=schema
+        )
+        writer.write_table(table, row_group_size=size)
+        start += size
+    writer.close()
+
+    body_bytes = buffer.getvalue()
+
+    return StreamingBody(io.BytesIO(body_bytes), len(body_bytes))
+
+
+def make_json_lines_body(n_rows):
+    body_bytes = "".join(
+        json.dumps({"id": i, "name": f"name_{i}"}) + "\n"
+        for i in range(1, n_rows + 1)
+    ).encode("utf-8")
+
+    return StreamingBody(io.BytesIO(body_bytes), len(body_bytes))
+
+
+class TestUnit:
+    def test_returns_chunks_of_df(self):
+        response = file_to_chunks(make_csv_body(5), "csv", chunk_size=2)
+
+        chunks = list(response)
+
+        assert all(isinstance(chunk, pd.DataFrame) for chunk in chunks)
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+
+    def test_chunks_keep_data_in_order(self):
+        response = file_to_chunks(make_csv_body(5), "csv", chunk_size=2)
+
+        df = pd.concat(list(response), ignore_index=True)
+
+        assert list(df.columns) == ["id", "name", "age"]
+        assert list(df["id"]) == [1, 2, 3, 4, 5]
+        assert df["name"].loc[4] == "name_5"
+
+    def test_reads_lazily(self):
+        body = make_csv_body(50_000)
+
+        response = file_to_chunks(body, "csv", chunk_size=10)
+        next(response)
+
+        # only part of the body has been consumed after the first chunk
+        assert body._amount_read < body._content_length
+
+    def test_invalid_chunk_size(self, caplog):
+        caplog.set_level(logging.INFO)
+
+        response = file_to_chunks(make_csv_body(5), "csv", chunk_size=0)
+
+        assert response == None
+        assert "Invalid chunk size: 0" in caplog.text
+
+    @patch("utils.file_to_chunks.pd")
+    def test_csv_raises_error(self, pd_mock, caplog):
+        pd_mock.read_csv.side_effect = Exception("error")
+        caplog.set_level(logging.ERROR)
+
+        response = file_to_chunks(make_csv_body(5), "csv")
+
+        assert response == None
+        assert "Something went wrong " in caplog.text
+
+    def test_no_format_match(self, caplog):
+        caplog.set_level(logging.INFO)
+
+        response = file_to_chunks("", "dfd")
+
+        assert response == None
+        assert "The provided format doesn't support streaming" in caplog.text
+
+    def test_parquet_yields_row_groups(self):
+        response = file_to_chunks(make_parquet_body([3, 2, 4]), "parquet")
+
+        chunks = list(response)
+
+        assert [len(chunk) for chunk in chunks] == [3, 2, 4]
+        df = pd.concat(chunks, ignore_index=True)
+        assert list(df["id"]) == list(range(1, 10))
+        assert df["name"].loc[8] == "name_9"
+
+    def test_parquet_no_row_groups_keeps_columns(self):
+        response = file_to_chunks(make_parquet_body([]), "parquet")
+
+        chunks = list(response)
+
+        assert len(chunks) == 1
+        assert list(chunks[0].columns) == ["id", "name"]
+        assert len(chunks[0]) == 0
+
+    def test_parquet_invalid_file(self, caplog):
+        caplog.set_level(logging.ERROR)
+
+        response = file_to_chunks(
+            StreamingBody(io.BytesIO(b"not parquet"), 11), "parquet"
+        )
+
+        assert response == None
+        assert "Something went wrong " in caplog.text
+
+    def test_parquet_skips_columns(self):
+        response = file_to_chunks(
+            make_parquet_body([2, 2]), "parquet", skip_columns=["name"]
+        )
+
+        chunks = list(response)
+
+        assert all(list(chunk.columns) == ["id"] for chunk in chunks)
+        assert all(
+            chunk.attrs["source_columns"] == ["id", "name"] for chunk in chunks
+        )
+
+    def test_json_lines_chunks(self):
+        for format in ("jsonl", "ndjson"):
+            response = file_to_chunks(
+                make_json_lines_body(5), format, chunk_size=2
+            )
+
+            chunks = list(response)
+
+            assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+            df = pd.concat(chunks, ignore_index=True)
+            assert list(df["id"]) == [1, 2, 3, 4, 5]
+            assert df["name"].loc[4] == "name_5"
+
+    def test_empty_json_lines(self):
+        for body_bytes in (b"", b"\n"):
+            body = StreamingBody(io.BytesIO(body_bytes), len(body_bytes))
+
+            response = file_to_chunks(body, "jsonl", chunk_size=2)
+
+            assert all(chunk.empty for chunk in response)
+
+    def test_json_lines_reads_lazily(self):
+        body = make_json_lines_body(50_000)
+
+        response = file_to_chunks(body, "jsonl", chunk_size=10)
+        next(response)
+
+        assert body._amount_read < body._content_length
+
+    def test_csv_chunks_share_the_schema(self):
+        body_bytes = b"id,score\n001,1\n002,\n003,2.5\n"
+        body = StreamingBody(io.BytesIO(body_bytes), len(body_bytes))
+
+        response = file_to_chunks(
+            body, "csv", chunk_size=1, schema={"id": "str", "score": "float64"}
+        )
+
+        chunks = list(response)
+        assert [list(chunk["id"]) for chunk in chunks] == [
+            ["001"],
+            ["002"],
+            ["003"],
+        ]
+        assert all(chunk["score"].dtype == "float64" for chunk in chunks)
+
+    def test_json_lines_chunks_schema(self):
+        body_bytes = b'{"id": "007", "age": 25}\n{"id": "010", "age": 30}\n'
+        body = StreamingBody(io.BytesIO(body_bytes), len(body_bytes))
+
+        response = file_to_chunks(
+            body, "jsonl", chunk_size=1, schema={"age": "float64"}
+        )
+
+        chunks = list(response)
+        assert [list(chunk["id"]) for chunk in chunks] == [["007"], ["010"]]
+        assert all(chunk["age"].dtype == "float64" for chunk in chunks)
+
+    def test_json_array_chunks(self):
+        records = [{"id": i, "name": f"name_{i}"} for i in range(1, 6)]
+        body_bytes = json.dumps(records).encode("utf-8")
+        body = StreamingBody(io.BytesIO(body_bytes), len(body_bytes))
+
+        response = file_to_chunks(body, "json", chunk_size=2)
+
+        chunks = list(response)
+
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+        df = pd.concat(chunks, ignore_index=True)
+        assert list(df["id"]) == [1, 2, 3, 4, 5]
+        assert df["name"].loc[4] == "name_5"
+
+    @pytest.mark.parametrize("format", ["json", "jsonl"])
+    def test_json_chunks_nested_paths(self, format):
+        records = [{"id": i, "user": {"name": f"n{i}"}} for i in range(3)]
+        if format == "json":
+            body_bytes = json.dumps(records).encode("utf-8")
+        else:
+            body_bytes = "\n".join(map(json.dumps, records)).encode("utf-8")
+        body = StreamingBody(io.BytesIO(body_bytes), len(body_bytes))
+
+        response = file_to_chunks(
+            body, format, chunk_size=2, paths=JsonPaths(["user.name"])
+        )
+
+        chunks = list(response)
+        assert [len(chunk) for chunk in chunks] == [2, 1]
+        df = pd.concat(chunks, ignore_index=True)
+        assert list(df["user"]) == [{"name": "***"}] * 3
@@ -1,4 +1,6 @@
 from utils.file_to_df import file_to_df
+from utils.schema_cache import get_schema_cache
+from utils.json_paths import JsonPaths
 import io
 import csv
 from botocore.response import StreamingBody
@@ -171,6 +173,75 @@ class TestUnit:
         assert response == None
         assert "Something went wrong " in caplog.text
 
+    def test_reads_json_in_batches(self, monkeypatch):
+        monkeypatch.setattr("utils.json_array.DEFAULT_BATCH_SIZE", 2)
+        data = [
+            {"id": i, "name": f"name_{i}", "age": 20 + i} for i in range(5)
+        ]
+
+        byte_body = json.dumps(data).encode("utf-8")
+        streaming_body = StreamingBody(io.BytesIO(byte_body), len(byte_body))
+
+        response = file_to_df(streaming_body, "json")
+
+        expected = pd.read_json(io.BytesIO(byte_body), orient="records")
+        assert response.equals(expected)
+
+    def test_json_types_inferred_on_the_whole_file(self, monkeypatch):
+        monkeypatch.setattr("utils.json_array.DEFAULT_BATCH_SIZE", 2)
+        data = [{"code": "007", "id": i} for i in range(3)]
+        data += [
+            {"code": "abc", "id": None},
+            {"code": "x", "id": 4, "created_at": "2024-01-01"},
+        ]
+
+        byte_body = json.dumps(data).encode("utf-8")
+        streaming_body = StreamingBody(io.BytesIO(byte_body), len(byte_body))
+
+        response = file_to_df(streaming_body, "json")
+
+        expected = pd.read_json(io.BytesIO(byte_body), orient="records")
+        assert response.equals(expected)
+        assert list(response["code"]) == ["007"] * 3 + ["abc", "x"]
+
+    def test_reads_empty_json_array(self):
+        streaming_body = StreamingBody(io.BytesIO(b"[]"), 2)
+
+        response = file_to_df(streaming_body, "json")
+
+        assert isinstance(response, pd.DataFrame)
+        assert response.empty
+
+    def test_reads_json_lines(self):
+        data = [
+            {"id": 1, "name": "James", "age": 25},
+            {"id": 2, "name": "Hamoud", "age": 30},
+        ]
+
+        byte_body = "\n".join(json.dumps(row) for row in data).encode("utf-8")
+
+        for format in ("jsonl", "ndjson"):
+            streaming_body = StreamingBody(
+                io.BytesIO(byte_body), len(byte_body)
+            )
+
+            response = file_to_df(streaming_body, format)
+
+            assert list(response.columns) == ["id", "name", "age"]
+            assert response["name"].loc[1] == "Hamoud"
+            assert response["age"].loc[0] == 25
+
+    def test_reads_empty_json_lines(self):
+        for body_bytes in (b"", b"\n"):
+            streaming_body = StreamingBody(
+                io.BytesIO(body_bytes), len(body_bytes)
+            )
+
+            response = file_to_df(streaming_body, "jsonl")
+
+            assert isinstance(response, pd.DataFrame)
+            assert response.empty
+
     def test_reads_parquet(self):
         df = pd.DataFrame(
             [
@@ -261,6 +332,162 @@ class TestUnit:
         assert response == None
         assert "Something went wrong " in caplog.text
 
+    def test_parquet_skips_columns(self):
+        df = pd.DataFrame(
+            [
+                {"id": 1, "name": "James", "age": 25},
+                {"id": 2, "name": "Hamoud", "age": 30},
+            ]
+        )
+
+        buffer = io.BytesIO()
+
+        df.to_parquet(buffer, engine="pyarrow", index=False)
+
+        buffer.seek(0)
+        streaming_body = StreamingBody(buffer, len(buffer.getvalue()))
+
+        response = file_to_df(streaming_body, "parquet", skip_columns=["name"])
+
+        assert list(response.columns) == ["id", "age"]
+        assert response.attrs["source_columns"] == ["id", "name", "age"]
+        assert response["age"].loc[1] == 30
+
+    def test_parquet_skips_every_column(self):
+        df = pd.DataFrame({"name": ["James", "Hamoud", "Sam"]})
+
+        buffer = io.BytesIO()
+
+        df.to_parquet(buffer, engine="pyarrow", index=False)
+
+        buffer.seek(0)
+        streaming_body = StreamingBody(buffer, len(buffer.getvalue()))
+
+        response = file_to_df(streaming_body, "parquet", skip_columns=["name"])
+
+        assert len(response) == 3
+        assert list(response.columns) == []
+        assert response.attrs["source_columns"] == ["name"]
+
+    def test_csv_ignores_skip_columns(self):
+        body_bytes = b"id,name\n1,James\n"
+        streaming_body = StreamingBody(io.BytesIO(body_bytes), len(body_bytes))
+
+        response = file_to_df(streaming_body, "csv", skip_columns=["name"])
+
+        assert list(response.columns) == ["id", "name"]
+        assert "source_columns" not in response.attrs
+
+    def test_csv_all_string_round_trips(self):
+        body_bytes = b"id,name,score,note\n007,James,1.10,NA\n010,Sam,,x\n"
+        streaming_body = StreamingBody(io.BytesIO(body_bytes), len(body_bytes))
+
+        response = file_to_df(streaming_body, "csv", schema="string")
+
+        assert list(response["id"]) == ["007", "010"]
+        assert list(response["note"]) == ["NA", "x"]
+        assert response.to_csv(index=False).encode() == body_bytes
+
+    def test_csv_schema(self):
+        body_bytes = b"id,age,joined\n007,25,2024-01-02\n010,30,2024-02-03\n"
+        streaming_body = StreamingBody(io.BytesIO(body_bytes), len(body_bytes))
+
+        response = file_to_df(
+            streaming_body,
+            "csv",
+            schema={"id": "str", "age": "float64", "joined": "datetime64[ns]"},
+        )
+
+        assert list(response["id"]) == ["007", "010"]
+        assert response["age"].dtype == "float64"
+        assert response["joined"].dtype == "datetime64[ns]"
+
+    def test_csv_schema_mismatch(self, caplog):
+        body_bytes = b"id,age\n1,unknown\n"
+        streaming_body = StreamingBody(io.BytesIO(body_bytes), len(body_bytes))
+
+        response = file_to_df(streaming_body, "csv", schema={"age": "int64"})
+
+        assert response is None
+        assert "Something went wrong" in caplog.text
+
+    def test_csv_cached_schema(self):
+        key = ("bucket", "daily/", "csv")
+
+        for body_bytes in (b"id,name\n1,a\n", b"id,name\n2,007\n"):
+            streaming_body = StreamingBody(
+                io.BytesIO(body_bytes), len(body_bytes)
+            )
+            response = file_to_df(
+                streaming_body,
+                "csv",
+                ["id"],
+                schema="cached",
+                cache_key=key,
+            )
+
+        assert list(response["name"]) == ["007"]
+        assert response.attrs["source_columns"] == ["id", "name"]
+        assert get_schema_cache().stats()["hits"] == 1
+
+    def test_csv_cached_schema_without_key(self):
+        body_bytes = b"id,name\n1,a\n"
+        streaming_body = StreamingBody(io.BytesIO(body_bytes), len(body_bytes))
+
+        response = file_to_df(streaming_body, "csv", schema="cached")
+
+        assert response["id"].dtype == "int64"
+        assert get_schema_cache().stats()["misses"] == 0
+
+    def test_json_schema_keeps_strings(self):
+        records = [{"id": "007", "created_at": "1", "age": 25}]
+        body_bytes = json.dumps(records).encode("utf-8")
+        streaming_body = StreamingBody(io.BytesIO(body_bytes), len(body_bytes))
+
+        response = file_to_df(
+            streaming_body, "json", schema={"age": "float64"}
+        )
+
+        assert list(response["id"]) == ["007"]
+        assert list(response["created_at"]) == ["1"]
+        assert response["age"].dtype == "float64"
+
+    def test_json_lines_schema(self):
+        body_bytes = b'{"id": "007", "age": 25}\n{"id": "010", "age": 30}\n'
+        streaming_body = StreamingBody(io.BytesIO(body_bytes), len(body_bytes))
+
+        response = file_to_df(streaming_body, "jsonl", schema={"age": "str"})
+
+        assert list(response["id"]) == ["007", "010"]
+        assert list(response["age"]) == ["25", "30"]
+
+    def test_json_nested_paths(self):
+        records = [
+            {"id": 1, "contacts": [{"email": "a@b"}, {"email": "c@d"}]},
+            {"id": 2, "contacts": []},
+        ]
+        body_bytes = json.dumps(records).encode("utf-8")
+        streaming_body = StreamingBody(io.BytesIO(body_bytes), len(body_bytes))
+
+        response = file_to_df(
+            streaming_body, "json", paths=JsonPaths(["contacts[*].email"])
+        )
+
+        assert list(response["contacts"]) == [
+            [{"email": "***"}, {"email": "***"}],
+            [],
+        ]
+
+    def test_json_lines_nested_paths(self):
+        body_bytes = b'{"id": 1, "a": {"b": 2}}\n{"id": 2, "a": {"c": 3}}\n'
+        streaming_body = StreamingBody(io.BytesIO(body_bytes), len(body_bytes))
+
+        response = file_to_df(
+            streaming_body, "jsonl", paths=JsonPaths(["a.b"])
+        )
+
+        assert list(response["a"]) == [{"b": "***"}, {"c": 3}]
+
     def test_no_format_match(self, caplog):
         caplog.set_level(logging.INFO)
 
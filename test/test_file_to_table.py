@@ -0,0 +1,136 @@
+from utils.file_to_table import file_to_table
+import io
+import json
+from botocore.response import StreamingBody
+import pandas as pd
+import pyarrow as pa
+from unittest.mock import patch
+import logging
+
+
+def make_body(body_bytes):
+    return StreamingBody(io.BytesIO(body_bytes), len(body_bytes))
+
+
+class TestUnit:
+    def test_reads_csv(self):
+        response = file_to_table(
+            make_body(b"id,name,age\n1,James,25\n2,Hamoud,30\n"), "csv"
+        )
+
+        assert isinstance(response, pa.Table)
+        assert response.column_names == ["id", "name", "age"]
+        assert response.column("name").to_pylist() == ["James", "Hamoud"]
+        assert response.column("age").to_pylist() == [25, 30]
+
+    def test_csv_infers_like_pandas(self):
+        response = file_to_table(
+            make_body(
+                b"flag,note,ts\nTrue,NA,2020-01-01T10:00:00\n"
+                b"false,x,2020-01-02T10:00:00\n"
+            ),
+            "csv",
+        )
+
+        assert response.column("flag").type == pa.bool_()
+        assert response.column("note").to_pylist() == [None, "x"]
+        assert response.column("ts").type == pa.string()
+
+    def test_reads_json(self):
+        data = [
+            {"id": 1, "name": "James", "age": 25},
+            {"id": 2, "name": "Hamoud", "age": 30},
+        ]
+
+        response = file_to_table(
+            make_body(json.dumps(data).encode("utf-8")), "json"
+        )
+
+        assert response.to_pylist() == data
+
+    def test_reads_json_lines(self):
+        data = [
+            {"id": 1, "name": "James", "age": 25},
+            {"id": 2, "name": "Hamoud", "age": 30},
+        ]
+        body = "\n".join(json.dumps(row) for row in data).encode("utf-8")
+
+        response = file_to_table(make_body(body), "ndjson")
+
+        assert response.to_pylist() == data
+
+    def test_json_keys_of_every_record(self):
+        records = [{"name": "a", "x": 1}, {"name": "b", "x": 2, "extra": "k"}]
+
+        response = file_to_table(
+            make_body(json.dumps(records).encode("utf-8")), "json"
+        )
+
+        assert response.column_names == ["name", "x", "extra"]
+        assert response.column("extra").to_pylist() == [None, "k"]
+
+    def test_reads_empty_json_lines(self):
+        for body_bytes in (b"", b"\n"):
+            response = file_to_table(make_body(body_bytes), "jsonl")
+
+            assert isinstance(response, pa.Table)
+            assert response.num_rows == 0
+
+    def test_json_lines_keep_date_strings(self):
+        body_bytes = (
+            b'{"name": "a", "dob": "1990-01-02", "o": {"at": "2020-01-01"}}\n'
+            b'{"name": "b", "dob": "1991-03-04", "o": {"at": "2021-01-01"}}\n'
+        )
+
+        response = file_to_table(make_body(body_bytes), "jsonl")
+
+        assert response.column("dob").to_pylist() == [
+            "1990-01-02",
+            "1991-03-04",
+        ]
+        assert response.column("o").to_pylist() == [
+            {"at": "2020-01-01"},
+            {"at": "2021-01-01"},
+        ]
+
+    def test_reads_parquet(self):
+        df = pd.DataFrame({"id": [1, 2], "name": ["James", "Hamoud"]})
+        buffer = io.BytesIO()
+        df.to_parquet(buffer, index=False)
+
+        response = file_to_table(make_body(buffer.getvalue()), "parquet")
+
+        assert response.to_pandas().equals(df)
+
+    def test_parquet_skips_columns(self):
+        df = pd.DataFrame(
+            {"id": [1, 2], "name": ["James", "Hamoud"], "age": [25, 30]}
+        )
+        buffer = io.BytesIO()
+        df.to_parquet(buffer, index=False)
+
+        response = file_to_table(
+            make_body(buffer.getvalue()), "parquet", skip_columns=["name"]
+        )
+
+        assert response.column_names == ["id", "name", "age"]
+        assert response.column("name").type == pa.null()
+        assert response.column("age").to_pylist() == [25, 30]
+
+    @patch("utils.file_to_table.pv")
+    def test_csv_raises_error(self, pv_mock, caplog):
+        pv_mock.read_csv.side_effect = Exception("error")
+        caplog.set_level(logging.ERROR)
+
+        response = file_to_table(make_body(b"id\n1\n"), "csv")
+
+        assert response == None
+        assert "Something went wrong " in caplog.text
+
+    def test_no_format_match(self, caplog):
+        caplog.set_level(logging.INFO)
+
+        response = file_to_table("", "dfd")
+
+        assert response == None
+        assert "The provided format doesn't match" in caplog.text
@@ -1,7 +1,9 @@
-from utils.get_file_content import get_file_content
+from utils.get_file_content import get_file_content, fetch_if_changed
+from utils.ranged_stream import RangedStream
 import pytest
 from unittest.mock import MagicMock, patch
 import logging
+from botocore.exceptions import ClientError
 from botocore.response import StreamingBody
 import io
 
@@ -22,7 +24,7 @@ def test_handles_wrong_input(caplog):
     assert response == None
 
 
-@patch("utils.get_file_content.boto3.client")
+@patch("utils.get_file_content.get_s3_client")
 def test_return_boto_stream(boto_mock, create_data):
     f_location = create_data
 
@@ -37,7 +39,7 @@ def test_return_boto_stream(boto_mock, create_data):
     assert isinstance(response, StreamingBody)
 
 
-@patch("utils.get_file_content.boto3.client")
+@patch("utils.get_file_content.get_s3_client")
 def test_raises_error(boto_mock, caplog, create_data):
     f_location = create_data
 
@@ -53,15 +55,13 @@ def test_raises_error(boto_mock, caplog, create_data):
     assert "Failed to retrieve S3 object" in caplog.text
 
 
-@patch("utils.get_file_content.re.compile")
-def test_no_match_found(pattern_mock, caplog, create_data):
+@patch("utils.get_file_content.parse_s3_url")
+def test_no_match_found(parse_mock, caplog, create_data):
     f_location = create_data
 
     caplog.set_level(logging.INFO)
 
-    my_mock = MagicMock()
-    my_mock.match.return_value = None
-    pattern_mock.return_value = my_mock
+    parse_mock.return_value = None
 
     response = get_file_content(f_location)
 
@@ -70,3 +70,104 @@ def test_no_match_found(pattern_mock, caplog, create_data):
         "Invalid S3 URL: s3://test_bucket/some/words/my_file.csv"
         in caplog.text
     )
+
+
+@patch("utils.get_file_content.get_s3_client")
+def test_ranged_small_object_single_get(boto_mock, create_data):
+    my_mock = MagicMock()
+    my_mock.head_object.return_value = {"ContentLength": 10, "ETag": '"e"'}
+    body = io.BytesIO(b"some content")
+    my_mock.get_object.return_value = {
+        "Body": StreamingBody(body, len(body.getvalue()))
+    }
+    boto_mock.return_value = my_mock
+
+    response = get_file_content(create_data, ranged=True)
+
+    assert isinstance(response, StreamingBody)
+    my_mock.get_object.assert_called_once_with(
+        Bucket="test_bucket", Key="some/words/my_file.csv"
+    )
+
+
+@patch("utils.get_file_content.RANGED_MIN_SIZE", 10)
+@patch("utils.get_file_content.get_s3_client")
+def test_ranged_large_object(boto_mock, create_data):
+    my_mock = MagicMock()
+    my_mock.head_object.return_value = {"ContentLength": 12, "ETag": '"e"'}
+    my_mock.get_object.return_value = {
+        "Body": StreamingBody(io.BytesIO(b"some content"), 12)
+    }
+    boto_mock.return_value = my_mock
+
+    response = get_file_content(create_data, ranged=True)
+
+    assert isinstance(response, RangedStream)
+    assert response.read() == b"some content"
+    my_mock.get_object.assert_called_once_with(
+        Bucket="test_bucket",
+        Key="some/words/my_file.csv",
+        Range="bytes=0-11",
+        IfMatch='"e"',
+    )
+
+
+@patch("utils.get_file_content.get_s3_client")
+def test_fetch_if_changed_downloads_new_object(boto_mock, create_data):
+    my_mock = MagicMock()
+    body = StreamingBody(io.BytesIO(b"some content"), 12)
+    my_mock.get_object.return_value = {
+        "Body": body,
+        "ETag": '"e"',
+        "VersionId": "v1",
+    }
+    boto_mock.return_value = my_mock
+
+    response = fetch_if_changed(create_data, '"old"')
+
+    assert response == (body, '"e"', "v1")
+    my_mock.get_object.assert_called_once_with(
+        Bucket="test_bucket",
+        Key="some/words/my_file.csv",
+        IfNoneMatch='"old"',
+    )
+
+
+@pytest.mark.parametrize("ranged", [False, True])
+@patch("utils.get_file_content.get_s3_client")
+def test_fetch_if_changed_not_modified(boto_mock, ranged, create_data):
+    my_mock = MagicMock()
+    not_modified = ClientError(
+        {
+            "Error": {"Code": "304", "Message": "Not Modified"},
+            "ResponseMetadata": {"HTTPStatusCode": 304},
+        },
+        "GetObject",
+    )
+    my_mock.get_object.side_effect = not_modified
+    my_mock.head_object.side_effect = not_modified
+    boto_mock.return_value = my_mock
+
+    response = fetch_if_changed(create_data, '"e"', ranged)
+
+    assert response == (None, '"e"', None)
+
+
+@patch("utils.get_file_content.get_s3_client")
+def test_fetch_if_changed_error(boto_mock, caplog, create_data):
+    caplog.set_level(logging.ERROR)
+    my_mock = MagicMock()
+    my_mock.get_object.side_effect = Exception("some error")
+    boto_mock.return_value = my_mock
+
+    response = fetch_if_changed(create_data, '"e"')
+
+    assert response is None
+    assert "Failed to retrieve S3 object" in caplog.text
+
+
+def test_fetch_if_changed_invalid_url(caplog):
+    caplog.set_level(logging.ERROR)
+
+    assert fetch_if_changed("bucket/key.csv") is None
+    assert "Invalid S3 URL: bucket/key.csv" in caplog.text
@@ -0,0 +1,222 @@
+from utils.json_array import (
+    iter_json_array,
+    read_json_batches,
+    read_json_frame,
+    frame_batches,
+    write_json_array,
+)
+from utils.json_paths import JsonPaths
+import io
+import json
+import codecs
+from botocore.response import StreamingBody
+import pandas as pd
+import pytest
+
+
+def make_body(body_bytes):
+    return StreamingBody(io.BytesIO(body_bytes), len(body_bytes))
+
+
+@pytest.fixture(scope="function")
+def small_blocks(monkeypatch):
+    # forcing elements, strings and numbers to be split across reads
+    monkeypatch.setattr("utils.json_array.BLOCK_SIZE", 3)
+
+
+class TestIterJsonArray:
+    def test_yields_batches_of_elements(self):
+        records = [{"id": i} for i in range(5)]
+        body = make_body(json.dumps(records).encode("utf-8"))
+
+        response = list(iter_json_array(body, batch_size=2))
+
+        assert [len(batch) for batch in response] == [2, 2, 1]
+        assert [json.loads(e) for b in response for e in b] == records
+
+    def test_elements_split_across_reads(self, small_blocks):
+        records = [
+            {"id": 12345, "name": 'Ja"mes [x]', "tags": ["a", {"b": 1}]},
+            {"id": 6.5e3, "name": "été ☃", "tags": []},
+            12345678,
+            "plain",
+        ]
+        body_bytes = json.dumps(records, ensure_ascii=False).encode("utf-8")
+
+        response = list(iter_json_array(make_body(body_bytes), batch_size=10))
+
+        assert [json.loads(e) for e in response[0]] == records
+
+    def test_whitespace_and_bom(self, small_blocks):
+        body_bytes = codecs.BOM_UTF8 + b' \n[ {"id": 1} ,\r\n\t{"id": 2}\n]\n '
+
+        response = list(iter_json_array(make_body(body_bytes)))
+
+        assert [[e.strip() for e in b] for b in response] == [
+            [b'{"id": 1}', b'{"id": 2}']
+        ]
+
+    def test_empty_array(self, small_blocks):
+        assert list(iter_json_array(make_body(b" [ \n ] "))) == []
+
+    def test_escaped_quotes_and_backslashes(self, small_blocks):
+        records = [
+            {"a": 'x\\", ["y'},
+            {"b": "\\\\"},
+            {"c": '\\\\"}]'},
+            {"d": "\\"},
+        ]
+        body_bytes = json.dumps(records).encode("utf-8")
+
+        response = list(iter_json_array(make_body(body_bytes), batch_size=10))
+
+        assert [json.loads(e) for e in response[0]] == records
+
+    def test_reads_lazily(self):
+        records = [{"id": i, "name": f"name_{i}"} for i in range(200_000)]
+        body = make_body(json.dumps(records).encode("utf-8"))
+
+        next(iter_json_array(body, batch_size=10))
+
+        assert body._amount_read < body._content_length
+
+    @pytest.mark.parametrize(
+        "body_bytes",
+        [
+            b'{"id": 1}',
+            b'[{"id": 1}',
+            b'[{"id": 1},',
+            b'[{"id": 1},]',
+            b'[,{"id": 1}]',
+            b'[{"id": 1}, ]',
+            b'[{"id": 1}] [{"id": 2}]',
+            b'[{"id": 1',
+            b"",
+        ],
+    )
+    def test_invalid_array_raises(self, body_bytes):
+        with pytest.raises(ValueError):
+            list(iter_json_array(make_body(body_bytes)))
+
+
+class TestReadJsonBatches:
+    def test_same_as_read_json(self, small_blocks):
+        records = [
+            {"id": i, "name": f"name_{i}", "score": str(i * 10)}
+            for i in range(7)
+        ]
+        body_bytes = json.dumps(records).encode("utf-8")
+
+        response = list(read_json_batches(make_body(body_bytes), 3))
+
+        assert [len(batch) for batch in response] == [3, 3, 1]
+        expected = pd.read_json(io.BytesIO(body_bytes), orient="records")
+        df = pd.concat(response, ignore_index=True)
+        assert df.equals(expected)
+
+    def test_schema(self, small_blocks):
+        records = [{"id": "007", "score": i} for i in range(5)]
+        body_bytes = json.dumps(records).encode("utf-8")
+
+        response = list(
+            read_json_batches(make_body(body_bytes), 2, {"score": "float64"})
+        )
+
+        assert [list(batch["id"]) for batch in response] == [
+            ["007", "007"],
+            ["007", "007"],
+            ["007"],
+        ]
+        assert all(batch["score"].dtype == "float64" for batch in response)
+
+    def test_nested_paths(self, small_blocks):
+        records = [
+            {"id": i, "customer": {"name": f"name_{i}", "age": i}}
+            for i in range(3)
+        ]
+        body_bytes = json.dumps(records).encode("utf-8")
+
+        response = list(
+            read_json_batches(
+                make_body(body_bytes), 2, paths=JsonPaths(["customer.name"])
+            )
+        )
+
+        df = pd.concat(response, ignore_index=True)
+        assert list(df["customer"]) == [
+            {"name": "***", "age": i} for i in range(3)
+        ]
+
+    def test_malformed_element_raises(self):
+        body = make_body(b'[{"id": 1} {"id": 2}]')
+
+        with pytest.raises(ValueError):
+            list(read_json_batches(body))
+
+
+class TestReadJsonFrame:
+    # pandas only runs its json type inference inside pd.read_json,
+    # these cases fail if the reader starts typing columns otherwise
+    @pytest.mark.parametrize(
+        "records",
+        [
+            [{"created_at": True}, {"created_at": False}, {}],
+            [{"date": True}, {"date": None}, {"date": False}],
+            [{"zip": "007"}, {"zip": "010"}, {"zip": None}],
+            [{"1": "a"}, {"1": "b", "x": 1}, {"x": 2}],
+            [{"v": 0.1 + 0.2}, {"v": 1e-7}, {"v": 2.0}],
+            [{"s": "a"}, {}, {"s": "b"}],
+            [
+                {"created_at": 1577836800000, "nested": {"a": 1}},
+                {"created_at": 1577836900000, "nested": [1]},
+                {"modified": "2020-01-02", "timestamp_x": "2020-01-02"},
+            ],
+            [],
+        ],
+    )
+    def test_same_as_read_json(self, monkeypatch, records):
+        monkeypatch.setattr("utils.json_array.DEFAULT_BATCH_SIZE", 2)
+        body_bytes = json.dumps(records).encode("utf-8")
+
+        response = read_json_frame(make_body(body_bytes))
+
+        expected = pd.read_json(io.BytesIO(body_bytes), orient="records")
+        pd.testing.assert_frame_equal(
+            response,
+            expected,
+            check_index_type=False,
+            check_column_type=False,
+        )
+
+
+class TestWriteJsonArray:
+    def test_same_bytes_as_to_json(self):
+        df = pd.DataFrame(
+            {
+                "id": range(5),
+                "name": [f"name_{i}" for i in range(5)],
+                "score": [1.5, None, 3.0, 4.25, 5.0],
+            }
+        )
+        buffer = io.BytesIO()
+
+        write_json_array(frame_batches(df, 2), buffer)
+
+        assert buffer.getvalue().decode("utf-8") == df.to_json(
+            orient="records"
+        )
+
+    def test_skips_empty_frames(self):
+        df = pd.DataFrame({"id": [1, 2]})
+        buffer = io.BytesIO()
+
+        write_json_array([df.iloc[0:0], df, df.iloc[0:0], df], buffer)
+
+        assert json.loads(buffer.getvalue()) == [{"id": 1}, {"id": 2}] * 2
+
+    def test_no_frames_is_empty_array(self):
+        buffer = io.BytesIO()
+
+        write_json_array([], buffer)
+
+        assert buffer.getvalue() == b"[]"
@@ -0,0 +1,148 @@
+from utils.json_paths import ANY, JsonPaths, is_path, parse_path
+import pandas as pd
+import pytest
+import logging
+
+
+def test_is_path():
+    assert is_path("customer.address.street")
+    assert is_path("contacts[*]")
+    assert not is_path("name")
+
+
+@pytest.mark.parametrize(
+    "path, steps",
+    [
+        ("customer.address.street", ("customer", "address", "street")),
+        ("contacts[*].email", ("contacts", ANY, "email")),
+        ("contacts[0].phones[-1]", ("contacts", 0, "phones", -1)),
+        ("devices.*.ip", ("devices", ANY, "ip")),
+        ("a.1", ("a", "1")),
+    ],
+)
+def test_parse_path(path, steps):
+    assert parse_path(path) == steps
+
+
+@pytest.mark.parametrize(
+    "path", ["", ".a", "a.", "a..b", "[0].a", "a[x]", "a[*]b", "a[0"]
+)
+def test_invalid_path(path):
+    with pytest.raises(ValueError, match="Invalid path"):
+        parse_path(path)
+
+
+def test_redact_record():
+    record = {
+        "id": 1,
+        "customer": {
+            "name": "James",
+            "address": {"street": "1 Main St", "city": "Leeds"},
+        },
+        "contacts": [
+            {"email": "a@b.com", "type": "work"},
+            {"type": "home"},
+            "not an object",
+        ],
+    }
+    paths = JsonPaths(
+        ["customer.address.street", "customer.name", "contacts[*].email"]
+    )
+
+    paths.redact(record)
+
+    assert record == {
+        "id": 1,
+        "customer": {
+            "name": "***",
+            "address": {"street": "***", "city": "Leeds"},
+        },
+        "contacts": [
+            {"email": "***", "type": "work"},
+            {"type": "home"},
+            "not an object",
+        ],
+    }
+
+
+def test_redact_whole_values_and_indexes():
+    record = {
+        "a": {"b": {"c": 1, "d": 2}},
+        "tags": ["x", "y", "z"],
+        "devices": {"phone": {"ip": "1"}, "laptop": {"ip": "2"}},
+    }
+    # the shorter path wins whatever order the paths are given in
+    paths = JsonPaths(["a.b.c", "a.b", "tags[-1]", "tags[9]", "devices.*.ip"])
+
+    paths.redact(record)
+
+    assert record == {
+        "a": {"b": "***"},
+        "tags": ["x", "y", "***"],
+        "devices": {"phone": {"ip": "***"}, "laptop": {"ip": "***"}},
+    }
+
+
+def test_missing_steps_are_left_alone():
+    records = [{"customer": None}, {"customer": "text"}, {}, {"other": 1}]
+    paths = JsonPaths(["customer.address.street"])
+
+    for record in records:
+        paths.redact(record)
+
+    assert records == [
+        {"customer": None},
+        {"customer": "text"},
+        {},
+        {"other": 1},
+    ]
+
+
+def test_redact_frame():
+    df = pd.DataFrame(
+        {
+            "id": [1, 2, 3],
+            "customer": [{"name": "a"}, None, {"name": "c", "age": 3}],
+        }
+    )
+    paths = JsonPaths(["customer.name", "id.value", "missing.name"])
+
+    response = paths.redact_frame(df)
+
+    assert list(response["id"]) == [1, 2, 3]
+    assert list(response["customer"]) == [
+        {"name": "***"},
+        None,
+        {"name": "***", "age": 3},
+    ]
+
+
+def test_redact_frame_any_column():
+    df = pd.DataFrame(
+        {"billing": [{"email": "a@b"}], "shipping": [{"email": "c@d"}]}
+    )
+
+    JsonPaths(["*.email"]).redact_frame(df)
+
+    assert df.to_dict("records") == [
+        {"billing": {"email": "***"}, "shipping": {"email": "***"}}
+    ]
+
+
+def test_redact_frame_flat_dotted_column():
+    df = pd.DataFrame({"user.email": ["a@b.com"], "id": [1]})
+
+    JsonPaths(["user.email"]).redact_frame(df)
+
+    assert df.to_dict("records") == [{"user.email": "***", "id": 1}]
+
+
+def test_redact_frame_warns_missing_key(caplog):
+    df = pd.DataFrame({"customer": [{"address": "a"}]})
+
+    with caplog.at_level(logging.WARNING):
+        JsonPaths(["custmer.address", "*.name"]).redact_frame(df)
+
+    assert "pii field: custmer.address was not found" in caplog.text
+    assert "*.name" not in caplog.text
+    assert df.to_dict("records") == [{"customer": {"address": "a"}}]
@@ -0,0 +1,44 @@
+from utils.lazy_import import lazy_import, LazyModule
+import os
+import subprocess
+import sys
+
+
+def test_imports_on_first_attribute(tmp_path, monkeypatch):
+    (tmp_path / "lazy_target.py").write_text("VALUE = 42\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "lazy_target", raising=False)
+
+    module = lazy_import("lazy_target")
+
+    assert isinstance(module, LazyModule)
+    assert "lazy_target" not in sys.modules
+
+    assert module.VALUE == 42
+    assert "lazy_target" in sys.modules
+
+
+def test_attributes_of_submodules():
+    parsers = lazy_import("email.parser")
+
+    assert parsers.BytesParser.__module__ == "email.parser"
+
+
+def test_package_import_loads_no_heavy_dependency():
+    # a fresh interpreter, the test session already imported them
+    code = (
+        "import sys, src.obfuscate_main; "
+        "print(sorted({m.split('.')[0] for m in sys.modules} & "
+        "{'pandas', 'pyarrow', 'numpy', 'boto3', 'botocore', 'asyncio'}))"
+    )
+    env = {**os.environ, "PYTHONPATH": os.getcwd()}
+
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        check=True,
+        text=True,
+        env=env,
+    )
+
+    assert result.stdout.strip() == "[]"
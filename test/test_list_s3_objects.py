@@ -0,0 +1,81 @@
+from utils.list_s3_objects import list_s3_objects, read_manifest
+import os
+import pytest
+import boto3
+from moto import mock_aws
+from unittest.mock import patch
+
+
+@pytest.fixture(scope="function")
+def s3():
+    """Mocked s3 with a few objects under daily/"""
+    os.environ["AWS_ACCESS_KEY_ID"] = "testing"
+    os.environ["AWS_SECRET_ACCESS_KEY"] = "testing"
+    os.environ["AWS_SECURITY_TOKEN"] = "testing"
+    os.environ["AWS_SESSION_TOKEN"] = "testing"
+    os.environ["AWS_DEFAULT_REGION"] = "eu-west-2"
+
+    with mock_aws():
+        s3 = boto3.client("s3")
+        s3.create_bucket(
+            Bucket="test",
+            CreateBucketConfiguration={
+                "LocationConstraint": "eu-west-2",
+            },
+        )
+        for key in (
+            "daily/a.csv",
+            "daily/b.csv",
+            "daily/sub/",
+            "daily/sub/c.csv",
+            "other/d.csv",
+        ):
+            s3.put_object(Bucket="test", Key=key, Body=b"id\n1\n")
+        yield s3
+
+
+def test_lists_keys_under_prefix(s3):
+    response = list(list_s3_objects("test", "daily/"))
+
+    assert response == ["daily/a.csv", "daily/b.csv", "daily/sub/c.csv"]
+
+
+def test_lists_page_by_page(s3):
+    calls = []
+    s3.meta.events.register(
+        "before-call.s3.ListObjectsV2", lambda **kwargs: calls.append(1)
+    )
+
+    with patch("utils.list_s3_objects.get_s3_client", return_value=s3):
+        keys = list_s3_objects("test", "daily/", page_size=1)
+
+        # the first key comes out of the first page alone
+        assert next(keys) == "daily/a.csv"
+        assert len(calls) == 1
+
+        assert list(keys) == ["daily/b.csv", "daily/sub/c.csv"]
+        assert len(calls) == 4
+
+
+def test_read_manifest(s3):
+    s3.put_object(
+        Bucket="test",
+        Key="manifest.txt",
+        Body=b"# daily files\ndaily/a.csv\n\n s3://other/x/y.csv \r\n",
+    )
+
+    response = list(read_manifest("s3://test/manifest.txt"))
+
+    assert response == [("test", "daily/a.csv"), ("other", "x/y.csv")]
+
+
+def test_manifest_invalid_entry(s3):
+    s3.put_object(Bucket="test", Key="manifest.txt", Body=b"s3://nokey\n")
+
+    with pytest.raises(ValueError, match="line 1"):
+        list(read_manifest("s3://test/manifest.txt"))
+
+
+def test_missing_manifest(s3):
+    with pytest.raises(ValueError, match="Failed to read the manifest"):
+        list(read_manifest("s3://test/missing.txt"))
@@ -1,4 +1,9 @@
-from src.obfuscate_main import obfuscator_main
+from src.obfuscate_main import (
+    obfuscator_main,
+    obfuscator_main_async,
+    obfuscate_batch,
+    shutdown_async_executor,
+)
 import pytest
 from unittest.mock import patch
 import logging
@@ -10,12 +15,25 @@ import boto3
 from moto import mock_aws
 import os
 from faker import Faker
-import numpy as np
 import time
-
+import json
+import threading
+import asyncio
+import pyarrow as pa
+import pyarrow.parquet as pq
+from utils.s3_client import reset_s3_client
+from utils.schema_cache import get_schema_cache
+from utils.result_cache import configure_result_cache, get_result_cache
+from utils.tokenizer import Tokenizer, configure_token_key, KEY_ENV
 
 fake = Faker()
 
+# pii_fields of create_data as the pipeline hands them to redact_pii
+MASKED_FIELDS = [
+    {"field": field, "strategy": "mask", "keep": None}
+    for field in ("name", "id", "email")
+]
+
 
 @pytest.fixture(scope="function")
 def aws_credentials():
@@ -72,50 +90,6 @@ def s3_data():
         yield json_string
 
 
-@pytest.fixture(scope="function")
-def create_1mp_data():
-    with mock_aws():
-        s3 = boto3.client("s3")
-        bucket_name = "test"
-        key_name = "my/buck/test.csv"
-        s3.create_bucket(
-            Bucket="test",
-            CreateBucketConfiguration={
-                "LocationConstraint": "eu-west-2",
-            },
-        )
-
-        n_rows = 5500
-
-        df = pd.DataFrame(
-            {
-                "id": range(1, n_rows + 1),
-                "name": [fake.name() for _ in range(n_rows)],
-                "age": np.random.randint(18, 65, size=n_rows),
-                "email": [fake.email() for _ in range(n_rows)],
-                "course": [fake.job() for _ in range(n_rows)],
-            }
-        )
-
-        buffer = io.BytesIO()
-        df.to_csv(buffer, index=False)
-        buffer.seek(0)
-
-        s3.put_object(
-            Body=buffer,
-            Bucket=bucket_name,
-            Key=key_name,
-        )
-        f"s3://{bucket_name}/{key_name}"
-
-        json_string = f"""{{
-        "file_to_obfuscate": "s3://{bucket_name}/{key_name}",
-        "pii_fields": ["name", "id","email"]
-    }}"""
-
-        yield json_string
-
-
 class TestObfuscateUnitTest:
     # 1
     def test_hadles_wrong_input(self):
@@ -222,7 +196,9 @@ class TestObfuscateUnitTest:
         obfuscator_main(j_string)
 
         mock_file_content.assert_called_once()
-        mock_file_content.assert_called_with("s3://test_bucket/my_file.csv")
+        mock_file_content.assert_called_with(
+            "s3://test_bucket/my_file.csv", ranged=False
+        )
 
     # 5
     @patch("src.obfuscate_main.get_file_content")
@@ -283,7 +259,14 @@ class TestObfuscateUnitTest:
         obfuscator_main(j_string)
 
         mock_file_to_df.assert_called_once()
-        mock_file_to_df.assert_called_with(streaming_body, "csv")
+        mock_file_to_df.assert_called_with(
+            streaming_body,
+            "csv",
+            skip_columns=["name", "id", "email"],
+            schema=None,
+            cache_key=("test_bucket", "", "csv"),
+            paths=None,
+        )
 
     # 7
     @patch("src.obfuscate_main.file_to_df")
@@ -351,7 +334,7 @@ class TestObfuscateUnitTest:
         obfuscator_main(j_string)
 
         mock_redact_pii.assert_called_once()
-        mock_redact_pii.assert_called_with(df, ["name", "id", "email"])
+        mock_redact_pii.assert_called_with(df, MASKED_FIELDS, None)
 
     @patch("src.obfuscate_main.to_byte_stream")
     @patch("src.obfuscate_main.redact_pii")
@@ -393,7 +376,7 @@ class TestObfuscateUnitTest:
         obfuscator_main(j_string)
 
         mock_byte_stream.assert_called_once()
-        mock_byte_stream.assert_called_with(df2, "csv")
+        mock_byte_stream.assert_called_with(df2, "csv", None)
 
     # 10
     @patch("src.obfuscate_main.to_byte_stream")
@@ -426,30 +409,1951 @@ class TestObfuscateUnitTest:
         assert response["status"] == 400
         assert "Failed to convert file to byte stream" in caplog.text
 
+    # 11
+    @patch("src.obfuscate_main.chunks_to_byte_stream")
+    @patch("src.obfuscate_main.file_to_chunks")
+    @patch("src.obfuscate_main.file_to_df")
+    @patch("src.obfuscate_main.get_file_content")
+    @patch("src.obfuscate_main.extract_file_format")
+    def test_streaming_uses_chunks(
+        self,
+        mock_ext_file,
+        mock_file_content,
+        mock_file_to_df,
+        mock_file_to_chunks,
+        mock_chunks_to_byte_stream,
+        create_data,
+    ):
+        mock_ext_file.return_value = "csv"
+        mock_file_content.return_value = "body"
+        mock_file_to_chunks.return_value = iter([])
+        mock_chunks_to_byte_stream.return_value = io.BytesIO()
+
+        payload = json.loads(create_data)
+        payload["streaming"] = True
+        payload["chunk_size"] = 10
+
+        obfuscator_main(json.dumps(payload))
+
+        mock_file_to_df.assert_not_called()
+        mock_file_to_chunks.assert_called_with(
+            "body",
+            "csv",
+            10,
+            skip_columns=["name", "id", "email"],
+            schema=None,
+            paths=None,
+        )
+        mock_chunks_to_byte_stream.assert_called_once()
 
-class TestObfuscateIntegrationTest:
-    @mock_aws
-    def test_full_cycle(self, s3_data):
-        json_string = s3_data
+    # 12
+    @patch("src.obfuscate_main.file_to_chunks")
+    @patch("src.obfuscate_main.get_file_content")
+    @patch("src.obfuscate_main.extract_file_format")
+    def test_streaming_error(
+        self,
+        mock_ext_file,
+        mock_file_content,
+        mock_file_to_chunks,
+        caplog,
+        create_data,
+    ):
+        mock_ext_file.return_value = "json"
+        mock_file_content.return_value = "body"
+        mock_file_to_chunks.return_value = None
 
-        response = obfuscator_main(json_string)
+        payload = json.loads(create_data)
+        payload["streaming"] = True
 
-        df = pd.read_csv(response)
-        assert df["name"].loc[0] == "***"
-        assert df["email"].loc[0] == "***"
-        assert df["id"].loc[0] == "***"
-        assert len(df["name"]) == 2
+        caplog.set_level(logging.INFO)
 
-    @mock_aws
-    def test_1mp_file(self, create_1mp_data):
-        jstring = create_1mp_data
+        response = obfuscator_main(json.dumps(payload))
+
+        assert response["status"] == 400
+        assert "Failed to convert file content to df" in caplog.text
+
+    # 13
+    @patch("src.obfuscate_main.get_file_content")
+    @patch("src.obfuscate_main.extract_file_format")
+    def test_unknown_engine(
+        self, mock_ext_file, mock_file_content, caplog, create_data
+    ):
+        mock_ext_file.return_value = "csv"
+
+        payload = json.loads(create_data)
+        payload["engine"] = "spark"
+
+        caplog.set_level(logging.INFO)
+
+        response = obfuscator_main(json.dumps(payload))
+
+        assert response["status"] == 400
+        assert "Unknown engine: spark" in caplog.text
+        mock_file_content.assert_not_called()
+
+    # 14
+    @patch("src.obfuscate_main.table_to_byte_stream")
+    @patch("src.obfuscate_main.redact_table")
+    @patch("src.obfuscate_main.file_to_table")
+    @patch("src.obfuscate_main.file_to_df")
+    @patch("src.obfuscate_main.get_file_content")
+    @patch("src.obfuscate_main.extract_file_format")
+    def test_arrow_engine(
+        self,
+        mock_ext_file,
+        mock_file_content,
+        mock_file_to_df,
+        mock_file_to_table,
+        mock_redact_table,
+        mock_table_to_byte_stream,
+        create_data,
+    ):
+        mock_ext_file.return_value = "csv"
+        mock_file_content.return_value = "body"
+        mock_file_to_table.return_value = "table"
+        mock_redact_table.return_value = "redacted"
+        mock_table_to_byte_stream.return_value = io.BytesIO()
+
+        payload = json.loads(create_data)
+        payload["engine"] = "arrow"
+
+        obfuscator_main(json.dumps(payload))
+
+        mock_file_to_df.assert_not_called()
+        mock_file_to_table.assert_called_with(
+            "body", "csv", skip_columns=["name", "id", "email"]
+        )
+        mock_redact_table.assert_called_with("table", MASKED_FIELDS, None)
+        mock_table_to_byte_stream.assert_called_with("redacted", "csv", None)
+
+    # 15
+    @patch("src.obfuscate_main.file_to_table")
+    @patch("src.obfuscate_main.get_file_content")
+    @patch("src.obfuscate_main.extract_file_format")
+    def test_arrow_engine_error(
+        self,
+        mock_ext_file,
+        mock_file_content,
+        mock_file_to_table,
+        caplog,
+        create_data,
+    ):
+        mock_ext_file.return_value = "csv"
+        mock_file_content.return_value = "body"
+        mock_file_to_table.return_value = None
+
+        payload = json.loads(create_data)
+        payload["engine"] = "arrow"
+
+        caplog.set_level(logging.INFO)
+
+        response = obfuscator_main(json.dumps(payload))
+
+        assert response["status"] == 400
+        assert "Failed to convert file content to table" in caplog.text
+
+    # 16
+    @patch("src.obfuscate_main.get_file_content")
+    @patch("src.obfuscate_main.extract_file_format")
+    def test_bytes_engine_csv_only(
+        self, mock_ext_file, mock_file_content, caplog, create_data
+    ):
+        mock_ext_file.return_value = "json"
+
+        payload = json.loads(create_data)
+        payload["engine"] = "bytes"
+
+        caplog.set_level(logging.INFO)
+
+        response = obfuscator_main(json.dumps(payload))
+
+        assert response["status"] == 400
+        assert "The bytes engine doesn't support json" in caplog.text
+        mock_file_content.assert_not_called()
+
+    # 17
+    @patch("src.obfuscate_main.redact_csv_bytes")
+    @patch("src.obfuscate_main.get_file_content")
+    @patch("src.obfuscate_main.extract_file_format")
+    def test_bytes_engine_error(
+        self,
+        mock_ext_file,
+        mock_file_content,
+        mock_redact_csv_bytes,
+        caplog,
+        create_data,
+    ):
+        mock_ext_file.return_value = "csv"
+        mock_file_content.return_value = "body"
+        mock_redact_csv_bytes.return_value = None
+
+        payload = json.loads(create_data)
+        payload["engine"] = "bytes"
+
+        caplog.set_level(logging.INFO)
+
+        response = obfuscator_main(json.dumps(payload))
+
+        mock_redact_csv_bytes.assert_called_with(
+            "body", ["name", "id", "email"], None
+        )
+        assert response["status"] == 400
+        assert "Failed to redact csv bytes" in caplog.text
+
+    # 18
+    @patch("src.obfuscate_main.get_file_content")
+    @patch("src.obfuscate_main.extract_file_format")
+    def test_invalid_destination(
+        self, mock_ext_file, mock_file_content, caplog, create_data
+    ):
+        mock_ext_file.return_value = "csv"
+
+        payload = json.loads(create_data)
+        payload["destination"] = "not/an/s3/url.csv"
+
+        caplog.set_level(logging.INFO)
+
+        response = obfuscator_main(json.dumps(payload))
+
+        assert response["status"] == 400
+        assert "Invalid destination: not/an/s3/url.csv" in caplog.text
+        mock_file_content.assert_not_called()
+
+    # 19
+    @patch("src.obfuscate_main.S3MultipartWriter")
+    @patch("src.obfuscate_main.to_byte_stream")
+    @patch("src.obfuscate_main.redact_pii")
+    @patch("src.obfuscate_main.file_to_df")
+    @patch("src.obfuscate_main.get_file_content")
+    @patch("src.obfuscate_main.extract_file_format")
+    def test_destination_aborted_on_error(
+        self,
+        mock_ext_file,
+        mock_file_content,
+        mock_file_to_df,
+        mock_redact_pii,
+        mock_byte_stream,
+        mock_writer,
+        create_data,
+    ):
+        mock_ext_file.return_value = "csv"
+        mock_file_content.return_value = "body"
+        mock_byte_stream.return_value = None
+
+        payload = json.loads(create_data)
+        payload["destination"] = "s3://out/redacted/my_file.csv"
+
+        response = obfuscator_main(json.dumps(payload))
+
+        assert response["status"] == 400
+        mock_writer.assert_called_with("out", "redacted/my_file.csv")
+        writer = mock_writer.return_value
+        mock_byte_stream.assert_called_with(
+            mock_redact_pii.return_value, "csv", writer
+        )
+        writer.abort.assert_called_once()
+        writer.close.assert_not_called()
+
+    # 20
+    @patch("src.obfuscate_main.get_file_content")
+    @patch("src.obfuscate_main.extract_file_format")
+    def test_processes_csv_only(
+        self, mock_ext_file, mock_file_content, caplog, create_data
+    ):
+        mock_ext_file.return_value = "parquet"
+
+        payload = json.loads(create_data)
+        payload["processes"] = 2
+
+        caplog.set_level(logging.INFO)
+
+        response = obfuscator_main(json.dumps(payload))
+
+        assert response["status"] == 400
+        assert (
+            "Sharding across processes doesn't support parquet "
+            "with the pandas engine" in caplog.text
+        )
+        mock_file_content.assert_not_called()
+
+    # 21
+    @patch("src.obfuscate_main.shard_csv")
+    @patch("src.obfuscate_main.get_file_content")
+    @patch("src.obfuscate_main.extract_file_format")
+    def test_processes_shard_error(
+        self,
+        mock_ext_file,
+        mock_file_content,
+        mock_shard_csv,
+        caplog,
+        create_data,
+    ):
+        mock_ext_file.return_value = "csv"
+        mock_file_content.return_value = "body"
+        mock_shard_csv.return_value = None
+
+        payload = json.loads(create_data)
+        payload["processes"] = 2
+        payload["engine"] = "bytes"
+
+        caplog.set_level(logging.INFO)
+
+        response = obfuscator_main(json.dumps(payload))
+
+        mock_shard_csv.assert_called_with(
+            "body",
+            MASKED_FIELDS,
+            2,
+            "bytes",
+            None,
+            schema=None,
+            tokenizer=None,
+        )
+        assert response["status"] == 400
+        assert "Failed to redact csv shards" in caplog.text
+
+    # 22
+    @patch("src.obfuscate_main.file_to_df")
+    @patch("src.obfuscate_main.get_file_content")
+    @patch("src.obfuscate_main.extract_file_format")
+    def test_stages_of_failed_call(
+        self, mock_ext_file, mock_file_content, mock_file_to_df, create_data
+    ):
+        mock_ext_file.return_value = "csv"
+        mock_file_content.return_value = io.BytesIO(b"id,name\n")
+        mock_file_to_df.return_value = None
+        records = []
+
+        response = obfuscator_main(create_data, on_stage=records.append)
+
+        assert response["status"] == 400
+        assert [(r["stage"], r["ok"]) for r in records] == [
+            ("get_file_content", True),
+            ("file_to_df", False),
+        ]
+        assert all(
+            r["file"] == "s3://test_bucket/my_file.csv" for r in records
+        )
+
+    # 23
+    @pytest.mark.parametrize("schema", ["int64", {}, {"id": 1}])
+    @patch("src.obfuscate_main.get_file_content")
+    @patch("src.obfuscate_main.extract_file_format")
+    def test_invalid_schema(
+        self, mock_ext_file, mock_file_content, caplog, create_data, schema
+    ):
+        mock_ext_file.return_value = "csv"
+
+        payload = json.loads(create_data)
+        payload["schema"] = schema
+
+        response = obfuscator_main(json.dumps(payload))
+
+        assert response["status"] == 400
+        assert "Invalid schema" in caplog.text
+        mock_file_content.assert_not_called()
+
+    # 24
+    @patch("src.obfuscate_main.get_file_content")
+    @patch("src.obfuscate_main.extract_file_format")
+    def test_arrow_engine_schema(
+        self, mock_ext_file, mock_file_content, caplog, create_data
+    ):
+        mock_ext_file.return_value = "csv"
+
+        payload = json.loads(create_data)
+        payload["schema"] = "string"
+        payload["engine"] = "arrow"
+
+        response = obfuscator_main(json.dumps(payload))
+
+        assert response["status"] == 400
+        assert "The arrow engine doesn't support a schema" in caplog.text
+        mock_file_content.assert_not_called()
+
+    # 25
+    @pytest.mark.parametrize(
+        "options, message",
+        [
+            ({"redaction": "hash"}, "Unknown strategy: hash"),
+            ({"pii_fields": "name"}, "Invalid pii_fields: name"),
+            ({"pii_fields": [{"name": "a"}]}, "Invalid pii field"),
+            (
+                {
+                    "pii_fields": [
+                        {"field": "a", "strategy": "truncate", "keep": 0}
+                    ]
+                },
+                "Invalid keep for a: 0",
+            ),
+            (
+                {"redaction": "token", "engine": "bytes"},
+                "The bytes engine doesn't support the ['token'] strategies",
+            ),
+            ({"redaction": "token"}, "Tokens need a key"),
+        ],
+    )
+    @patch("src.obfuscate_main.get_file_content")
+    @patch("src.obfuscate_main.extract_file_format")
+    def test_invalid_redaction(
+        self,
+        mock_ext_file,
+        mock_file_content,
+        caplog,
+        create_data,
+        monkeypatch,
+        options,
+        message,
+    ):
+        monkeypatch.delenv(KEY_ENV, raising=False)
+        mock_ext_file.return_value = "csv"
+
+        payload = {**json.loads(create_data), **options}
+
+        response = obfuscator_main(json.dumps(payload))
+
+        assert response["status"] == 400
+        assert message in caplog.text
+        mock_file_content.assert_not_called()
+
+    # 26
+    @pytest.mark.parametrize(
+        "options, message",
+        [
+            (
+                {"engine": "arrow"},
+                "The arrow engine doesn't support nested paths",
+            ),
+            (
+                {"redaction": "compact"},
+                "Nested paths can only be masked: customer.name",
+            ),
+            (
+                {"pii_fields": ["customer.name", "contacts[x]"]},
+                "Invalid path: contacts[x]",
+            ),
+        ],
+    )
+    @patch("src.obfuscate_main.get_file_content")
+    @patch("src.obfuscate_main.extract_file_format")
+    def test_invalid_nested_paths(
+        self, mock_ext_file, mock_file_content, caplog, options, message
+    ):
+        mock_ext_file.return_value = "json"
 
-        start_time = time.time()
-        obfuscator_main(jstring)
+        payload = {
+            "file_to_obfuscate": "s3://test/data/test.json",
+            "pii_fields": ["customer.name"],
+            **options,
+        }
 
-        end_time = time.time()
+        response = obfuscator_main(json.dumps(payload))
 
-        total_time = round(end_time - start_time, 3)
+        assert response["status"] == 400
+        assert message in caplog.text
+        mock_file_content.assert_not_called()
 
-        print(total_time)
-        assert total_time < 60
+    # 27
+    @pytest.mark.parametrize("engine", ["pandas", "arrow"])
+    @patch("src.obfuscate_main.redact_table")
+    @patch("src.obfuscate_main.redact_pii")
+    @patch("src.obfuscate_main.file_to_table")
+    @patch("src.obfuscate_main.file_to_df")
+    @patch("src.obfuscate_main.get_file_content")
+    @patch("src.obfuscate_main.extract_file_format")
+    def test_redaction_fails(
+        self,
+        mock_ext_file,
+        mock_file_content,
+        mock_file_to_df,
+        mock_file_to_table,
+        mock_redact_pii,
+        mock_redact_table,
+        caplog,
+        create_data,
+        engine,
+    ):
+        mock_ext_file.return_value = "csv"
+        mock_file_content.return_value = io.BytesIO(b"")
+        mock_file_to_df.return_value = pd.DataFrame({"name": ["a"]})
+        mock_file_to_table.return_value = pa.table({"name": ["a"]})
+        mock_redact_pii.side_effect = ValueError("boom")
+        mock_redact_table.side_effect = ValueError("boom")
+
+        payload = {**json.loads(create_data), "engine": engine}
+
+        response = obfuscator_main(json.dumps(payload))
+
+        assert response["status"] == 400
+        assert "Failed to redact pii fields" in caplog.text
+
+    # 28
+    @pytest.mark.parametrize(
+        "file_format, options",
+        [
+            ("csv", {"streaming": True}),
+            ("csv", {"processes": 2}),
+            ("json", {}),
+        ],
+    )
+    @patch("src.obfuscate_main.get_file_content")
+    @patch("src.obfuscate_main.extract_file_format")
+    def test_cached_schema_unsupported(
+        self,
+        mock_ext_file,
+        mock_file_content,
+        caplog,
+        create_data,
+        file_format,
+        options,
+    ):
+        mock_ext_file.return_value = file_format
+
+        payload = {**json.loads(create_data), "schema": "cached", **options}
+
+        response = obfuscator_main(json.dumps(payload))
+
+        assert response["status"] == 400
+        assert "The cached schema only supports csv files" in caplog.text
+        mock_file_content.assert_not_called()
+
+
+class TestObfuscateFolder:
+    def test_folder_needs_destination_prefix(self, caplog):
+        payload = {"prefix_to_obfuscate": "s3://in/daily/", "pii_fields": []}
+
+        caplog.set_level(logging.INFO)
+
+        response = obfuscator_main(json.dumps(payload))
+
+        assert response["status"] == 400
+        assert "Folder mode needs an s3 'destination' prefix" in caplog.text
+
+    def test_destination_inside_source(self, caplog):
+        payload = {
+            "prefix_to_obfuscate": "s3://in/daily/",
+            "destination": "s3://in/daily/redacted/",
+            "pii_fields": [],
+        }
+
+        caplog.set_level(logging.INFO)
+
+        response = obfuscator_main(json.dumps(payload))
+
+        assert response["status"] == 400
+        assert "The destination can't be inside the source" in caplog.text
+
+    def test_single_source_only(self):
+        payload = {
+            "file_to_obfuscate": "s3://in/daily/a.csv",
+            "manifest": "s3://in/manifest.txt",
+            "destination": "s3://out/",
+            "pii_fields": [],
+        }
+
+        with pytest.raises(ValueError, match="Use only one of"):
+            obfuscator_main(json.dumps(payload))
+
+    @patch("src.obfuscate_main._obfuscate_one")
+    @patch("src.obfuscate_main.list_s3_objects")
+    def test_processing_starts_while_listing(self, mock_list, mock_one):
+        events = []
+        lock = threading.Lock()
+
+        def listing(bucket, prefix):
+            for i in range(6):
+                with lock:
+                    events.append(f"listed {i}")
+                yield f"{prefix}{i}.csv"
+
+        def process(payload, on_stage=None):
+            with lock:
+                events.append(f"done {payload['file_to_obfuscate'][-5]}")
+            return {"status": 200, "seconds": 0.0}
+
+        mock_list.side_effect = listing
+        mock_one.side_effect = process
+
+        payload = {
+            "prefix_to_obfuscate": "s3://in/daily/",
+            "destination": "s3://out/redacted",
+            "pii_fields": ["name"],
+            "max_workers": 2,
+        }
+
+        response = obfuscator_main(json.dumps(payload))
+
+        assert response["status"] == 200
+        assert events.index("done 0") < events.index("listed 5")
+        payloads = [c.args[0] for c in mock_one.call_args_list]
+        assert payloads[0] == {
+            "pii_fields": ["name"],
+            "file_to_obfuscate": "s3://in/daily/0.csv",
+            "destination": "s3://out/redacted/0.csv",
+        }
+
+    @patch("src.obfuscate_main._obfuscate_one")
+    @patch("src.obfuscate_main.list_s3_objects")
+    def test_listing_error_keeps_results(self, mock_list, mock_one):
+        def listing(bucket, prefix):
+            yield "daily/0.csv"
+            raise Exception("AccessDenied")
+
+        mock_list.side_effect = listing
+        mock_one.return_value = {"status": 200, "seconds": 0.0}
+
+        payload = {
+            "prefix_to_obfuscate": "s3://in/daily/",
+            "destination": "s3://out/",
+            "pii_fields": ["name"],
+        }
+
+        response = obfuscator_main(json.dumps(payload))
+
+        assert response["status"] == 400
+        assert response["succeeded"] == 1
+        assert response["error"] == "Exception: AccessDenied"
+
+
+class TestObfuscateBatch:
+    @patch("src.obfuscate_main.obfuscator_main")
+    def test_result_per_payload(self, mock_main):
+        output = io.BytesIO(b"id,name\n1,***\n")
+        uploaded = {"status": 200, "destination": "s3://out/c.csv"}
+
+        def fake_main(json_str, on_stage):
+            url = json.loads(json_str)["file_to_obfuscate"]
+            if url.endswith("a.csv"):
+                return output
+            if url.endswith("b.csv"):
+                return {"status": 400}
+            if url.endswith("c.csv"):
+                return uploaded
+            raise ValueError("Missing 'pii_fields' in input JSON")
+
+        mock_main.side_effect = fake_main
+
+        payloads = [
+            {"file_to_obfuscate": f"s3://in/{name}", "pii_fields": []}
+            for name in ("a.csv", "b.csv", "c.csv", "d.csv")
+        ]
+
+        response = obfuscate_batch(payloads, max_workers=2)
+
+        results = response["results"]
+        assert [r["file_to_obfuscate"] for r in results] == [
+            "s3://in/a.csv",
+            "s3://in/b.csv",
+            "s3://in/c.csv",
+            "s3://in/d.csv",
+        ]
+        assert [r["status"] for r in results] == [200, 400, 200, 400]
+        assert results[0]["output"] is output
+        assert results[0]["error"] is None
+        assert results[1]["output"] is None
+        assert "Failed to obfuscate the file" in results[1]["error"]
+        assert results[2]["destination"] == "s3://out/c.csv"
+        assert results[3]["error"] == (
+            "ValueError: Missing 'pii_fields' in input JSON"
+        )
+        assert response["succeeded"] == 2
+        assert response["failed"] == 2
+        assert response["files_per_second"] > 0
+        assert all(r["seconds"] >= 0 for r in results)
+        assert response["latency"]["max"] == max(r["seconds"] for r in results)
+
+    @patch("src.obfuscate_main.obfuscator_main")
+    def test_passes_stage_callback(self, mock_main):
+        mock_main.return_value = {"status": 400}
+
+        obfuscate_batch([{"file_to_obfuscate": "s3://in/a.csv"}], 1, print)
+
+        assert mock_main.call_args.args[1] is print
+
+    @patch("src.obfuscate_main.obfuscator_main")
+    def test_invalid_json_payload(self, mock_main):
+        response = obfuscate_batch(["not json"])
+
+        assert response["results"][0]["status"] == 400
+        assert response["results"][0]["error"].startswith("JSONDecodeError")
+        mock_main.assert_not_called()
+
+    @patch("src.obfuscate_main.obfuscator_main")
+    def test_runs_concurrently(self, mock_main):
+        # every call waits for the others, it only passes when
+        # max_workers of them run at the same time
+        barrier = threading.Barrier(4, timeout=5)
+        mock_main.side_effect = lambda json_str, on_stage: barrier.wait()
+
+        payloads = [json.dumps({"file_to_obfuscate": "s3://in/a.csv"})] * 4
+
+        response = obfuscate_batch(payloads, max_workers=4)
+
+        assert response["succeeded"] == 4
+
+    def test_empty_batch(self):
+        response = obfuscate_batch([])
+
+        assert response["results"] == []
+        assert response["succeeded"] == 0
+        assert response["latency"]["mean"] == 0.0
+
+
+class TestObfuscateAsync:
+    @pytest.fixture(autouse=True)
+    def fresh_executor(self):
+        shutdown_async_executor()
+        yield
+        shutdown_async_executor()
+
+    @patch("src.obfuscate_main._obfuscator_main")
+    def test_runs_off_the_event_loop(self, mock_main):
+        output = io.BytesIO(b"id,name\n1,***\n")
+
+        def slow_main(json_str, cancelled, on_stage):
+            time.sleep(0.2)
+            return output
+
+        mock_main.side_effect = slow_main
+
+        async def run():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            task = asyncio.create_task(ticker())
+            response = await obfuscator_main_async("{}")
+            task.cancel()
+            return response, ticks
+
+        response, ticks = asyncio.run(run())
+
+        assert response is output
+        # the loop kept running while the file was being redacted
+        assert ticks >= 5
+        assert mock_main.call_args.args[0] == "{}"
+
+    @patch("src.obfuscate_main._obfuscator_main")
+    def test_concurrency_limit(self, mock_main, monkeypatch):
+        monkeypatch.setattr("src.obfuscate_main.DEFAULT_ASYNC_WORKERS", 2)
+        lock = threading.Lock()
+        running = 0
+        most = 0
+
+        def counting_main(json_str, cancelled, on_stage):
+            nonlocal running, most
+            with lock:
+                running += 1
+                most = max(most, running)
+            time.sleep(0.05)
+            with lock:
+                running -= 1
+            return {"status": 200}
+
+        mock_main.side_effect = counting_main
+
+        async def run():
+            return await asyncio.gather(
+                *(obfuscator_main_async("{}") for _ in range(6))
+            )
+
+        responses = asyncio.run(run())
+
+        assert responses == [{"status": 200}] * 6
+        assert most == 2
+
+    @patch("src.obfuscate_main._obfuscator_main")
+    def test_cancel_stops_running_call(self, mock_main, monkeypatch):
+        monkeypatch.setattr("src.obfuscate_main.DEFAULT_ASYNC_WORKERS", 1)
+        started = threading.Event()
+        stopped = threading.Event()
+
+        def blocking_main(json_str, cancelled, on_stage):
+            if json_str == "second":
+                return {"status": 200}
+            started.set()
+            # a real pipeline stops at its next read of the file
+            assert cancelled.wait(5)
+            stopped.set()
+            return {"status": 400}
+
+        mock_main.side_effect = blocking_main
+
+        async def run():
+            first = asyncio.create_task(obfuscator_main_async("first"))
+            await asyncio.to_thread(started.wait, 5)
+            second = asyncio.create_task(obfuscator_main_async("second"))
+            await asyncio.sleep(0.05)
+
+            # the only slot is taken until the first call is cancelled
+            assert not second.done()
+
+            first.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await first
+            assert stopped.is_set()
+
+            return await second
+
+        assert asyncio.run(run()) == {"status": 200}
+
+    @patch("src.obfuscate_main._obfuscator_main")
+    def test_cancel_while_waiting(self, mock_main, monkeypatch):
+        monkeypatch.setattr("src.obfuscate_main.DEFAULT_ASYNC_WORKERS", 1)
+        release = threading.Event()
+
+        def blocking_main(json_str, cancelled, on_stage):
+            release.wait(5)
+            return {"status": 200}
+
+        mock_main.side_effect = blocking_main
+
+        async def run():
+            first = asyncio.create_task(obfuscator_main_async("first"))
+            waiting = asyncio.create_task(obfuscator_main_async("waiting"))
+            await asyncio.sleep(0.05)
+
+            waiting.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiting
+
+            release.set()
+            return await first
+
+        assert asyncio.run(run()) == {"status": 200}
+        assert [c.args[0] for c in mock_main.call_args_list] == ["first"]
+
+
+class TestObfuscateIntegrationTest:
+    @mock_aws
+    def test_full_cycle(self, s3_data):
+        json_string = s3_data
+
+        response = obfuscator_main(json_string)
+
+        df = pd.read_csv(response)
+        assert df["name"].loc[0] == "***"
+        assert df["email"].loc[0] == "***"
+        assert df["id"].loc[0] == "***"
+        assert len(df["name"]) == 2
+
+    @mock_aws
+    def test_full_cycle_streaming(self, s3_data):
+        payload = json.loads(s3_data)
+        payload["streaming"] = True
+        payload["chunk_size"] = 1
+
+        response = obfuscator_main(json.dumps(payload))
+
+        content = response.getvalue().decode("utf-8")
+        df = pd.read_csv(io.StringIO(content))
+        assert content.count("id,name,age,email") == 1
+        assert df["name"].loc[1] == "***"
+        assert df["email"].loc[0] == "***"
+        assert df["age"].loc[1] == 30
+        assert len(df["name"]) == 2
+
+    @mock_aws
+    def test_full_cycle_stages(self, s3_data):
+        records = []
+
+        response = obfuscator_main(s3_data, on_stage=records.append)
+
+        assert pd.read_csv(response)["name"].loc[0] == "***"
+        stages = {record["stage"]: record for record in records}
+        assert list(stages) == [
+            "get_file_content",
+            "file_to_df",
+            "redact_pii",
+            "to_byte_stream",
+        ]
+        assert all(record["ok"] for record in records)
+        assert all(record["wall_seconds"] >= 0 for record in records)
+        assert stages["file_to_df"]["bytes_in"] == len(
+            "id,name,age,email\r\n1,James,25,hello@122\r\n"
+            "2,Hamoud,30,hioo@as\r\n"
+        )
+        assert stages["file_to_df"]["rows_out"] == 2
+        assert stages["redact_pii"]["rows_in"] == 2
+        assert stages["to_byte_stream"]["bytes_out"] == len(
+            response.getvalue()
+        )
+
+    @mock_aws
+    def test_full_cycle_schema(self, aws_credentials):
+        s3 = boto3.client("s3")
+        s3.create_bucket(
+            Bucket="test",
+            CreateBucketConfiguration={
+                "LocationConstraint": "eu-west-2",
+            },
+        )
+        content = (
+            "id,name,zip,score,note\n"
+            "007,James,01234,1.10,NA\n"
+            "010,Sam,,2,\n"
+        )
+        s3.put_object(Body=content, Bucket="test", Key="in/test.csv")
+        expected = content.replace("James", "***").replace("Sam", "***")
+
+        for options in ({}, {"streaming": True, "chunk_size": 1}):
+            payload = {
+                "file_to_obfuscate": "s3://test/in/test.csv",
+                "pii_fields": ["name"],
+                "schema": "string",
+                **options,
+            }
+
+            response = obfuscator_main(json.dumps(payload))
+
+            assert response.getvalue().decode() == expected
+
+    @mock_aws
+    def test_full_cycle_cached_schema(self, aws_credentials):
+        s3 = boto3.client("s3")
+        s3.create_bucket(
+            Bucket="test",
+            CreateBucketConfiguration={
+                "LocationConstraint": "eu-west-2",
+            },
+        )
+        for i in range(5):
+            df = pd.DataFrame(
+                {
+                    "id": [i, i + 10],
+                    "name": [fake.name()] * 2,
+                    "code": ["a1" if i == 0 else f"0{i}", "b2"],
+                }
+            )
+            s3.put_object(
+                Body=df.to_csv(index=False), Bucket="test", Key=f"in/{i}.csv"
+            )
+
+        payloads = [
+            {
+                "file_to_obfuscate": f"s3://test/in/{i}.csv",
+                "pii_fields": ["name"],
+                "schema": "cached",
+            }
+            for i in range(5)
+        ]
+
+        response = obfuscate_batch(payloads, max_workers=1)
+
+        # the codes of the first file were text so "03" stays "03"
+        outputs = [r["output"].getvalue() for r in response["results"]]
+        assert outputs[0] == b"id,name,code\n0,***,a1\n10,***,b2\n"
+        assert outputs[3] == b"id,name,code\n3,***,03\n13,***,b2\n"
+        assert get_schema_cache().stats() == {
+            "entries": 1,
+            "hits": 4,
+            "misses": 1,
+            "invalidations": 0,
+            "hit_rate": 0.8,
+        }
+
+    @mock_aws
+    def test_full_cycle_result_cache(self, aws_credentials, tmp_path):
+        configure_result_cache(str(tmp_path))
+        s3 = boto3.client("s3")
+        s3.create_bucket(
+            Bucket="test",
+            CreateBucketConfiguration={
+                "LocationConstraint": "eu-west-2",
+            },
+        )
+        s3.put_object(Body="id,name\n1,James\n", Bucket="test", Key="a.csv")
+        payload = {"file_to_obfuscate": "s3://test/a.csv", "pii_fields": []}
+
+        def run(**options):
+            records = []
+            response = obfuscator_main(
+                json.dumps({**payload, **options}), records.append
+            )
+            return response, [record["stage"] for record in records]
+
+        first, _ = run(pii_fields=["name"])
+        second, stages = run(pii_fields=["name", "name"])
+
+        assert first.getvalue() == b"id,name\n1,***\n"
+        assert second.getvalue() == first.getvalue()
+        # answered by the conditional GET alone
+        assert stages == ["get_file_content"]
+
+        run(pii_fields=["name"], cache=False)
+        run(pii_fields=["name"], destination="s3://test/out/a.csv")
+        s3.put_object(Body="id,name\n2,Sam\n", Bucket="test", Key="a.csv")
+        changed, _ = run(pii_fields=["name"])
+
+        assert changed.getvalue() == b"id,name\n2,***\n"
+        assert get_result_cache().stats() == {
+            "entries": 1,
+            "bytes": 14,
+            "hits": 1,
+            "misses": 2,
+            "evictions": 0,
+            "hit_rate": 1 / 3,
+        }
+
+    @mock_aws
+    def test_full_cycle_streaming_stages(self, s3_data):
+        payload = json.loads(s3_data)
+        payload["streaming"] = True
+        payload["chunk_size"] = 1
+        records = []
+
+        response = obfuscator_main(json.dumps(payload), records.append)
+
+        stages = {record["stage"]: record for record in records}
+        assert list(stages) == [
+            "get_file_content",
+            "file_to_chunks",
+            "redact_pii",
+            "chunks_to_byte_stream",
+        ]
+        assert stages["file_to_chunks"]["rows_out"] == 2
+        assert stages["file_to_chunks"]["bytes_in"] > 0
+        assert stages["redact_pii"]["rows_out"] == 2
+        assert stages["chunks_to_byte_stream"]["rows_in"] == 2
+        assert stages["chunks_to_byte_stream"]["bytes_out"] == len(
+            response.getvalue()
+        )
+
+    @mock_aws
+    def test_full_cycle_streaming_parquet(self, aws_credentials):
+        s3 = boto3.client("s3")
+        s3.create_bucket(
+            Bucket="test",
+            CreateBucketConfiguration={
+                "LocationConstraint": "eu-west-2",
+            },
+        )
+
+        df = pd.DataFrame(
+            {"id": range(6), "name": [fake.name() for _ in range(6)]}
+        )
+        buffer = io.BytesIO()
+        df.to_parquet(buffer, index=False, row_group_size=4)
+        s3.put_object(
+            Body=buffer.getvalue(), Bucket="test", Key="data/test.parquet"
+        )
+
+        payload = {
+            "file_to_obfuscate": "s3://test/data/test.parquet",
+            "pii_fields": ["name"],
+            "streaming": True,
+        }
+
+        response = obfuscator_main(json.dumps(payload))
+
+        parquet_file = pq.ParquetFile(response)
+        result = parquet_file.read().to_pandas()
+        assert parquet_file.num_row_groups == 2
+        assert list(result["id"]) == list(range(6))
+        assert (result["name"] == "***").all()
+
+    @mock_aws
+    def test_full_cycle_streaming_parquet_null_row_group(
+        self, aws_credentials
+    ):
+        s3 = boto3.client("s3")
+        s3.create_bucket(
+            Bucket="test",
+            CreateBucketConfiguration={
+                "LocationConstraint": "eu-west-2",
+            },
+        )
+
+        # note and email only hold nulls in the first row group
+        df = pd.DataFrame(
+            {
+                "id": range(6),
+                "note": [None] * 4 + ["a", "b"],
+                "email": [None] * 4 + ["x@mail.com", "y@mail.com"],
+            }
+        )
+        buffer = io.BytesIO()
+        df.to_parquet(buffer, index=False, row_group_size=4)
+        s3.put_object(
+            Body=buffer.getvalue(), Bucket="test", Key="data/test.parquet"
+        )
+
+        payload = {
+            "file_to_obfuscate": "s3://test/data/test.parquet",
+            "pii_fields": [{"field": "email", "strategy": "email_domain"}],
+            "streaming": True,
+        }
+
+        response = obfuscator_main(json.dumps(payload))
+
+        parquet_file = pq.ParquetFile(response)
+        result = parquet_file.read().to_pandas()
+        assert parquet_file.num_row_groups == 2
+        assert parquet_file.schema_arrow.field("note").type == pa.string()
+        assert list(result["note"]) == [None] * 4 + ["a", "b"]
+        assert list(result["email"]) == [None] * 4 + ["***@mail.com"] * 2
+
+    @mock_aws
+    def test_full_cycle_parquet_keeps_column_order(self, aws_credentials):
+        s3 = boto3.client("s3")
+        s3.create_bucket(
+            Bucket="test",
+            CreateBucketConfiguration={
+                "LocationConstraint": "eu-west-2",
+            },
+        )
+
+        df = pd.DataFrame(
+            {
+                "id": [1, 2],
+                "name": ["James", "Hamoud"],
+                "age": [25, 30],
+                "email": ["hello@122", "hioo@as"],
+            }
+        )
+        buffer = io.BytesIO()
+        df.to_parquet(buffer, index=False)
+        s3.put_object(
+            Body=buffer.getvalue(), Bucket="test", Key="data/test.parquet"
+        )
+
+        payload = {
+            "file_to_obfuscate": "s3://test/data/test.parquet",
+            "pii_fields": ["name", "email"],
+        }
+
+        response = obfuscator_main(json.dumps(payload))
+
+        result = pd.read_parquet(response)
+        assert list(result.columns) == ["id", "name", "age", "email"]
+        assert list(result["name"]) == ["***", "***"]
+        assert list(result["age"]) == [25, 30]
+
+    @mock_aws
+    def test_arrow_engine_matches_pandas(self, aws_credentials):
+        s3 = boto3.client("s3")
+        s3.create_bucket(
+            Bucket="test",
+            CreateBucketConfiguration={
+                "LocationConstraint": "eu-west-2",
+            },
+        )
+
+        df = pd.DataFrame(
+            {
+                "id": range(1, 21),
+                "name": [fake.name() for _ in range(20)],
+                "score": [1.5, None] * 10,
+                "active": [True, False] * 10,
+                "email": [fake.email() for _ in range(20)],
+                "dob": ["1990-01-02", "2001-12-31T08:30:00"] * 10,
+                "zip": ["007", "010"] * 10,
+                "created_at": ["2024-01-01", "2024-02-29T10:00:00"] * 10,
+                "modified": [1704067200000, 1709200800000] * 10,
+                "total": [2.0, 3.0] * 10,
+            }
+        )
+        # a key only some records have
+        records = json.loads(df.to_json(orient="records"))
+        records[3]["extra"] = "keep"
+        s3.put_object(
+            Body=df.to_csv(index=False), Bucket="test", Key="data/test.csv"
+        )
+        s3.put_object(
+            Body=json.dumps(records), Bucket="test", Key="data/test.json"
+        )
+        s3.put_object(
+            Body="\n".join(map(json.dumps, records)),
+            Bucket="test",
+            Key="data/test.jsonl",
+        )
+        s3.put_object(
+            Body=df.to_parquet(index=False),
+            Bucket="test",
+            Key="data/test.parquet",
+        )
+
+        for key in (
+            "data/test.csv",
+            "data/test.json",
+            "data/test.jsonl",
+            "data/test.parquet",
+        ):
+            payload = {
+                "file_to_obfuscate": f"s3://test/{key}",
+                "pii_fields": ["name", "email"],
+            }
+            pandas_output = obfuscator_main(json.dumps(payload))
+
+            payload["engine"] = "arrow"
+            arrow_output = obfuscator_main(json.dumps(payload))
+
+            if key.endswith("parquet"):
+                assert pd.read_parquet(arrow_output).equals(
+                    pd.read_parquet(pandas_output)
+                )
+            else:
+                assert arrow_output.getvalue() == pandas_output.getvalue()
+            if key.endswith(("json", "jsonl")):
+                assert b'"extra":"keep"' in arrow_output.getvalue()
+                assert b'"dob":"1990-01-02"' in arrow_output.getvalue()
+                # typed as pandas reads json: numbers, ints and dates
+                assert b'"zip":7,' in arrow_output.getvalue()
+                assert b'"created_at":1704067200000' in arrow_output.getvalue()
+                assert b'"modified":1704067200000' in arrow_output.getvalue()
+                assert b'"total":2,' in arrow_output.getvalue()
+
+    @mock_aws
+    def test_full_cycle_tokens(self, aws_credentials, tmp_path):
+        configure_token_key("secret")
+        configure_result_cache(str(tmp_path))
+        s3 = boto3.client("s3")
+        s3.create_bucket(
+            Bucket="test",
+            CreateBucketConfiguration={
+                "LocationConstraint": "eu-west-2",
+            },
+        )
+        names = [fake.name() for _ in range(3)]
+        df = pd.DataFrame({"id": range(6), "name": names * 2})
+        s3.put_object(
+            Body=df.to_csv(index=False), Bucket="test", Key="data/test.csv"
+        )
+        s3.put_object(
+            Body=df.to_parquet(index=False),
+            Bucket="test",
+            Key="data/test.parquet",
+        )
+        expected = Tokenizer(b"secret").tokens(names * 2)
+
+        for key in ("data/test.csv", "data/test.parquet"):
+            for options in (
+                {},
+                {"streaming": True, "chunk_size": 2},
+                {"engine": "arrow"},
+                {"processes": 2, "cache": False},
+            ):
+                if "processes" in options and key.endswith("parquet"):
+                    continue
+                payload = {
+                    "file_to_obfuscate": f"s3://test/{key}",
+                    "pii_fields": ["name"],
+                    "redaction": "token",
+                    **options,
+                }
+
+                response = obfuscator_main(json.dumps(payload))
+
+                if key.endswith("csv"):
+                    output = pd.read_csv(response)
+                else:
+                    output = pd.read_parquet(response)
+                assert list(output["name"]) == expected
+                assert list(output["id"]) == list(range(6))
+
+        # a new key makes new tokens instead of reusing the cached ones
+        configure_token_key("rotated")
+        payload = {
+            "file_to_obfuscate": "s3://test/data/test.csv",
+            "pii_fields": ["name"],
+            "redaction": "token",
+        }
+
+        response = obfuscator_main(json.dumps(payload))
+
+        rotated = Tokenizer(b"rotated").tokens(names * 2)
+        assert list(pd.read_csv(response)["name"]) == rotated
+
+    @mock_aws
+    def test_full_cycle_tokens_with_nulls(self, aws_credentials):
+        configure_token_key("secret")
+        s3 = boto3.client("s3")
+        s3.create_bucket(
+            Bucket="test",
+            CreateBucketConfiguration={
+                "LocationConstraint": "eu-west-2",
+            },
+        )
+        # the gap makes pandas read the ids of this file as floats
+        s3.put_object(
+            Body="id,name\n42,a\n,b\n7,c\n8,d\n",
+            Bucket="test",
+            Key="data/gap.csv",
+        )
+        s3.put_object(
+            Body="id,name\n42,a\n7,c\n8,d\n",
+            Bucket="test",
+            Key="data/full.csv",
+        )
+        token = dict(
+            zip(["42", "7", "8"], Tokenizer(b"secret").tokens([42, 7, 8]))
+        )
+
+        for key, ids in (
+            ("data/gap.csv", ["42", None, "7", "8"]),
+            ("data/full.csv", ["42", "7", "8"]),
+        ):
+            for options in (
+                {},
+                {"streaming": True, "chunk_size": 2},
+                {"engine": "arrow"},
+            ):
+                payload = {
+                    "file_to_obfuscate": f"s3://test/{key}",
+                    "pii_fields": [{"field": "id", "strategy": "token"}],
+                    **options,
+                }
+
+                response = obfuscator_main(json.dumps(payload))
+
+                output = pd.read_csv(response, dtype=str)
+                output = output.astype(object).where(output.notna(), None)
+                assert list(output["id"]) == [
+                    None if id is None else token[id] for id in ids
+                ]
+
+    @mock_aws
+    def test_full_cycle_mixed_types(self, aws_credentials):
+        s3 = boto3.client("s3")
+        s3.create_bucket(
+            Bucket="test",
+            CreateBucketConfiguration={
+                "LocationConstraint": "eu-west-2",
+            },
+        )
+        records = [
+            {"id": 1, "phone": 7700900123},
+            {"id": 2, "phone": "07700 900456"},
+            {"id": 3, "phone": None},
+        ]
+        s3.put_object(
+            Body=json.dumps(records), Bucket="test", Key="data/test.json"
+        )
+
+        for options in ({}, {"streaming": True, "chunk_size": 2}):
+            payload = {
+                "file_to_obfuscate": "s3://test/data/test.json",
+                "pii_fields": [{"field": "phone", "strategy": "last_digits"}],
+                **options,
+            }
+
+            response = obfuscator_main(json.dumps(payload))
+
+            output = json.loads(response.getvalue())
+            assert [record["phone"] for record in output] == [
+                "***0123",
+                "***0456",
+                None,
+            ]
+
+    @mock_aws
+    def test_full_cycle_strategies(self, aws_credentials):
+        configure_token_key("secret")
+        s3 = boto3.client("s3")
+        s3.create_bucket(
+            Bucket="test",
+            CreateBucketConfiguration={
+                "LocationConstraint": "eu-west-2",
+            },
+        )
+        df = pd.DataFrame(
+            {
+                "id": range(4),
+                "name": ["Ann", "Bob", "Ann", None],
+                "email": ["ann@a.com", "bob@b.org", "x", None],
+                "phone": ["+44 7700 900123", "555-0199", "12", None],
+                "postcode": ["SW1A 1AA", "EC1A 1BB", "N1", None],
+            }
+        )
+        s3.put_object(
+            Body=df.to_csv(index=False), Bucket="test", Key="data/test.csv"
+        )
+        s3.put_object(
+            Body=df.to_parquet(index=False),
+            Bucket="test",
+            Key="data/test.parquet",
+        )
+        pii_fields = [
+            "id",
+            {"field": "name", "strategy": "token"},
+            {"field": "email", "strategy": "email_domain"},
+            {"field": "phone", "strategy": "last_digits"},
+            {"field": "postcode", "strategy": "truncate", "keep": 4},
+        ]
+        token = Tokenizer(b"secret").tokens(["Ann", "Bob"])
+
+        for key in ("data/test.csv", "data/test.parquet"):
+            for options in (
+                {},
+                {"streaming": True, "chunk_size": 2},
+                {"engine": "arrow"},
+                {"processes": 2},
+            ):
+                if "processes" in options and key.endswith("parquet"):
+                    continue
+                payload = {
+                    "file_to_obfuscate": f"s3://test/{key}",
+                    "pii_fields": pii_fields,
+                    **options,
+                }
+
+                response = obfuscator_main(json.dumps(payload))
+
+                if key.endswith("csv"):
+                    output = pd.read_csv(response, dtype=str)
+                else:
+                    output = pd.read_parquet(response)
+                output = output.astype(object).where(output.notna(), None)
+                assert list(output["id"]) == ["***"] * 4
+                assert list(output["name"]) == [
+                    token[0],
+                    token[1],
+                    token[0],
+                    None,
+                ]
+                assert list(output["email"]) == [
+                    "***@a.com",
+                    "***@b.org",
+                    "***",
+                    None,
+                ]
+                assert list(output["phone"]) == [
+                    "***0123",
+                    "***0199",
+                    "***",
+                    None,
+                ]
+                assert list(output["postcode"]) == [
+                    "SW1A***",
+                    "EC1A***",
+                    "***",
+                    None,
+                ]
+
+    @mock_aws
+    def test_full_cycle_nested_paths(self, aws_credentials):
+        s3 = boto3.client("s3")
+        s3.create_bucket(
+            Bucket="test",
+            CreateBucketConfiguration={
+                "LocationConstraint": "eu-west-2",
+            },
+        )
+        records = [
+            {
+                "id": i,
+                "customer": {
+                    "name": fake.name(),
+                    "address": {"street": fake.street_address(), "city": "X"},
+                },
+                "contacts": [{"email": fake.email(), "type": "work"}],
+            }
+            for i in range(5)
+        ]
+        s3.put_object(
+            Body=json.dumps(records), Bucket="test", Key="data/test.json"
+        )
+        s3.put_object(
+            Body="\n".join(map(json.dumps, records)),
+            Bucket="test",
+            Key="data/test.jsonl",
+        )
+        expected = [
+            {
+                "id": "***",
+                "customer": {
+                    "name": record["customer"]["name"],
+                    "address": {"street": "***", "city": "X"},
+                },
+                "contacts": [{"email": "***", "type": "work"}],
+            }
+            for record in records
+        ]
+
+        for key in ("data/test.json", "data/test.jsonl"):
+            for options in ({}, {"streaming": True, "chunk_size": 2}):
+                payload = {
+                    "file_to_obfuscate": f"s3://test/{key}",
+                    "pii_fields": [
+                        "id",
+                        "customer.address.street",
+                        "contacts[*].email",
+                    ],
+                    **options,
+                }
+
+                response = obfuscator_main(json.dumps(payload))
+
+                if key.endswith("jsonl"):
+                    output = [
+                        json.loads(line)
+                        for line in response.getvalue().splitlines()
+                    ]
+                else:
+                    output = json.loads(response.getvalue())
+                assert output == expected
+
+    @mock_aws
+    def test_full_cycle_empty_json_lines(self, aws_credentials):
+        s3 = boto3.client("s3")
+        s3.create_bucket(
+            Bucket="test",
+            CreateBucketConfiguration={
+                "LocationConstraint": "eu-west-2",
+            },
+        )
+        s3.put_object(Body=b"", Bucket="test", Key="data/test.jsonl")
+
+        for options in ({}, {"streaming": True}, {"engine": "arrow"}):
+            payload = {
+                "file_to_obfuscate": "s3://test/data/test.jsonl",
+                "pii_fields": ["email"],
+                **options,
+            }
+
+            response = obfuscator_main(json.dumps(payload))
+
+            assert response.getvalue() == b""
+
+    @mock_aws
+    def test_full_cycle_dotted_flat_key(self, aws_credentials):
+        s3 = boto3.client("s3")
+        s3.create_bucket(
+            Bucket="test",
+            CreateBucketConfiguration={
+                "LocationConstraint": "eu-west-2",
+            },
+        )
+        records = [{"user.email": "a@b.com", "id": 1}]
+        s3.put_object(
+            Body=json.dumps(records), Bucket="test", Key="data/test.json"
+        )
+        s3.put_object(
+            Body=json.dumps(records[0]), Bucket="test", Key="data/test.jsonl"
+        )
+
+        for key in ("data/test.json", "data/test.jsonl"):
+            for options in ({}, {"streaming": True}):
+                payload = {
+                    "file_to_obfuscate": f"s3://test/{key}",
+                    "pii_fields": ["user.email"],
+                    **options,
+                }
+
+                response = obfuscator_main(json.dumps(payload))
+
+                if key.endswith("jsonl"):
+                    output = [json.loads(response.getvalue())]
+                else:
+                    output = json.loads(response.getvalue())
+                assert output == [{"user.email": "***", "id": 1}]
+
+    @mock_aws
+    def test_full_cycle_compact(self, aws_credentials):
+        s3 = boto3.client("s3")
+        s3.create_bucket(
+            Bucket="test",
+            CreateBucketConfiguration={
+                "LocationConstraint": "eu-west-2",
+            },
+        )
+        df = pd.DataFrame(
+            {
+                "id": range(4),
+                "name": [fake.name() for _ in range(4)],
+                "score": [1.5, 2.5, None, 4.0],
+                "joined": pd.to_datetime(["2024-01-01"] * 4),
+            }
+        )
+        s3.put_object(
+            Body=df.to_csv(index=False), Bucket="test", Key="data/test.csv"
+        )
+        s3.put_object(
+            Body=df.to_parquet(index=False),
+            Bucket="test",
+            Key="data/test.parquet",
+        )
+        csv_outputs = []
+
+        for options in (
+            {},
+            {"streaming": True, "chunk_size": 2},
+            {"engine": "arrow"},
+        ):
+            payload = {
+                "pii_fields": ["name", "score", "joined"],
+                "redaction": "compact",
+                **options,
+            }
+
+            response = obfuscator_main(
+                json.dumps(
+                    {"file_to_obfuscate": "s3://test/data/test.csv", **payload}
+                )
+            )
+            csv_outputs.append(response.getvalue())
+
+            response = obfuscator_main(
+                json.dumps(
+                    {
+                        "file_to_obfuscate": "s3://test/data/test.parquet",
+                        **payload,
+                    }
+                )
+            )
+            schema = pq.read_schema(response)
+            assert str(schema.field("name").type) == (
+                "dictionary<values=string, indices=int8, ordered=0>"
+            )
+            assert schema.field("score").type == "double"
+            assert schema.field("joined").type == "timestamp[ns]"
+            output = pd.read_parquet(response)
+            assert list(output["id"]) == list(range(4))
+            assert list(output["name"]) == ["***"] * 4
+            assert output["score"].isna().all()
+            assert output["joined"].isna().all()
+
+        # pandas reads the csv dates as text, arrow as timestamps
+        assert csv_outputs[0] == csv_outputs[1]
+        assert csv_outputs[0].decode().splitlines() == [
+            "id,name,score,joined",
+            "0,***,,***",
+            "1,***,,***",
+            "2,***,,***",
+            "3,***,,***",
+        ]
+        assert csv_outputs[2].decode().splitlines() == [
+            "id,name,score,joined",
+            "0,***,,",
+            "1,***,,",
+            "2,***,,",
+            "3,***,,",
+        ]
+
+    @mock_aws
+    def test_full_cycle_bytes_engine(self, s3_data):
+        payload = json.loads(s3_data)
+        payload["engine"] = "bytes"
+
+        response = obfuscator_main(json.dumps(payload))
+
+        assert response.getvalue() == (
+            b"id,name,age,email\r\n***,***,25,***\r\n***,***,30,***\r\n"
+        )
+
+    @mock_aws
+    def test_full_cycle_processes(self, s3_data):
+        payload = json.loads(s3_data)
+        payload["processes"] = 2
+
+        response = obfuscator_main(json.dumps(payload))
+
+        df = pd.read_csv(response)
+        assert list(df["name"]) == ["***", "***"]
+        assert list(df["age"]) == [25, 30]
+
+    @mock_aws
+    def test_full_cycle_json_lines(self, aws_credentials):
+        s3 = boto3.client("s3")
+        s3.create_bucket(
+            Bucket="test",
+            CreateBucketConfiguration={
+                "LocationConstraint": "eu-west-2",
+            },
+        )
+
+        records = [
+            {"id": i, "name": fake.name(), "email": fake.email()}
+            for i in range(5)
+        ]
+        s3.put_object(
+            Body="\n".join(json.dumps(record) for record in records),
+            Bucket="test",
+            Key="events/test.jsonl",
+        )
+
+        for options in ({}, {"streaming": True, "chunk_size": 2}):
+            payload = {
+                "file_to_obfuscate": "s3://test/events/test.jsonl",
+                "pii_fields": ["name", "email"],
+                **options,
+            }
+
+            response = obfuscator_main(json.dumps(payload))
+
+            lines = response.getvalue().decode("utf-8").splitlines()
+            assert [json.loads(line) for line in lines] == [
+                {"id": i, "name": "***", "email": "***"} for i in range(5)
+            ]
+
+    @mock_aws
+    def test_full_cycle_streaming_json(self, aws_credentials):
+        s3 = boto3.client("s3")
+        s3.create_bucket(
+            Bucket="test",
+            CreateBucketConfiguration={
+                "LocationConstraint": "eu-west-2",
+            },
+        )
+
+        records = [
+            {"id": i, "name": fake.name(), "email": fake.email()}
+            for i in range(5)
+        ]
+        s3.put_object(
+            Body=json.dumps(records),
+            Bucket="test",
+            Key="events/test.json",
+        )
+
+        payload = {
+            "file_to_obfuscate": "s3://test/events/test.json",
+            "pii_fields": ["name", "email"],
+            "streaming": True,
+            "chunk_size": 2,
+        }
+
+        response = obfuscator_main(json.dumps(payload))
+
+        assert json.loads(response.getvalue()) == [
+            {"id": i, "name": "***", "email": "***"} for i in range(5)
+        ]
+
+    def test_full_cycle_to_destination(self, aws_credentials, monkeypatch):
+        # lets moto accept parts smaller than the 5 MB s3 minimum
+        monkeypatch.setattr("moto.s3.models.S3_UPLOAD_PART_MIN_SIZE", 256)
+        monkeypatch.setattr("utils.s3_multipart_writer.PART_SIZE", 1024)
+
+        with mock_aws():
+            s3 = boto3.client("s3")
+            s3.create_bucket(
+                Bucket="test",
+                CreateBucketConfiguration={
+                    "LocationConstraint": "eu-west-2",
+                },
+            )
+
+            df = pd.DataFrame(
+                {
+                    "id": range(200),
+                    "name": [fake.name() for _ in range(200)],
+                    "email": [fake.email() for _ in range(200)],
+                }
+            )
+            s3.put_object(
+                Body=df.to_csv(index=False), Bucket="test", Key="in/test.csv"
+            )
+
+            payload = {
+                "file_to_obfuscate": "s3://test/in/test.csv",
+                "pii_fields": ["name", "email"],
+            }
+            expected = obfuscator_main(json.dumps(payload)).getvalue()
+
+            for options in ({}, {"streaming": True, "chunk_size": 16}):
+                destination = {"destination": "s3://test/out/test.csv"}
+                records = []
+
+                response = obfuscator_main(
+                    json.dumps({**payload, **options, **destination}),
+                    records.append,
+                )
+
+                assert response == {
+                    "status": 200,
+                    "destination": "s3://test/out/test.csv",
+                }
+                output = s3.get_object(Bucket="test", Key="out/test.csv")
+                assert output["Body"].read() == expected
+                assert "-" in output["ETag"]
+                assert records[-1]["stage"] == "upload"
+                assert records[-1]["bytes_out"] == len(expected)
+
+    @mock_aws
+    def test_full_cycle_ranged_get(self, s3_data, monkeypatch):
+        monkeypatch.setattr("utils.get_file_content.RANGED_MIN_SIZE", 1)
+        monkeypatch.setattr("utils.ranged_stream.PART_SIZE", 16)
+
+        payload = json.loads(s3_data)
+        expected = obfuscator_main(json.dumps(payload)).getvalue()
+
+        payload["ranged_get"] = True
+
+        response = obfuscator_main(json.dumps(payload))
+
+        assert response.getvalue() == expected
+
+    @mock_aws
+    def test_full_cycle_batch(self, aws_credentials):
+        s3 = boto3.client("s3")
+        s3.create_bucket(
+            Bucket="test",
+            CreateBucketConfiguration={
+                "LocationConstraint": "eu-west-2",
+            },
+        )
+
+        payloads = []
+        for i in range(10):
+            df = pd.DataFrame({"id": [i], "name": [fake.name()]})
+            s3.put_object(
+                Body=df.to_csv(index=False), Bucket="test", Key=f"in/{i}.csv"
+            )
+            payloads.append(
+                {
+                    "file_to_obfuscate": f"s3://test/in/{i}.csv",
+                    "pii_fields": ["name"],
+                }
+            )
+        payloads.append(
+            {"file_to_obfuscate": "s3://test/in/missing.csv", "pii_fields": []}
+        )
+
+        response = obfuscate_batch(payloads, max_workers=4)
+
+        assert response["succeeded"] == 10
+        assert response["failed"] == 1
+        for i, result in enumerate(response["results"][:10]):
+            expected = f"id,name\n{i},***\n".encode()
+            assert result["output"].getvalue() == expected
+        assert response["results"][10]["status"] == 400
+
+    @mock_aws
+    def test_full_cycle_async(self, aws_credentials):
+        s3 = boto3.client("s3")
+        s3.create_bucket(
+            Bucket="test",
+            CreateBucketConfiguration={
+                "LocationConstraint": "eu-west-2",
+            },
+        )
+
+        payloads = []
+        for i in range(20):
+            df = pd.DataFrame({"id": [i], "name": [fake.name()]})
+            s3.put_object(
+                Body=df.to_csv(index=False), Bucket="test", Key=f"in/{i}.csv"
+            )
+            payloads.append(
+                json.dumps(
+                    {
+                        "file_to_obfuscate": f"s3://test/in/{i}.csv",
+                        "pii_fields": ["name"],
+                    }
+                )
+            )
+
+        async def run():
+            return await asyncio.gather(
+                *(obfuscator_main_async(payload) for payload in payloads)
+            )
+
+        try:
+            responses = asyncio.run(run())
+        finally:
+            shutdown_async_executor()
+
+        for i, response in enumerate(responses):
+            assert response.getvalue() == f"id,name\n{i},***\n".encode()
+
+    def test_full_cycle_async_moto_server(self, aws_credentials, monkeypatch):
+        server = pytest.importorskip("moto.server")
+        moto_server = server.ThreadedMotoServer(port=0)
+        moto_server.start()
+
+        try:
+            host, port = moto_server.get_host_and_port()
+            monkeypatch.setenv("AWS_ENDPOINT_URL", f"http://{host}:{port}")
+            reset_s3_client()
+
+            s3 = boto3.client("s3")
+            s3.create_bucket(
+                Bucket="test",
+                CreateBucketConfiguration={
+                    "LocationConstraint": "eu-west-2",
+                },
+            )
+            s3.put_object(
+                Body=b"id,name\n1,James\n", Bucket="test", Key="in/a.csv"
+            )
+            payload = json.dumps(
+                {
+                    "file_to_obfuscate": "s3://test/in/a.csv",
+                    "pii_fields": ["name"],
+                    "destination": "s3://test/out/a.csv",
+                }
+            )
+
+            response = asyncio.run(obfuscator_main_async(payload))
+
+            assert response == {
+                "status": 200,
+                "destination": "s3://test/out/a.csv",
+            }
+            output = s3.get_object(Bucket="test", Key="out/a.csv")
+            assert output["Body"].read() == b"id,name\n1,***\n"
+        finally:
+            shutdown_async_executor()
+            moto_server.stop()
+
+    @mock_aws
+    def test_full_cycle_prefix_and_manifest(self, aws_credentials):
+        s3 = boto3.client("s3")
+        for bucket in ("test", "out"):
+            s3.create_bucket(
+                Bucket=bucket,
+                CreateBucketConfiguration={
+                    "LocationConstraint": "eu-west-2",
+                },
+            )
+
+        keys = ["daily/a.csv", "daily/b.csv", "daily/sub/c.csv"]
+        for i, key in enumerate(keys):
+            s3.put_object(
+                Body=f"id,name\n{i},{fake.name()}\n",
+                Bucket="test",
+                Key=key,
+            )
+        s3.put_object(
+            Body="daily/a.csv\ns3://test/daily/sub/c.csv\n",
+            Bucket="test",
+            Key="manifest.txt",
+        )
+
+        payload = {
+            "prefix_to_obfuscate": "s3://test/daily/",
+            "destination": "s3://out/redacted/",
+            "pii_fields": ["name"],
+            "streaming": True,
+        }
+
+        response = obfuscator_main(json.dumps(payload))
+
+        assert response["status"] == 200
+        assert response["succeeded"] == 3
+        for i, key in enumerate(keys):
+            relative = key.removeprefix("daily/")
+            output = s3.get_object(Bucket="out", Key=f"redacted/{relative}")
+            assert output["Body"].read() == f"id,name\n{i},***\n".encode()
+
+        payload = {
+            "manifest": "s3://test/manifest.txt",
+            "destination": "s3://out/from_manifest",
+            "pii_fields": ["name"],
+        }
+
+        response = obfuscator_main(json.dumps(payload))
+
+        assert response["status"] == 200
+        assert [r["destination"] for r in response["results"]] == [
+            "s3://out/from_manifest/daily/a.csv",
+            "s3://out/from_manifest/daily/sub/c.csv",
+        ]
+        output = s3.get_object(
+            Bucket="out", Key="from_manifest/daily/sub/c.csv"
+        )
+        assert output["Body"].read() == b"id,name\n2,***\n"
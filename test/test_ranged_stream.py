@@ -0,0 +1,119 @@
+from utils.ranged_stream import RangedStream
+import io
+import os
+import pytest
+from unittest.mock import MagicMock
+import boto3
+from botocore.response import StreamingBody
+from moto import mock_aws
+import pandas as pd
+
+CONTENT = b"".join(f"{i},name_{i}\n".encode() for i in range(10_000))
+
+
+@pytest.fixture(scope="function")
+def s3():
+    """Mocked s3 holding CONTENT under test/data.csv"""
+    os.environ["AWS_ACCESS_KEY_ID"] = "testing"
+    os.environ["AWS_SECRET_ACCESS_KEY"] = "testing"
+    os.environ["AWS_SECURITY_TOKEN"] = "testing"
+    os.environ["AWS_SESSION_TOKEN"] = "testing"
+    os.environ["AWS_DEFAULT_REGION"] = "eu-west-2"
+
+    with mock_aws():
+        s3 = boto3.client("s3")
+        s3.create_bucket(
+            Bucket="test",
+            CreateBucketConfiguration={
+                "LocationConstraint": "eu-west-2",
+            },
+        )
+        s3.put_object(Bucket="test", Key="data.csv", Body=CONTENT)
+        yield s3
+
+
+def make_stream(s3, **kwargs):
+    head = s3.head_object(Bucket="test", Key="data.csv")
+    return RangedStream(
+        s3,
+        "test",
+        "data.csv",
+        head["ContentLength"],
+        etag=head["ETag"],
+        **kwargs,
+    )
+
+
+def test_read_all(s3):
+    stream = make_stream(s3, part_size=10_000, max_workers=4)
+
+    assert stream.read() == CONTENT
+    assert stream.read() == b""
+    assert stream.tell() == len(CONTENT)
+
+
+def test_reads_in_order_across_parts(s3):
+    stream = make_stream(s3, part_size=7_001, max_workers=3, read_ahead=2)
+
+    pieces = []
+    while piece := stream.read(4_096):
+        pieces.append(piece)
+
+    assert b"".join(pieces) == CONTENT
+    assert max(len(piece) for piece in pieces) == 4_096
+
+
+def test_readinto(s3):
+    stream = make_stream(s3, part_size=10_000)
+    buffer = bytearray(3)
+
+    assert stream.readinto(buffer) == 3
+    assert bytes(buffer) == CONTENT[:3]
+
+
+def test_pandas_reads_stream(s3):
+    stream = make_stream(s3, part_size=10_000)
+
+    df = pd.read_csv(stream, header=None, names=["id", "name"])
+
+    assert len(df) == 10_000
+    assert df["name"].loc[9_999] == "name_9999"
+
+
+def test_changed_object_fails(s3):
+    stream = make_stream(s3, part_size=10_000, read_ahead=1)
+    stream.read(5)
+
+    s3.put_object(Bucket="test", Key="data.csv", Body=CONTENT + b"more")
+
+    with pytest.raises(Exception, match="PreconditionFailed"):
+        stream.read()
+
+
+def test_read_ahead_is_bounded():
+    client = MagicMock()
+    client.get_object.side_effect = lambda **kwargs: {
+        "Body": StreamingBody(io.BytesIO(b"x" * 10), 10)
+    }
+
+    stream = RangedStream(client, "b", "k", 100, part_size=10, read_ahead=3)
+
+    # one part is being read and read_ahead more are queued
+    assert stream.read(1) == b"x"
+    stream.close()
+
+    ranges = {c.kwargs["Range"] for c in client.get_object.call_args_list}
+    assert ranges <= {"bytes=0-9", "bytes=10-19", "bytes=20-29", "bytes=30-39"}
+    assert "bytes=0-9" in ranges
+
+
+def test_short_range_raises():
+    client = MagicMock()
+    client.get_object.return_value = {
+        "Body": StreamingBody(io.BytesIO(b"xx"), 2)
+    }
+
+    stream = RangedStream(client, "b", "k", 10, part_size=5)
+
+    with pytest.raises(ValueError, match="Got 2 bytes for range 0-4"):
+        stream.read()
@@ -0,0 +1,125 @@
+from utils.redact_csv_bytes import redact_csv_bytes
+import io
+import csv
+from botocore.response import StreamingBody
+import pandas as pd
+import pytest
+import logging
+
+
+def make_body(body_bytes):
+    return StreamingBody(io.BytesIO(body_bytes), len(body_bytes))
+
+
+@pytest.fixture(scope="function")
+def small_blocks(monkeypatch):
+    # forcing records and quoted fields to be split across reads
+    monkeypatch.setattr("utils.redact_csv_bytes.BLOCK_SIZE", 3)
+
+
+def test_return_byte_stream():
+    response = redact_csv_bytes(make_body(b"id,name\n1,James\n"), ["name"])
+
+    assert isinstance(response, io.BytesIO)
+    assert response.read() == b"id,name\n1,***\n"
+
+
+def test_non_pii_bytes_unchanged():
+    content = (
+        b"id,name,price,note\n"
+        b'007,James,1.50,"quoted, kept"\n'
+        b"008,Sam,,plain\n"
+    )
+
+    response = redact_csv_bytes(make_body(content), ["name"])
+
+    assert response.getvalue() == (
+        b"id,name,price,note\n"
+        b'007,***,1.50,"quoted, kept"\n'
+        b"008,***,,plain\n"
+    )
+
+
+def test_quoted_fields_and_embedded_newlines(small_blocks):
+    content = (
+        b'id,"name",age,email\r\n'
+        b'1,"Smith, J",25,"a@b"\r\n'
+        b'2,"multi\nline ""x""",30,c@d\r\n'
+        b"3,Bob,40,e@f"
+    )
+
+    response = redact_csv_bytes(make_body(content), ["name", "email"])
+
+    assert response.getvalue() == (
+        b'id,"name",age,email\r\n'
+        b"1,***,25,***\r\n"
+        b"2,***,30,***\r\n"
+        b"3,***,40,***"
+    )
+
+
+def test_matches_csv_module(small_blocks):
+    rows = [["id", "name", "note"]] + [
+        [str(i), f'name "{i}"\n, x', f"note,{i}"] for i in range(20)
+    ]
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+
+    response = redact_csv_bytes(
+        make_body(buffer.getvalue().encode("utf-8")), ["name"]
+    )
+
+    df = pd.read_csv(response)
+    assert (df["name"] == "***").all()
+    assert list(df["note"]) == [f"note,{i}" for i in range(20)]
+
+
+def test_blank_lines_and_short_rows_are_kept():
+    content = b"id,name,age\n1,James,25\n\n2\n3,Sam,40,extra\n"
+
+    response = redact_csv_bytes(make_body(content), ["name"])
+
+    assert response.getvalue() == (
+        b"id,name,age\n1,***,25\n\n2\n3,***,40,extra\n"
+    )
+
+
+def test_column_not_found(caplog):
+    caplog.set_level(logging.INFO)
+
+    response = redact_csv_bytes(make_body(b"id\n1\n"), ["Not"])
+
+    assert response.getvalue() == b"id\n1\n"
+    assert "pii field: Not was not found" in caplog.text
+
+
+def test_writes_into_provided_output():
+    output = io.BytesIO()
+
+    response = redact_csv_bytes(make_body(b"id,name\n1,a\n"), ["name"], output)
+
+    assert response is output
+    assert output.getvalue() == b"id,name\n1,***\n"
+
+
+def test_malformed_csv(caplog):
+    caplog.set_level(logging.ERROR)
+
+    response = redact_csv_bytes(
+        make_body(b'id,name\n1,"never closed\n'), ["name"]
+    )
+
+    assert response == None
+    assert "Something went wrong " in caplog.text
+
+
+def test_quoted_block_in_one_read():
+    content = b'1,"a\nb",2\n2,"x,""y""",3\n3,z,4\n' * 50
+
+    response = redact_csv_bytes(
+        make_body(b"id,name,age\n" + content), ["name"]
+    )
+
+    assert response.getvalue() == b"id,name,age\n" + (
+        b"1,***,2\n2,***,3\n3,***,4\n" * 50
+    )
@@ -1,13 +1,14 @@
 import pandas as pd
 import numpy as np
+import pyarrow as pa
 from faker import Faker
 import csv
 import io
 import pytest
 from utils.redact_pii import redact_pii
+from utils.tokenizer import Tokenizer
 import logging
 
-
 fake = Faker()
 
 
@@ -70,3 +71,127 @@ def test_column_not_found(create_data, caplog):
     reponse = redact_pii(df, ["Not"])
 
     assert "pii field: Not was not found" in caplog.text
+
+
+def test_restores_skipped_columns_in_place():
+    df = pd.DataFrame({"id": [1, 2], "age": [25, 30]})
+    df.attrs["source_columns"] = ["name", "id", "email", "age"]
+
+    reponse = redact_pii(df, ["name", "email"])
+
+    assert list(reponse.columns) == ["name", "id", "email", "age"]
+    assert list(reponse["name"]) == ["***", "***"]
+    assert list(reponse["email"]) == ["***", "***"]
+    assert list(reponse["age"]) == [25, 30]
+
+
+def test_skipped_columns_not_reported_missing(caplog):
+    df = pd.DataFrame({"id": [1, 2]})
+    df.attrs["source_columns"] = ["id", "name"]
+
+    caplog.set_level(logging.INFO)
+
+    redact_pii(df, ["name"])
+
+    assert "was not found" not in caplog.text
+
+
+def test_original_not_mutated(create_data):
+    df, pii_fields = create_data
+    names = df["name"].copy()
+
+    redact_pii(df, pii_fields)
+
+    assert df["name"].equals(names)
+
+
+def test_untouched_columns_not_copied(create_data):
+    df, pii_fields = create_data
+
+    reponse = redact_pii(df, pii_fields)
+
+    assert np.shares_memory(reponse["age"].values, df["age"].values)
+    assert np.shares_memory(reponse["course"].values, df["course"].values)
+
+
+def test_tokenizes_pii_fields(create_data):
+    df, pii_fields = create_data
+    tokenizer = Tokenizer(b"k")
+
+    token_fields = [
+        {"field": field, "strategy": "token"} for field in pii_fields
+    ]
+
+    response = redact_pii(df, token_fields, tokenizer)
+
+    for field in pii_fields:
+        assert list(response[field]) == tokenizer.tokens(list(df[field]))
+
+
+def test_strategy_per_field():
+    df = pd.DataFrame(
+        {
+            "name": ["James", "Sam"],
+            "email": ["james@mail.com", "sam@corp.org"],
+            "postcode": ["SW1A 1AA", "EC1A 1BB"],
+        }
+    )
+    pii_fields = [
+        "name",
+        {"field": "email", "strategy": "email_domain"},
+        {"field": "postcode", "strategy": "truncate", "keep": 4},
+    ]
+
+    response = redact_pii(df, pii_fields)
+
+    assert list(response["name"]) == ["***", "***"]
+    assert list(response["email"]) == ["***@mail.com", "***@corp.org"]
+    assert list(response["postcode"]) == ["SW1A***", "EC1A***"]
+    assert list(df["email"]) == ["james@mail.com", "sam@corp.org"]
+
+
+def test_token_field_needs_tokenizer(create_data):
+    df, _ = create_data
+
+    with pytest.raises(ValueError, match="No tokenizer for name"):
+        redact_pii(df, [{"field": "name", "strategy": "token"}])
+
+
+def test_compact_redaction():
+    df = pd.DataFrame(
+        {
+            "id": [1, 2],
+            "name": ["James", "Sam"],
+            "joined": pd.to_datetime(["2024-01-01", "2024-02-01"]),
+        }
+    )
+
+    response = redact_pii(
+        df,
+        [
+            {"field": field, "strategy": "compact"}
+            for field in ("id", "name", "joined")
+        ],
+    )
+
+    assert response.dtypes.astype(str).to_dict() == {
+        "id": "Int64",
+        "name": "category",
+        "joined": "datetime64[ns]",
+    }
+    assert response["id"].isna().all()
+    assert response["joined"].isna().all()
+    assert list(response["name"]) == ["***", "***"]
+    assert list(df["id"]) == [1, 2]
+
+
+def test_redacted_fields_leave_source_schema():
+    df = pd.DataFrame({"id": [1, 2], "name": ["a", "b"]})
+    df.attrs["source_schema"] = pa.schema(
+        [("id", pa.int64()), ("name", pa.string())]
+    )
+
+    redacted = redact_pii(df, ["name"])
+
+    assert redacted.attrs["source_schema"].names == ["id"]
+    assert df.attrs["source_schema"].names == ["id", "name"]
@@ -0,0 +1,114 @@
+import pyarrow as pa
+import pytest
+from utils.redact_table import redact_table
+from utils.tokenizer import Tokenizer
+import logging
+
+
+@pytest.fixture(scope="function")
+def create_data():
+    table = pa.table(
+        {
+            "id": [1, 2, 3],
+            "name": ["James", "Hamoud", "Sam"],
+            "age": [25, 30, 35],
+            "email": ["a@b", "c@d", "e@f"],
+        }
+    )
+
+    yield table, ["name", "email"]
+
+
+def test_redact_table(create_data):
+    table, pii_fields = create_data
+
+    response = redact_table(table, pii_fields)
+
+    assert response.column("name").to_pylist() == ["***"] * 3
+    assert response.column("email").to_pylist() == ["***"] * 3
+    assert response.column_names == ["id", "name", "age", "email"]
+
+
+def test_original_not_mutated(create_data):
+    table, pii_fields = create_data
+
+    redact_table(table, pii_fields)
+
+    assert table.column("name").to_pylist() == ["James", "Hamoud", "Sam"]
+
+
+def test_untouched_columns_shared(create_data):
+    table, pii_fields = create_data
+
+    response = redact_table(table, pii_fields)
+
+    assert response.column("age").chunk(0).buffers()[1].address == (
+        table.column("age").chunk(0).buffers()[1].address
+    )
+
+
+def test_replaces_placeholders(create_data):
+    table, _ = create_data
+    table = table.set_column(1, "name", pa.nulls(3))
+
+    response = redact_table(table, ["name"])
+
+    assert response.column("name").to_pylist() == ["***"] * 3
+
+
+def test_column_not_found(create_data, caplog):
+    table, _ = create_data
+
+    caplog.set_level(logging.INFO)
+
+    redact_table(table, ["Not"])
+
+    assert "pii field: Not was not found" in caplog.text
+
+
+def test_tokenizes_pii_fields(create_data):
+    table, pii_fields = create_data
+    tokenizer = Tokenizer(b"k")
+
+    token_fields = [
+        {"field": field, "strategy": "token"} for field in pii_fields
+    ]
+
+    response = redact_table(table, token_fields, tokenizer)
+
+    assert response.column("name").to_pylist() == tokenizer.tokens(
+        ["James", "Hamoud", "Sam"]
+    )
+    assert response.column("id").to_pylist() == [1, 2, 3]
+
+
+def test_strategy_per_field(create_data):
+    table, _ = create_data
+    pii_fields = [
+        "name",
+        {"field": "email", "strategy": "email_domain"},
+        {"field": "id", "strategy": "last_digits", "keep": 1},
+    ]
+
+    response = redact_table(table, pii_fields)
+
+    assert response.column("name").to_pylist() == ["***"] * 3
+    assert response.column("email").to_pylist() == ["***@b", "***@d", "***@f"]
+    assert response.column("id").to_pylist() == ["***"] * 3
+
+
+def test_compact_redaction(create_data):
+    table, _ = create_data
+    pii_fields = [
+        {"field": "name", "strategy": "compact"},
+        {"field": "age", "strategy": "compact"},
+    ]
+
+    response = redact_table(table, pii_fields)
+
+    assert response.schema.field("age").type == pa.int64()
+    assert response.column("age").null_count == 3
+    assert response.column("name").type == pa.dictionary(
+        pa.int8(), pa.string()
+    )
+    assert response.column("name").to_pylist() == ["***"] * 3
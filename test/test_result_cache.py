@@ -0,0 +1,151 @@
+from utils.result_cache import (
+    ResultCache,
+    configure_result_cache,
+    get_result_cache,
+    reset_result_cache,
+    result_key,
+)
+import os
+import logging
+import pytest
+
+PAYLOAD = {
+    "file_to_obfuscate": "s3://bucket/daily/a.csv",
+    "pii_fields": ["name", "email"],
+}
+
+
+def test_put_and_get(tmp_path):
+    cache = ResultCache(str(tmp_path))
+
+    cache.put("k", b"id,name\n1,***\n", '"e"', "v1")
+
+    assert cache.etag("k") == '"e"'
+    assert cache.get("k", '"e"') == b"id,name\n1,***\n"
+    assert cache.stats() == {
+        "entries": 1,
+        "bytes": 14,
+        "hits": 1,
+        "misses": 0,
+        "evictions": 0,
+        "hit_rate": 1.0,
+    }
+
+
+def test_other_etag_is_a_miss(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    cache.put("k", b"old", '"e1"')
+
+    assert cache.get("k", '"e2"') is None
+    assert cache.get("missing", '"e1"') is None
+
+    cache.miss()
+
+    assert cache.stats()["misses"] == 3
+    assert cache.stats()["hit_rate"] == 0.0
+
+
+def test_put_replaces_entry(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    cache.put("k", b"old", '"e1"')
+
+    cache.put("k", memoryview(b"newer"), '"e2"')
+
+    assert cache.get("k", '"e2"') == b"newer"
+    assert cache.stats()["bytes"] == 5
+    assert cache.stats()["entries"] == 1
+
+
+def test_least_recently_used_is_evicted(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=10)
+    cache.put("a", b"1234", '"e"')
+    cache.put("b", b"1234", '"e"')
+    cache.get("a", '"e"')
+
+    cache.put("c", b"1234", '"e"')
+
+    assert cache.etag("b") is None
+    assert not os.path.exists(tmp_path / "b.result")
+    assert cache.get("a", '"e"') == b"1234"
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] == 8
+
+
+@pytest.mark.parametrize("data, etag", [(b"12345678901", '"e"'), (b"1", None)])
+def test_output_not_kept(tmp_path, data, etag):
+    cache = ResultCache(str(tmp_path), max_bytes=10)
+
+    cache.put("k", data, etag)
+
+    assert cache.etag("k") is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_reloads_entries_from_disk(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=10)
+    cache.put("a", b"1234", '"e"')
+    cache.put("b", b"1234", '"e"')
+    os.utime(tmp_path / "a.result", (1, 1))
+
+    reloaded = ResultCache(str(tmp_path), max_bytes=10)
+    reloaded.put("c", b"1234", '"e"')
+
+    assert reloaded.etag("a") is None
+    assert reloaded.get("b", '"e"') == b"1234"
+
+
+def test_unreadable_entries_are_skipped(tmp_path, caplog):
+    caplog.set_level(logging.WARNING)
+    (tmp_path / "broken.result").write_bytes(b"not json\n")
+    (tmp_path / "notes.txt").write_bytes(b"kept")
+
+    cache = ResultCache(str(tmp_path))
+
+    assert cache.stats()["entries"] == 0
+    assert "Skipping unreadable cached result broken.result" in caplog.text
+
+
+def test_deleted_file_is_a_miss(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    cache.put("k", b"data", '"e"')
+    os.remove(tmp_path / "k.result")
+
+    assert cache.get("k", '"e"') is None
+    assert cache.etag("k") is None
+    assert cache.stats()["bytes"] == 0
+
+
+def test_result_key_normalizes_pii_fields():
+    same = dict(PAYLOAD, pii_fields=["email", "name", "name"])
+    uploaded = dict(PAYLOAD, destination="s3://out/a.csv", ranged_get=True)
+
+    assert result_key(PAYLOAD, "csv") == result_key(same, "csv")
+    assert result_key(PAYLOAD, "csv") == result_key(uploaded, "csv")
+
+
+@pytest.mark.parametrize(
+    "changes",
+    [
+        {"file_to_obfuscate": "s3://bucket/daily/b.csv"},
+        {"pii_fields": ["name"]},
+        {"engine": "bytes"},
+        {"schema": "string"},
+    ],
+)
+def test_result_key_differs(changes):
+    assert result_key(PAYLOAD, "csv") != result_key(
+        dict(PAYLOAD, **changes), "csv"
+    )
+
+
+def test_configure_result_cache(tmp_path):
+    assert get_result_cache() is None
+
+    configure_result_cache(str(tmp_path / "results"), max_bytes=100)
+
+    assert get_result_cache().max_bytes == 100
+    assert os.path.isdir(tmp_path / "results")
+
+    reset_result_cache()
+
+    assert get_result_cache() is None
@@ -0,0 +1,55 @@
+from utils.s3_client import (
+    get_s3_client,
+    configure_s3_client,
+    reset_s3_client,
+    MAX_POOL_CONNECTIONS,
+)
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+
+def test_returns_shared_client():
+    client = get_s3_client()
+
+    assert client is get_s3_client()
+    assert client.meta.service_model.service_name == "s3"
+
+
+def test_default_config():
+    config = get_s3_client().meta.config
+
+    assert config.max_pool_connections == MAX_POOL_CONNECTIONS
+    assert config.tcp_keepalive is True
+
+
+@patch("utils.s3_client.boto3.session.Session")
+def test_created_once_across_threads(session_mock):
+    with ThreadPoolExecutor(16) as executor:
+        clients = list(executor.map(lambda _: get_s3_client(), range(64)))
+
+    assert all(client is clients[0] for client in clients)
+    session_mock.assert_called_once()
+
+
+def test_configure_recreates_client():
+    client = get_s3_client()
+
+    try:
+        configure_s3_client(max_pool_connections=7, tcp_keepalive=False)
+        configured = get_s3_client()
+
+        assert configured is not client
+        assert configured.meta.config.max_pool_connections == 7
+        assert configured.meta.config.tcp_keepalive is False
+    finally:
+        configure_s3_client(
+            max_pool_connections=MAX_POOL_CONNECTIONS, tcp_keepalive=True
+        )
+
+
+def test_reset_drops_client():
+    client = get_s3_client()
+
+    reset_s3_client()
+
+    assert get_s3_client() is not client
@@ -0,0 +1,135 @@
+from utils.s3_multipart_writer import S3MultipartWriter
+import pytest
+from unittest.mock import MagicMock
+import logging
+import boto3
+from moto import mock_aws
+import pandas as pd
+import os
+
+
+@pytest.fixture(scope="function")
+def s3(monkeypatch):
+    """Mocked s3 accepting parts smaller than the 5 MB minimum"""
+    os.environ["AWS_ACCESS_KEY_ID"] = "testing"
+    os.environ["AWS_SECRET_ACCESS_KEY"] = "testing"
+    os.environ["AWS_SECURITY_TOKEN"] = "testing"
+    os.environ["AWS_SESSION_TOKEN"] = "testing"
+    os.environ["AWS_DEFAULT_REGION"] = "eu-west-2"
+    monkeypatch.setattr("moto.s3.models.S3_UPLOAD_PART_MIN_SIZE", 256)
+
+    with mock_aws():
+        s3 = boto3.client("s3")
+        s3.create_bucket(
+            Bucket="test",
+            CreateBucketConfiguration={
+                "LocationConstraint": "eu-west-2",
+            },
+        )
+        yield s3
+
+
+def test_small_output_single_put(s3):
+    with S3MultipartWriter("test", "out.csv", s3, part_size=1024) as writer:
+        writer.write(b"id,name\n")
+        writer.write(b"1,***\n")
+
+    response = s3.get_object(Bucket="test", Key="out.csv")
+    assert response["Body"].read() == b"id,name\n1,***\n"
+    assert "-" not in response["ETag"]
+    assert writer.closed
+
+
+def test_empty_output(s3):
+    S3MultipartWriter("test", "empty.csv", s3).close()
+
+    response = s3.get_object(Bucket="test", Key="empty.csv")
+    assert response["Body"].read() == b""
+
+
+def test_multipart_upload_keeps_part_order(s3):
+    content = b"".join(f"{i:05d}\n".encode() for i in range(2000))
+
+    writer = S3MultipartWriter(
+        "test", "out.csv", s3, part_size=1000, max_workers=3
+    )
+    for start in range(0, len(content), 777):
+        writer.write(content[start : start + 777])  # noqa: E203
+    assert writer.tell() == len(content)
+    writer.close()
+
+    response = s3.get_object(Bucket="test", Key="out.csv")
+    assert response["Body"].read() == content
+    assert response["ETag"].endswith('-12"')
+    assert "Uploads" not in s3.list_multipart_uploads(Bucket="test")
+
+
+def test_pandas_writes_bytes(s3):
+    df = pd.DataFrame({"id": [1, 2], "name": ["***", "***"]})
+
+    with S3MultipartWriter("test", "out.csv", s3) as writer:
+        df.to_csv(writer, index=False)
+
+    response = s3.get_object(Bucket="test", Key="out.csv")
+    assert response["Body"].read() == b"id,name\n1,***\n2,***\n"
+
+
+def test_abort_discards_upload(s3):
+    writer = S3MultipartWriter("test", "out.csv", s3, part_size=300)
+    writer.write(b"x" * 1000)
+    writer.abort()
+
+    assert writer.closed
+    assert "Uploads" not in s3.list_multipart_uploads(Bucket="test")
+    assert "Contents" not in s3.list_objects_v2(Bucket="test")
+
+
+def test_exception_in_context_aborts(s3):
+    with pytest.raises(RuntimeError):
+        with S3MultipartWriter("test", "out.csv", s3, part_size=300) as w:
+            w.write(b"x" * 1000)
+            raise RuntimeError("redaction failed")
+
+    assert "Uploads" not in s3.list_multipart_uploads(Bucket="test")
+    assert "Contents" not in s3.list_objects_v2(Bucket="test")
+
+
+def test_failed_part_aborts_on_close(caplog):
+    client = MagicMock()
+    client.create_multipart_upload.return_value = {"UploadId": "upload"}
+    client.upload_part.side_effect = Exception("connection reset")
+
+    writer = S3MultipartWriter("test", "out.csv", client, part_size=10)
+    writer.write(b"x" * 25)
+
+    with pytest.raises(Exception, match="connection reset"):
+        writer.close()
+
+    client.complete_multipart_upload.assert_not_called()
+    client.abort_multipart_upload.assert_called_once_with(
+        Bucket="test", Key="out.csv", UploadId="upload"
+    )
+    assert writer.closed
+
+
+def test_failed_abort_is_logged(caplog):
+    client = MagicMock()
+    client.create_multipart_upload.return_value = {"UploadId": "upload"}
+    client.upload_part.return_value = {"ETag": "etag"}
+    client.abort_multipart_upload.side_effect = Exception("error")
+
+    caplog.set_level(logging.ERROR)
+
+    writer = S3MultipartWriter("test", "out.csv", client, part_size=10)
+    writer.write(b"x" * 25)
+    writer.abort()
+
+    assert "Failed to abort the upload to test/out.csv" in caplog.text
+
+
+def test_write_after_close_raises(s3):
+    writer = S3MultipartWriter("test", "out.csv", s3)
+    writer.close()
+
+    with pytest.raises(ValueError):
+        writer.write(b"more")
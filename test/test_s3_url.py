@@ -0,0 +1,19 @@
+from utils.s3_url import parse_s3_url, parse_s3_prefix
+
+
+def test_parse_s3_url():
+    assert parse_s3_url("s3://bucket/some/key.csv") == (
+        "bucket",
+        "some/key.csv",
+    )
+    assert parse_s3_url("bucket/some/key.csv") is None
+    assert parse_s3_url("s3://bucket") is None
+    assert parse_s3_url(1) is None
+
+
+def test_parse_s3_prefix():
+    assert parse_s3_prefix("s3://bucket/daily/") == ("bucket", "daily/")
+    assert parse_s3_prefix("s3://bucket/") == ("bucket", "")
+    assert parse_s3_prefix("s3://bucket") is None
+    assert parse_s3_prefix("bucket/daily/") is None
+    assert parse_s3_prefix(None) is None
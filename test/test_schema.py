@@ -0,0 +1,64 @@
+from utils.schema import is_valid_schema, read_options, apply_schema
+import pandas as pd
+import pytest
+
+
+@pytest.mark.parametrize(
+    "schema",
+    ["string", "cached", {"id": "str"}, {"id": "str", "age": "int64"}],
+)
+def test_valid_schema(schema):
+    assert is_valid_schema(schema)
+
+
+@pytest.mark.parametrize(
+    "schema",
+    ["int64", {}, {"id": 1}, ["id"], None, {"id": None}],
+)
+def test_invalid_schema(schema):
+    assert not is_valid_schema(schema)
+
+
+def test_no_schema_keeps_inference():
+    assert read_options("csv", None) == {}
+    assert read_options("json", None) == {}
+    assert read_options("csv", "cached") == {}
+
+
+def test_csv_all_string():
+    assert read_options("csv", "string") == {
+        "dtype": str,
+        "keep_default_na": False,
+    }
+
+
+def test_csv_dates_are_parsed():
+    options = read_options("csv", {"id": "str", "joined": "datetime64[ns]"})
+
+    assert options == {"dtype": {"id": "str"}, "parse_dates": ["joined"]}
+
+
+@pytest.mark.parametrize("format", ["json", "jsonl", "ndjson"])
+def test_json_keeps_parsed_values(format):
+    options = read_options(format, {"id": "str"})
+
+    assert options == {"dtype": False, "convert_dates": False}
+
+
+def test_parquet_carries_its_schema():
+    assert read_options("parquet", "string") == {}
+
+
+def test_apply_schema_casts_json_columns():
+    df = pd.DataFrame({"id": [1, 2], "age": [30, 40]})
+
+    response = apply_schema(df, "jsonl", {"age": "float64", "other": "str"})
+
+    assert response["age"].dtype == "float64"
+    assert response["id"].dtype == "int64"
+
+
+def test_apply_schema_leaves_csv_alone():
+    df = pd.DataFrame({"age": [30, 40]})
+
+    assert apply_schema(df, "csv", {"age": "float64"}) is df
@@ -0,0 +1,170 @@
+from utils.schema_cache import (
+    SchemaCache,
+    get_schema_cache,
+    reset_schema_cache,
+    schema_key,
+    inferred_schema,
+    read_csv_cached,
+)
+import io
+from botocore.response import StreamingBody
+import pandas as pd
+import pytest
+
+KEY = ("bucket", "daily/", "csv")
+
+
+def make_body(body_bytes):
+    return StreamingBody(io.BytesIO(body_bytes), len(body_bytes))
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("s3://bucket/daily/2024/a.csv", ("bucket", "daily/2024/", "csv")),
+        ("s3://bucket/a.csv", ("bucket", "", "csv")),
+        ("bucket/a.csv", None),
+    ],
+)
+def test_schema_key(url, expected):
+    assert schema_key(url, "csv") == expected
+
+
+def test_inferred_schema_keeps_text_columns():
+    df = pd.DataFrame({"id": [1], "score": [1.5], "name": ["a"], "ok": [True]})
+
+    assert inferred_schema(df) == {"name": "str"}
+
+
+def test_hit_and_miss_stats():
+    cache = SchemaCache()
+
+    assert cache.get(KEY, ["id"]) is None
+
+    cache.put(KEY, ["id"], {"id": "Int64"})
+
+    assert cache.get(KEY, ["id"]) == {"id": "Int64"}
+    assert cache.stats() == {
+        "entries": 1,
+        "hits": 1,
+        "misses": 1,
+        "invalidations": 0,
+        "hit_rate": 0.5,
+    }
+
+
+def test_different_header_invalidates():
+    cache = SchemaCache()
+    cache.put(KEY, ["id"], {"id": "Int64"})
+
+    assert cache.get(KEY, ["id", "name"]) is None
+    assert cache.stats()["invalidations"] == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_is_evicted():
+    cache = SchemaCache(max_entries=2)
+    cache.put(("b", "1/", "csv"), ["id"], {})
+    cache.put(("b", "2/", "csv"), ["id"], {})
+    cache.get(("b", "1/", "csv"), ["id"])
+
+    cache.put(("b", "3/", "csv"), ["id"], {})
+
+    assert cache.get(("b", "1/", "csv"), ["id"]) == {}
+    assert cache.get(("b", "2/", "csv"), ["id"]) is None
+    assert cache.stats()["entries"] == 2
+
+
+def test_shared_cache():
+    cache = get_schema_cache()
+
+    assert get_schema_cache() is cache
+
+    reset_schema_cache()
+
+    assert get_schema_cache() is not cache
+
+
+def test_read_csv_cached_reuses_the_schema():
+    cache = SchemaCache()
+
+    read_csv_cached(make_body(b"id,code\n1,a\n2,b\n"), KEY, cache=cache)
+    response = read_csv_cached(
+        make_body(b"id,code\n3,10\n4.0,11\n"), KEY, cache=cache
+    )
+
+    # inferred alone the codes would have become numbers
+    assert list(response["code"]) == ["10", "11"]
+    assert response.to_csv(index=False) == "id,code\n3.0,10\n4.0,11\n"
+    assert cache.stats()["hits"] == 1
+
+
+def test_read_csv_cached_skips_columns():
+    body_bytes = b"id,name,email\n1,a,a@x.com\n2,b,b@x.com\n"
+
+    response = read_csv_cached(
+        make_body(body_bytes), KEY, ["name", "email"], SchemaCache()
+    )
+
+    assert list(response.columns) == ["id"]
+    assert response.attrs["source_columns"] == ["id", "name", "email"]
+
+
+@pytest.mark.parametrize(
+    "header, skip_columns",
+    [("id,name", ["id", "name"]), ("id,id", ["id"]), ("id,name", ["age"])],
+)
+def test_read_csv_cached_reads_every_column(header, skip_columns):
+    body_bytes = f"{header}\n1,a\n".encode("utf-8")
+
+    response = read_csv_cached(
+        make_body(body_bytes), KEY, skip_columns, SchemaCache()
+    )
+
+    assert len(response.columns) == 2
+    assert len(response) == 1
+    assert "source_columns" not in response.attrs
+
+
+def test_read_csv_cached_new_header_is_inferred():
+    cache = SchemaCache()
+    read_csv_cached(make_body(b"id,name\n1,a\n"), KEY, cache=cache)
+
+    response = read_csv_cached(make_body(b"name,id\nb,2\n"), KEY, cache=cache)
+
+    assert list(response.columns) == ["name", "id"]
+    assert cache.stats()["invalidations"] == 1
+    assert cache.get(KEY, ["name", "id"]) == {"name": "str"}
+
+
+def test_read_csv_cached_header_across_reads(monkeypatch):
+    monkeypatch.setattr("utils.schema_cache.BLOCK_SIZE", 4)
+    cache = SchemaCache()
+    body_bytes = b'"id","full\nname"\n1,a\n2,b\n'
+
+    response = read_csv_cached(make_body(body_bytes), KEY, cache=cache)
+
+    assert list(response["full\nname"]) == ["a", "b"]
+    assert cache.get(KEY, ["id", "full\nname"]) == {"full\nname": "str"}
+
+
+def test_read_csv_cached_block_splits_a_character(monkeypatch):
+    monkeypatch.setattr("utils.schema_cache.BLOCK_SIZE", 9)
+    # the first block ends within the two bytes of "é"
+    body_bytes = "id,name\né,a\n".encode()
+
+    response = read_csv_cached(make_body(body_bytes), KEY, cache=SchemaCache())
+
+    assert list(response.columns) == ["id", "name"]
+    assert list(response["id"]) == ["é"]
+
+
+def test_read_csv_cached_reads_the_body_once():
+    body_bytes = b"\xef\xbb\xbfid,name\n" + b"1,a\n" * 50000
+    body = make_body(body_bytes)
+
+    response = read_csv_cached(body, KEY, cache=SchemaCache())
+
+    assert list(response.columns) == ["id", "name"]
+    assert len(response) == 50000
+    assert body.read() == b""
@@ -0,0 +1,135 @@
+from utils.shard_csv import shard_csv
+from utils.tokenizer import Tokenizer
+import io
+from botocore.response import StreamingBody
+import pandas as pd
+import pytest
+import logging
+
+
+def make_body(body_bytes):
+    return StreamingBody(io.BytesIO(body_bytes), len(body_bytes))
+
+
+@pytest.fixture(scope="function")
+def small_shards(monkeypatch):
+    # forcing many shards and quoted newlines across block boundaries
+    monkeypatch.setattr("utils.shard_csv.SHARD_SIZE", 50)
+    monkeypatch.setattr("utils.shard_csv.BLOCK_SIZE", 7)
+
+
+@pytest.fixture(scope="module")
+def quoted_csv():
+    return b"id,name,note\n" + b"".join(
+        f'{i},name{i},"line\none, ""quoted"" {i}"\n'.encode()
+        for i in range(40)
+    )
+
+
+def expected_df(content, pii_fields):
+    df = pd.read_csv(io.BytesIO(content))
+    for field in pii_fields:
+        df[field] = "***"
+    return df
+
+
+@pytest.mark.parametrize("engine", ["pandas", "bytes"])
+def test_matches_single_process_output(small_shards, quoted_csv, engine):
+    response = shard_csv(make_body(quoted_csv), ["name"], 3, engine)
+
+    assert isinstance(response, io.BytesIO)
+    pd.testing.assert_frame_equal(
+        pd.read_csv(response), expected_df(quoted_csv, ["name"])
+    )
+
+
+def test_header_written_once(small_shards, quoted_csv):
+    response = shard_csv(make_body(quoted_csv), ["name"], 2, "bytes")
+
+    assert response.getvalue().count(b"id,name,note") == 1
+
+
+def test_bytes_engine_output_identical(small_shards, quoted_csv):
+    response = shard_csv(make_body(quoted_csv), ["note"], 2, "bytes")
+
+    assert response.getvalue() == b"id,name,note\n" + b"".join(
+        f"{i},name{i},***\n".encode() for i in range(40)
+    )
+
+
+def test_pandas_engine_schema(small_shards):
+    content = b"id,name,note\n" + b"".join(
+        f"{i:04d},name{i},NA\n".encode() for i in range(40)
+    )
+
+    response = shard_csv(
+        make_body(content), ["name"], 2, "pandas", schema="string"
+    )
+
+    assert response.getvalue() == b"id,name,note\n" + b"".join(
+        f"{i:04d},***,NA\n".encode() for i in range(40)
+    )
+
+
+def test_pandas_engine_tokens(small_shards, quoted_csv):
+    tokenizer = Tokenizer(b"k")
+
+    response = shard_csv(
+        make_body(quoted_csv),
+        [{"field": "name", "strategy": "token"}],
+        3,
+        "pandas",
+        tokenizer=tokenizer,
+    )
+
+    expected = pd.read_csv(io.BytesIO(quoted_csv))
+    expected["name"] = tokenizer.tokens(list(expected["name"]))
+    pd.testing.assert_frame_equal(pd.read_csv(response), expected)
+
+
+def test_header_only_csv():
+    response = shard_csv(make_body(b"id,name\n"), ["name"], 2, "bytes")
+
+    assert response.getvalue() == b"id,name\n"
+
+
+def test_crlf_without_final_newline(small_shards):
+    content = b"id,name\r\n" + b"\r\n".join(
+        f"{i},name{i}".encode() for i in range(20)
+    )
+
+    response = shard_csv(make_body(content), ["name"], 2, "bytes")
+
+    assert response.getvalue() == b"id,name\r\n" + b"\r\n".join(
+        f"{i},***".encode() for i in range(20)
+    )
+
+
+def test_writes_into_given_output(quoted_csv):
+    output = io.BytesIO()
+
+    response = shard_csv(make_body(quoted_csv), ["name"], 2, "bytes", output)
+
+    assert response is output
+    assert output.tell() == len(output.getvalue())
+
+
+@pytest.mark.parametrize("processes", [0, -1, "2", None])
+def test_invalid_processes(caplog, processes):
+    with caplog.at_level(logging.ERROR):
+        response = shard_csv(make_body(b"id,name\n1,a\n"), ["name"], processes)
+
+    assert response is None
+    assert f"Invalid number of processes: {processes}" in caplog.text
+
+
+def test_failed_read_returns_none(caplog):
+    class BrokenBody:
+        def read(self, size=-1):
+            raise ConnectionError("connection reset")
+
+    with caplog.at_level(logging.ERROR):
+        response = shard_csv(BrokenBody(), ["name"], 1)
+
+    assert response is None
+    assert "Something went wrong" in caplog.text
@@ -0,0 +1,137 @@
+from utils.stage_metrics import (
+    StageRecorder,
+    CountingStream,
+    RECORD_KEYS,
+    output_size,
+    log_stage,
+)
+import io
+import logging
+from botocore.response import StreamingBody
+import pandas as pd
+import pytest
+
+
+def make_body(body_bytes):
+    return StreamingBody(io.BytesIO(body_bytes), len(body_bytes))
+
+
+def test_disabled_recorder_is_a_no_op():
+    stages = StageRecorder()
+    body = make_body(b"abc")
+
+    with stages.stage("file_to_df", rows_in=1) as stage:
+        stage.update(ok=False)
+        stage.add(rows_out=1)
+
+    assert not stages.enabled
+    assert stages.stage("a") is stages.stage("b")
+    assert stages.count_reads(body) is body
+
+
+def test_records_a_stage():
+    records = []
+    stages = StageRecorder(records.append, "s3://in/a.csv")
+    body = stages.count_reads(make_body(b"id,name\n1,James\n2,Sam\n"))
+
+    with stages.stage("file_to_df", source=body) as stage:
+        df = pd.read_csv(body)
+        stage.update(rows_out=len(df))
+
+    assert len(records) == 1
+    record = records[0]
+    assert tuple(record) == RECORD_KEYS
+    assert record["stage"] == "file_to_df"
+    assert record["file"] == "s3://in/a.csv"
+    assert record["ok"] is True
+    assert record["wall_seconds"] >= 0
+    assert record["cpu_seconds"] >= 0
+    assert record["bytes_in"] == 22
+    assert record["bytes_out"] is None
+    assert record["rows_in"] is None
+    assert record["rows_out"] == 2
+
+
+def test_repeated_stage_is_summed_until_done():
+    records = []
+    stages = StageRecorder(records.append)
+    body = stages.count_reads(make_body(b"abcdef"))
+    read = stages.stage("file_to_chunks", source=body, repeated=True)
+
+    for _ in range(3):
+        with read:
+            body.read(2)
+        read.add(rows_out=10)
+
+    assert records == []
+
+    read.done()
+
+    assert records[0]["bytes_in"] == 6
+    assert records[0]["rows_out"] == 30
+
+
+def test_failed_stage_is_recorded_and_raised():
+    records = []
+    stages = StageRecorder(records.append)
+
+    with pytest.raises(ValueError):
+        with stages.stage("redact_pii"):
+            raise ValueError("boom")
+
+    assert records[0]["ok"] is False
+
+
+def test_callback_errors_are_logged(caplog):
+    def broken(record):
+        raise RuntimeError("boom")
+
+    stages = StageRecorder(broken)
+
+    with stages.stage("redact_pii"):
+        pass
+
+    assert "Stage callback failed on redact_pii" in caplog.text
+
+
+def test_counting_stream_reads_through():
+    stream = CountingStream(make_body(b"a\nb\n"))
+
+    assert io.TextIOWrapper(stream, encoding="utf-8").readlines() == [
+        "a\n",
+        "b\n",
+    ]
+    assert stream.bytes_read == 4
+
+
+def test_counting_stream_close_closes_body():
+    body = make_body(b"abc")
+    stream = CountingStream(body)
+
+    stream.close()
+
+    assert stream.closed
+    with pytest.raises(ValueError):
+        body.read()
+
+
+def test_output_size():
+    rewound = io.BytesIO(b"abc")
+    written = io.BytesIO()
+    written.write(b"abcd")
+
+    assert output_size(rewound) == 3
+    assert output_size(written) == 4
+    assert output_size({"status": 400}) is None
+    assert output_size(None) is None
+
+
+def test_log_stage(caplog):
+    caplog.set_level(logging.INFO)
+    stages = StageRecorder(log_stage, "s3://in/a.csv")
+
+    with stages.stage("redact_pii", rows_in=2) as stage:
+        stage.update(rows_out=2, ok=False)
+
+    assert "s3://in/a.csv redact_pii: " in caplog.text
+    assert "2 rows in, 2 rows out, failed" in caplog.text
@@ -0,0 +1,177 @@
+from utils.strategies import (
+    parse_pii_fields,
+    field_names,
+    partially_mask,
+    partially_mask_series,
+    compact_series,
+    compact_array,
+)
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+
+def test_parse_pii_fields():
+    strategies = parse_pii_fields(
+        [
+            "name",
+            {"field": "email", "strategy": "email_domain"},
+            {"field": "phone", "strategy": "last_digits"},
+            {"field": "postcode", "strategy": "truncate", "keep": 4},
+            {"field": "id"},
+        ],
+        "token",
+    )
+
+    assert strategies == {
+        "name": ("token", None),
+        "email": ("email_domain", None),
+        "phone": ("last_digits", 4),
+        "postcode": ("truncate", 4),
+        "id": ("token", None),
+    }
+    assert field_names(strategies) == [
+        "name",
+        "email",
+        "phone",
+        "postcode",
+        "id",
+    ]
+    assert field_names(strategies, "token") == ["name", "id"]
+
+
+@pytest.mark.parametrize(
+    "pii_fields, message",
+    [
+        ("name", "Invalid pii_fields: name"),
+        ([1], "Invalid pii field: 1"),
+        ([{"strategy": "mask"}], "Invalid pii field"),
+        ([{"field": "a", "strategy": "blur"}], "Unknown strategy: blur"),
+        (
+            [{"field": "a", "strategy": "truncate", "keep": "2"}],
+            "Invalid keep for a: 2",
+        ),
+        (
+            [{"field": "a", "strategy": "last_digits", "keep": True}],
+            "Invalid keep for a: True",
+        ),
+    ],
+)
+def test_invalid_pii_fields(pii_fields, message):
+    with pytest.raises(ValueError, match=message):
+        parse_pii_fields(pii_fields)
+
+
+def test_email_domain():
+    series = pd.Series(["james@mail.com", "a@b@corp.org", "no address", None])
+
+    response = partially_mask_series(series, "email_domain")
+
+    assert list(response) == ["***@mail.com", "***@corp.org", "***", None]
+
+
+def test_last_digits():
+    series = pd.Series(["+44 7700 900123", "(555) 010-9999", "1234", None])
+
+    response = partially_mask_series(series, "last_digits")
+
+    assert list(response) == ["***0123", "***9999", "***", None]
+
+
+def test_mixed_types():
+    # a json field holding numbers and strings
+    series = pd.Series([7700900123, "07700 900456", None], dtype=object)
+
+    response = partially_mask_series(series, "last_digits")
+
+    assert list(response) == ["***0123", "***0456", None]
+
+
+def test_last_digits_of_numbers():
+    # a gap makes pandas read the phone numbers as floats
+    series = pd.Series([7700900123, None])
+
+    response = partially_mask_series(series, "last_digits", 2)
+
+    assert list(response) == ["***23", None]
+
+
+def test_truncate():
+    series = pd.Series(["SW1A 1AA", "EC1", "94105"], index=[5, 6, 7])
+
+    response = partially_mask_series(series, "truncate", 3)
+
+    assert list(response) == ["SW1***", "***", "941***"]
+    assert list(response.index) == [5, 6, 7]
+
+
+def test_arrow_columns():
+    column = pa.chunked_array([["a@x.com"], [None, "b@y.org"]])
+
+    response = partially_mask(column, "email_domain")
+
+    assert response.to_pylist() == ["***@x.com", None, "***@y.org"]
+
+
+def test_not_a_partial_strategy():
+    with pytest.raises(ValueError, match="Not a partial strategy: token"):
+        partially_mask(pa.array(["a"]), "token")
+
+
+@pytest.mark.parametrize(
+    "values, dtype, expected",
+    [
+        ([1, 2], "int64", "Int64"),
+        ([1, 2], "uint8", "UInt8"),
+        ([1, None], "Int32", "Int32"),
+        ([1.5, 2.5], "float32", "float32"),
+        ([True, False], "bool", "boolean"),
+        (["2024-01-01", "2024-01-02"], "datetime64[ns]", "datetime64[ns]"),
+        (["1 day", "2 days"], "timedelta64[ns]", "timedelta64[ns]"),
+    ],
+)
+def test_compact_typed_nulls(values, dtype, expected):
+    series = pd.Series(values, index=[3, 4], name="x").astype(dtype)
+
+    response = compact_series(series)
+
+    assert response.dtype == expected
+    assert response.isna().all()
+    assert list(response.index) == [3, 4]
+    assert response.name == "x"
+
+
+def test_compact_text():
+    series = pd.Series(["James", None, "Sam"], dtype=object)
+
+    response = compact_series(series)
+
+    assert list(response) == ["***"] * 3
+    assert list(response.cat.categories) == ["***"]
+    assert response.cat.codes.dtype == np.int8
+
+
+@pytest.mark.parametrize(
+    "column, kind",
+    [
+        (pa.array([1, 2], type=pa.int32()), pa.int32()),
+        (pa.array([1.5, None]), pa.float64()),
+        (pa.array([True, False]), pa.bool_()),
+        (pa.array([0, 1], type=pa.timestamp("ms")), pa.timestamp("ms")),
+    ],
+)
+def test_compact_array_typed_nulls(column, kind):
+    response = compact_array(column)
+
+    assert response.type == kind
+    assert response.null_count == 2
+
+
+def test_compact_array_text():
+    column = pa.chunked_array([["a"], [None, "b"]])
+
+    response = compact_array(column)
+
+    assert response.type == pa.dictionary(pa.int8(), pa.string())
+    assert response.to_pylist() == ["***"] * 3
@@ -0,0 +1,107 @@
+from utils.table_to_byte_stream import table_to_byte_stream
+import io
+import json
+import pandas as pd
+import pyarrow as pa
+import pytest
+from unittest.mock import patch
+import logging
+
+
+@pytest.fixture(scope="function")
+def create_data():
+    data = {
+        "id": [1, 2, 3],
+        "name": ["***", "***", "***"],
+        "price": [1.5, None, 2.25],
+        "count": [1, None, 3],
+        "note": ["a, b", 'say "hi"', None],
+    }
+
+    # what pd.read_csv / pd.read_json would have produced
+    df = pd.DataFrame(data)
+
+    yield df, pa.table(data)
+
+
+def test_csv_matches_pandas(create_data):
+    df, table = create_data
+
+    response = table_to_byte_stream(table, "csv")
+
+    expected = df.to_csv(index=False)
+    assert response.getvalue().decode("utf-8") == expected
+
+
+def test_csv_batches_render_the_same(create_data, monkeypatch):
+    df, table = create_data
+    monkeypatch.setattr("utils.table_to_byte_stream.TEXT_BATCH_SIZE", 1)
+
+    response = table_to_byte_stream(table, "csv")
+
+    content = response.getvalue().decode("utf-8")
+    assert content.count("id,name") == 1
+    assert "1.0," in content
+
+
+def test_json_matches_pandas(create_data, monkeypatch):
+    df, table = create_data
+    monkeypatch.setattr("utils.table_to_byte_stream.TEXT_BATCH_SIZE", 2)
+
+    response = table_to_byte_stream(table, "json")
+
+    expected = df.to_json(orient="records")
+    assert response.getvalue().decode("utf-8") == expected
+    assert len(json.loads(response.getvalue())) == 3
+
+
+def test_empty_table(create_data):
+    _, table = create_data
+
+    assert table_to_byte_stream(table.slice(0, 0), "json").getvalue() == b"[]"
+    assert table_to_byte_stream(table.slice(0, 0), "jsonl").getvalue() == b""
+    assert table_to_byte_stream(table.slice(0, 0), "csv").getvalue() == (
+        b"id,name,price,count,note\n"
+    )
+
+
+def test_parquet(create_data):
+    _, table = create_data
+
+    response = table_to_byte_stream(table, "parquet")
+
+    assert pd.read_parquet(response)["name"].tolist() == ["***"] * 3
+
+
+def test_writes_into_provided_output(create_data):
+    _, table = create_data
+    output = io.BytesIO()
+
+    response = table_to_byte_stream(table, "csv", output)
+
+    assert response is output
+    assert output.tell() > 0
+
+
+@patch("utils.table_to_byte_stream.pq.write_table")
+def test_parquet_error(write_mock, create_data, caplog):
+    _, table = create_data
+    write_mock.side_effect = Exception("error")
+
+    caplog.set_level(logging.INFO)
+
+    response = table_to_byte_stream(table, "parquet")
+
+    assert response == None
+    assert "Something went wrong ," in caplog.text
+
+
+def test_no_match_format(create_data, caplog):
+    _, table = create_data
+
+    caplog.set_level(logging.INFO)
+
+    response = table_to_byte_stream(table, "fdf")
+
+    assert response == None
+    assert "No Byte stream format matches fdf" in caplog.text
@@ -151,6 +151,15 @@ def test_convert_df_json(create_data_json):
     assert df_response.equals(df)
 
 
+def test_json_written_in_batches(create_data_json, monkeypatch):
+    df = pd.concat([create_data_json] * 5, ignore_index=True)
+    monkeypatch.setattr("utils.json_array.DEFAULT_BATCH_SIZE", 3)
+
+    response = to_byte_stream(df, "json")
+
+    assert response.getvalue().decode("utf-8") == df.to_json(orient="records")
+
+
 @patch("utils.to_byte_stream.pd.DataFrame.to_json")
 def test_json_error(to_json_mock, create_data_json, caplog):
     df = create_data_json
@@ -164,6 +173,29 @@ def test_json_error(to_json_mock, create_data_json, caplog):
     assert "Something went wrong ," in caplog.text
 
 
+def test_convert_df_json_lines(create_data_json):
+    df = create_data_json
+
+    for format in ("jsonl", "ndjson"):
+        response = to_byte_stream(df, format)
+
+        lines = response.getvalue().decode("utf-8").splitlines()
+        assert len(lines) == len(df)
+        assert json.loads(lines[0])["name"] == "***"
+
+        response.seek(0)
+        df_response = pd.read_json(response, lines=True)
+        assert df_response.equals(df)
+
+
+def test_empty_json_lines(create_data_json):
+    df = create_data_json
+
+    response = to_byte_stream(df.iloc[:0], "jsonl")
+
+    assert response.getvalue() == b""
+
+
 def test_return_byte_stream_parquet(create_data_parquet):
     df = create_data_parquet
     response = to_byte_stream(df, "parquet")
@@ -202,3 +234,12 @@ def test_no_match_format(create_data, caplog):
 
     assert response == None
     assert "No Byte stream format matches fdf" in caplog.text
+
+
+@patch("utils.to_byte_stream.pd.DataFrame.copy")
+def test_does_not_copy_input(copy_mock, create_data):
+    df = create_data
+
+    to_byte_stream(df, "csv")
+
+    copy_mock.assert_not_called()
@@ -0,0 +1,86 @@
+from utils.tokenizer import (
+    Tokenizer,
+    TOKEN_LENGTH,
+    KEY_ENV,
+    configure_token_key,
+    token_key,
+)
+import hmac
+import hashlib
+import pandas as pd
+import pyarrow as pa
+
+
+def expected_token(key, text):
+    digest = hmac.new(key, text.encode("utf-8"), hashlib.sha256)
+    return digest.hexdigest()[:TOKEN_LENGTH]
+
+
+def test_tokens_are_keyed_hashes():
+    tokens = Tokenizer(b"secret").tokens(["James", 7])
+
+    assert tokens == [
+        expected_token(b"secret", "James"),
+        expected_token(b"secret", "7"),
+    ]
+    assert Tokenizer(b"other").tokens(["James"]) != tokens[:1]
+
+
+def test_tokenize_series_maps_codes_back():
+    series = pd.Series(["b", "a", None, "b"], index=[10, 11, 12, 13])
+
+    response = Tokenizer(b"k").tokenize_series(series)
+
+    assert list(response.index) == [10, 11, 12, 13]
+    assert response[10] == response[13] == expected_token(b"k", "b")
+    assert response[11] == expected_token(b"k", "a")
+    assert response[12] is None
+
+
+def test_series_and_arrow_tokens_match():
+    tokenizer = Tokenizer(b"k")
+    values = [3, 1, 3, None]
+
+    from_pandas = tokenizer.tokenize_series(pd.Series(values, dtype="Int64"))
+    from_arrow = tokenizer.tokenize_array(
+        pa.chunked_array([values[:2], values[2:]])
+    )
+
+    assert list(from_pandas) == from_arrow.to_pylist()
+    assert from_arrow.type == pa.string()
+
+
+def test_ints_read_as_floats_share_tokens():
+    tokenizer = Tokenizer(b"k")
+
+    # a missing id makes pandas read the column as floats
+    with_gap = tokenizer.tokenize_series(pd.Series([42, None, 7]))
+    ints = tokenizer.tokenize_series(pd.Series([42, 7]))
+
+    assert with_gap.dtype == object
+    assert list(with_gap) == [ints[0], None, ints[1]]
+    assert ints[0] == expected_token(b"k", "42")
+    assert tokenizer.tokens([1.5]) == [expected_token(b"k", "1.5")]
+
+
+def test_memo_is_bounded():
+    tokenizer = Tokenizer(b"k", max_memo=2)
+
+    tokens = tokenizer.tokens(["a", "b", "c", "c"])
+
+    assert len(tokenizer._memo) == 2
+    assert tokens[2] == tokens[3] == expected_token(b"k", "c")
+
+
+def test_token_key(monkeypatch):
+    monkeypatch.delenv(KEY_ENV, raising=False)
+
+    assert token_key() is None
+
+    monkeypatch.setenv(KEY_ENV, "from env")
+
+    assert token_key() == b"from env"
+
+    configure_token_key("configured")
+
+    assert token_key() == b"configured"
@@ -0,0 +1,45 @@
+import io
+
+
+class BodyStream(io.RawIOBase):
+    """
+    readable binary stream wrapping a file body, every read goes
+    through read so a subclass only overrides it to act on the
+    bytes; closing the stream closes the body unless closes_body
+    is False
+
+    Args:
+        file_body: StreamingBody (or any object with read(size))
+    """
+
+    closes_body = True
+
+    def __init__(self, file_body):
+        super().__init__()
+        self._body = file_body
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        size = len(data)
+        buffer[:size] = data
+
+        return size
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            return self._body.read()
+
+        return self._body.read(size)
+
+    def readall(self) -> bytes:
+        return self.read()
+
+    def close(self):
+        if self.closes_body and not self.closed:
+            close = getattr(self._body, "close", None)
+            if close is not None:
+                close()
+        super().close()
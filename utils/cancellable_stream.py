@@ -0,0 +1,29 @@
+import threading
+from utils.body_stream import BodyStream
+
+
+class ObfuscationCancelled(Exception):
+    """raised by a CancellableStream read once its event is set"""
+
+
+class CancellableStream(BodyStream):
+    """
+    readable binary stream wrapping a file body, every read first
+    checks a threading.Event and raises ObfuscationCancelled once it
+    is set, so a pipeline running in a worker thread stops at its
+    next read instead of redacting the rest of the file
+
+    Args:
+        file_body: StreamingBody (or any object with read(size))
+        cancelled: event set by the caller to stop the reads
+    """
+
+    def __init__(self, file_body, cancelled: threading.Event):
+        super().__init__(file_body)
+        self._cancelled = cancelled
+
+    def read(self, size: int = -1) -> bytes:
+        if self._cancelled.is_set():
+            raise ObfuscationCancelled("The obfuscation was cancelled")
+
+        return super().read(size)
@@ -0,0 +1,126 @@
+from __future__ import annotations
+import io
+import logging
+from typing import Iterable
+from utils.json_array import write_json_array
+from utils.lazy_import import lazy_import
+
+pd = lazy_import("pandas")
+pa = lazy_import("pyarrow")
+pq = lazy_import("pyarrow.parquet")
+
+logger = logging.getLogger(__name__)
+
+
+def chunks_to_byte_stream(
+    chunks: Iterable[pd.DataFrame], format: str, output=None
+):
+    """
+    write an iterable of df chunks into a byte stream
+    of the provided format, one chunk at a time, so only
+    a single chunk is ever held in memory
+
+    parquet chunks are each written as their own row group so the
+    row group layout of a row group by row group read is kept
+
+    Args:
+        chunks: iterable of dataframes sharing the same columns
+        format: the format the byte stream should be in
+        output: optional writable binary file-like object
+        to write into, a new BytesIO is used if not provided
+
+    Return:
+        the output stream the content was written to,
+        rewound and ready to read when it was created here;
+        None if writing failed
+    """
+
+    if format not in ("csv", "json", "jsonl", "ndjson", "parquet"):
+        logger.error(f"No Byte stream format matches {format}")
+        return None
+
+    # writing into a fresh buffer unless the caller provided a sink
+    buffer = io.BytesIO() if output is None else output
+
+    try:
+        if format == "json":
+            # the chunks are joined into a single array
+            write_json_array(chunks, buffer)
+        else:
+            _write_chunks(chunks, format, buffer)
+
+    except Exception:
+        logger.error("Something went wrong ,", exc_info=True)
+        return None
+
+    if output is None:
+        buffer.seek(0)
+
+    return buffer
+
+
+def _write_chunks(chunks: Iterable[pd.DataFrame], format: str, buffer):
+    """writes the chunks one after the other, parquet as row groups"""
+
+    parquet_writer = None
+
+    for i, chunk in enumerate(chunks):
+        match format:
+            case "csv":
+                # the header is only written with the first chunk
+                chunk.to_csv(buffer, index=False, header=i == 0)
+            case "jsonl" | "ndjson":
+                # every record is its own line so chunks just follow
+                # each other, an empty chunk would add a blank line
+                if not chunk.empty:
+                    chunk.to_json(buffer, orient="records", lines=True)
+            case "parquet":
+                parquet_writer = _write_row_group(
+                    parquet_writer, chunk, buffer
+                )
+
+    if parquet_writer is not None:
+        parquet_writer.close()
+
+
+def _write_row_group(parquet_writer, chunk: pd.DataFrame, buffer):
+    """
+    appends the chunk as a single row group, the writer is created
+    from the first chunk and every later chunk is cast to its schema
+    """
+
+    schema = (
+        _writer_schema(chunk)
+        if parquet_writer is None
+        else parquet_writer.schema
+    )
+    table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+
+    if parquet_writer is None:
+        parquet_writer = pq.ParquetWriter(buffer, table.schema)
+
+    parquet_writer.write_table(table, row_group_size=max(len(table), 1))
+
+    return parquet_writer
+
+
+def _writer_schema(chunk: pd.DataFrame) -> pa.Schema:
+    """
+    the schema every row group is written with: the types of the
+    source file in df.attrs["source_schema"] for the columns it
+    still holds, the types of the chunk for the others, text for
+    those only holding nulls so far (a redacted column of nulls)
+    """
+
+    inferred = pa.Schema.from_pandas(chunk, preserve_index=False)
+    source = chunk.attrs.get("source_schema")
+
+    fields = []
+    for field in inferred:
+        if source is not None and field.name in source.names:
+            field = source.field(field.name)
+        elif pa.types.is_null(field.type):
+            field = field.with_type(pa.string())
+        fields.append(field)
+
+    return pa.schema(fields)
@@ -0,0 +1,23 @@
+import logging
+
+LOG_FILE = "app.log"
+
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+
+
+def configure_logging(filename: str = LOG_FILE, level: int = logging.INFO):
+    """
+    sends the logs of the package to filename, meant to be called
+    once by the host application at start up; the modules only
+    create their loggers so importing them never touches the
+    logging setup
+
+    it does nothing when the root logger already has a handler,
+    a host with its own logging setup keeps it
+
+    Args:
+        filename: file the logs are appended to, app.log by default
+        level: lowest level written, INFO by default
+    """
+
+    logging.basicConfig(filename=filename, level=level, format=LOG_FORMAT)
@@ -1,13 +1,6 @@
 import re
 import logging
 
-logging.basicConfig(
-    filename="app.log",
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    force=True,
-)
-
 logger = logging.getLogger(__name__)
 
 
@@ -0,0 +1,160 @@
+from __future__ import annotations
+import io
+import logging
+import shutil
+import tempfile
+from typing import Iterator, Optional
+from utils.file_to_df import source_column_names
+from utils.json_array import read_json_batches
+from utils.schema import read_options, apply_schema
+from utils.lazy_import import lazy_import
+
+pd = lazy_import("pandas")
+pq = lazy_import("pyarrow.parquet")
+
+logger = logging.getLogger(__name__)
+
+# number of rows held in memory at once when streaming
+DEFAULT_CHUNK_SIZE = 100_000
+
+# parquet bodies bigger than this are spooled to disk instead of memory
+SPOOL_MAX_MEMORY = 64 * 1024 * 1024
+
+
+def file_to_chunks(
+    file_body,
+    format: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    skip_columns=None,
+    schema=None,
+    paths=None,
+) -> Optional[Iterator[pd.DataFrame]]:
+    """
+    Reads a boto3 Streaming Body lazily and returns
+    an iterator of dataframes, each holding at most
+    chunk_size rows, so the whole file never has to
+    sit in memory at once
+
+    Args:
+        file_body (StreamingBody): A boto3 StreamingBody object
+        format (str): The format of the file
+                ('csv', 'json', 'jsonl', 'ndjson' or 'parquet')
+        chunk_size (int): maximum number of rows per chunk,
+                parquet files are always read one row group
+                at a time instead
+        skip_columns (list): columns that do not need to be
+                decoded, only honoured for parquet; the full
+                column order is kept in df.attrs["source_columns"]
+                and the parquet schema in df.attrs["source_schema"]
+        schema (dict or str): column dtypes replacing the type
+                inference of the csv and json readers, see
+                utils.schema; without it types are inferred
+                per chunk
+        paths (JsonPaths): nested values of json records masked
+                in every chunk as it is read, see utils.json_paths
+
+    Return:
+        Iterator[pd.DataFrame] or None: lazy iterator over
+        the file content if successful;
+        None if the file cannot be read.
+    """
+
+    if not isinstance(chunk_size, int) or chunk_size < 1:
+        logger.error(f"Invalid chunk size: {chunk_size}")
+        return None
+
+    try:
+        match format:
+            case "csv":
+                chunks = pd.read_csv(
+                    file_body,
+                    chunksize=chunk_size,
+                    **read_options(format, schema),
+                )
+            case "json":
+                chunks = read_json_batches(
+                    file_body, chunk_size, schema, paths
+                )
+            case "jsonl" | "ndjson":
+                # the json reader splits lines of text, not bytes
+                chunks = pd.read_json(
+                    io.TextIOWrapper(file_body, encoding="utf-8"),
+                    lines=True,
+                    chunksize=chunk_size,
+                    **read_options(format, schema),
+                )
+                if paths is not None:
+                    chunks = (paths.redact_frame(chunk) for chunk in chunks)
+                if isinstance(schema, dict):
+                    chunks = (
+                        apply_schema(chunk, format, schema) for chunk in chunks
+                    )
+            case "parquet":
+                chunks = _parquet_row_groups(file_body, skip_columns)
+            case _:
+                logger.warning(
+                    f"The provided format doesn't support streaming: {format}"
+                )
+                return None
+    except Exception:
+        logger.error("Something went wrong ", exc_info=True)
+        return None
+
+    return chunks
+
+
+def _parquet_row_groups(
+    file_body, skip_columns=None
+) -> Iterator[pd.DataFrame]:
+    """
+    opens the parquet file and returns an iterator yielding
+    one row group at a time as a dataframe
+
+    parquet needs random access to read its footer, so a non
+    seekable body is first spooled to a temporary file
+    """
+
+    if getattr(file_body, "seekable", lambda: False)():
+        source = file_body
+    else:
+        source = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+        shutil.copyfileobj(file_body, source)
+        source.seek(0)
+
+    # opening eagerly so a corrupt file fails before streaming starts
+    parquet_file = pq.ParquetFile(source)
+
+    source_columns = source_column_names(parquet_file)
+    columns = None
+    if skip_columns:
+        columns = [c for c in source_columns if c not in skip_columns]
+
+    def read(table):
+        df = table.to_pandas()
+        if columns is not None:
+            df.attrs["source_columns"] = source_columns
+        # the types of the file, a chunk can't tell them when a
+        # column only holds nulls in its row group
+        df.attrs["source_schema"] = parquet_file.schema_arrow
+        return df
+
+    def row_groups():
+        try:
+            # keeping the schema even when the file holds no rows
+            if parquet_file.num_row_groups == 0:
+                table = parquet_file.schema_arrow.empty_table()
+                if columns is not None:
+                    table = table.select(columns)
+                yield read(table)
+
+            for i in range(parquet_file.num_row_groups):
+                yield read(
+                    parquet_file.read_row_group(
+                        i, columns=columns, use_pandas_metadata=True
+                    )
+                )
+        finally:
+            if source is not file_body:
+                source.close()
+
+    return row_groups()
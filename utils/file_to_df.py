@@ -1,19 +1,25 @@
-import pandas as pd
+from __future__ import annotations
 import logging
 import io
+from utils.json_array import read_json_frame
+from utils.schema import CACHED, read_options, apply_schema
+from utils.schema_cache import read_csv_cached
+from utils.lazy_import import lazy_import
 
-
-logging.basicConfig(
-    filename="app.log",
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    force=True,
-)
+pd = lazy_import("pandas")
+pq = lazy_import("pyarrow.parquet")
 
 logger = logging.getLogger(__name__)
 
 
-def file_to_df(file_body, format: str) -> pd.DataFrame:
+def file_to_df(
+    file_body,
+    format: str,
+    skip_columns=None,
+    schema=None,
+    cache_key=None,
+    paths=None,
+) -> pd.DataFrame:
     """
     Reads a boto3 Streaming Body and returns
     dataframe of  content
@@ -21,7 +27,23 @@ def file_to_df(file_body, format: str) -> pd.DataFrame:
     Args:
         file_body (StreamingBody): A boto3 StreamingBody object
         format (str): The format of the file
-                ('csv', 'json', or 'parquet')
+                ('csv', 'json', 'jsonl', 'ndjson' or 'parquet')
+        skip_columns (list): columns that do not need to be
+                decoded (e.g. fields about to be redacted),
+                only honoured for parquet and "cached" csv
+                schemas; the full column order is kept in
+                df.attrs["source_columns"]
+        schema (dict or str): column dtypes replacing the type
+                inference of the csv and json readers, or
+                "string" to keep every csv value as text,
+                see utils.schema; "cached" reads a csv with the
+                schema inferred for the previous files of the
+                same cache_key
+        cache_key (tuple): utils.schema_cache.schema_key of the
+                file, a "cached" schema is inferred per file
+                without it
+        paths (JsonPaths): nested values of json records masked
+                while the records are read, see utils.json_paths
 
     Return:
         pd.DataFrame or None: The contents of the
@@ -32,12 +54,27 @@ def file_to_df(file_body, format: str) -> pd.DataFrame:
     try:
         match format:
             case "csv":
-                df = pd.read_csv(file_body)
+                if schema == CACHED and cache_key is not None:
+                    df = read_csv_cached(file_body, cache_key, skip_columns)
+                else:
+                    df = pd.read_csv(file_body, **read_options(format, schema))
             case "json":
-                df = pd.read_json(file_body, orient="records")
+                # parsed a batch of records at a time so the raw text
+                # and the parsed objects never sit in memory at once
+                df = read_json_frame(file_body, schema=schema, paths=paths)
+            case "jsonl" | "ndjson":
+                df = pd.read_json(
+                    file_body, lines=True, **read_options(format, schema)
+                )
+                if paths is not None:
+                    df = paths.redact_frame(df)
+                df = apply_schema(df, format, schema)
             case "parquet":
                 buffer = io.BytesIO(file_body.read())
-                df = pd.read_parquet(buffer, engine="pyarrow")
+                if skip_columns:
+                    df = read_parquet_projected(buffer, skip_columns)
+                else:
+                    df = pd.read_parquet(buffer, engine="pyarrow")
             case _:
                 logger.warning("The provided format doesn't match")
                 return None
@@ -46,3 +83,52 @@ def file_to_df(file_body, format: str) -> pd.DataFrame:
         return None
 
     return df
+
+
+def read_parquet_projected(source, skip_columns) -> pd.DataFrame:
+    """
+    reads a parquet file without decoding the skipped columns,
+    the original column order is recorded in
+    df.attrs["source_columns"] so they can be put back later
+
+    Args:
+        source: seekable binary file-like object or
+        pq.ParquetFile holding the parquet content
+        skip_columns: column names that should not be read
+
+    Return:
+        DataFrame with every column except the skipped ones
+    """
+
+    parquet_file = (
+        source
+        if isinstance(source, pq.ParquetFile)
+        else pq.ParquetFile(source)
+    )
+
+    source_columns = source_column_names(parquet_file)
+    columns = [c for c in source_columns if c not in skip_columns]
+
+    if columns:
+        df = parquet_file.read(columns=columns, use_pandas_metadata=True)
+        df = df.to_pandas()
+    else:
+        # nothing left to decode, only the row count is needed
+        df = pd.DataFrame(index=pd.RangeIndex(parquet_file.metadata.num_rows))
+
+    df.attrs["source_columns"] = source_columns
+
+    return df
+
+
+def source_column_names(parquet_file: pq.ParquetFile) -> list:
+    """
+    column names of a parquet file as pandas will see them,
+    without the serialized index columns
+    """
+
+    return [
+        name
+        for name in parquet_file.schema_arrow.names
+        if not name.startswith("__index_level_")
+    ]
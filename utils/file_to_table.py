@@ -0,0 +1,199 @@
+from __future__ import annotations
+import functools
+import io
+import json
+import logging
+from utils.json_array import infer_json_types
+from utils.lazy_import import lazy_import
+
+pa = lazy_import("pyarrow")
+pv = lazy_import("pyarrow.csv")
+pj = lazy_import("pyarrow.json")
+pq = lazy_import("pyarrow.parquet")
+
+logger = logging.getLogger(__name__)
+
+
+@functools.cache
+def csv_convert_options() -> pv.ConvertOptions:
+    """
+    parsing options mirroring the defaults of pd.read_csv so both
+    engines infer the same types from the same file
+    """
+
+    from pandas._libs.parsers import STR_NA_VALUES
+
+    return pv.ConvertOptions(
+        null_values=sorted(STR_NA_VALUES),
+        strings_can_be_null=True,
+        true_values=["True", "TRUE", "true"],
+        false_values=["False", "FALSE", "false"],
+        # pandas never parses timestamps on its own, every value "%Y"
+        # could match is already inferred as an int so this keeps
+        # timestamps as plain strings
+        timestamp_parsers=["%Y"],
+    )
+
+
+def file_to_table(file_body, format: str, skip_columns=None) -> pa.Table:
+    """
+    Reads a boto3 Streaming Body into a pyarrow Table
+    using the multithreaded arrow readers
+
+    Args:
+        file_body (StreamingBody): A boto3 StreamingBody object
+        format (str): The format of the file
+                ('csv', 'json', 'jsonl', 'ndjson' or 'parquet')
+        skip_columns (list): columns that do not need to be
+                decoded, only honoured for parquet; they are
+                kept in place as all null placeholder columns
+
+    Return:
+        pa.Table or None: The contents of the file as a
+        Table if successful; None if the file cannot be read.
+    """
+
+    try:
+        match format:
+            case "csv":
+                table = pv.read_csv(
+                    file_body, convert_options=csv_convert_options()
+                )
+            case "json":
+                # the arrow json reader only handles one object per
+                # line, a top level array is parsed by the json module
+                table = _json_types(_records_to_table(json.load(file_body)))
+            case "jsonl" | "ndjson":
+                table = _json_types(
+                    _read_json_lines(io.BytesIO(file_body.read()))
+                )
+            case "parquet":
+                buffer = io.BytesIO(file_body.read())
+                table = _read_parquet_projected(buffer, skip_columns)
+            case _:
+                logger.warning("The provided format doesn't match")
+                return None
+    except Exception:
+        logger.error("Something went wrong ", exc_info=True)
+        return None
+
+    return table
+
+
+def _records_to_table(records: list) -> pa.Table:
+    """
+    table of json records with a column per key found in any of
+    them, in order of first appearance like a DataFrame of the
+    records; records missing a key get a null
+    """
+
+    columns = {}
+    for record in records:
+        for key in record:
+            columns.setdefault(key, None)
+
+    return pa.table(
+        {key: [record.get(key) for record in records] for key in columns}
+    )
+
+
+def _read_json_lines(buffer) -> pa.Table:
+    """
+    reads json lines with the arrow reader, fields it inferred as
+    timestamps are read again as the strings written in the file,
+    as pandas keeps them; an empty file is an empty table
+    """
+
+    # the arrow reader rejects a file without any line, pandas
+    # reads it as a frame without rows or columns
+    if not buffer.getvalue().strip():
+        return pa.table({})
+
+    table = pj.read_json(buffer)
+    schema = pa.schema(
+        [
+            field.with_type(_without_timestamps(field.type))
+            for field in table.schema
+        ]
+    )
+
+    if schema.equals(table.schema):
+        return table
+
+    buffer.seek(0)
+
+    return pj.read_json(
+        buffer, parse_options=pj.ParseOptions(explicit_schema=schema)
+    )
+
+
+def _json_types(table: pa.Table) -> pa.Table:
+    """
+    the columns of a json table typed as the pandas engine reads
+    them, see utils.json_array.infer_json_types: numbers written as
+    strings become numbers, integral floats ints and the values of
+    columns named like dates timestamps; nested columns are left
+    as they are, the inference never changes them
+    """
+
+    flat = [
+        position
+        for position, field in enumerate(table.schema)
+        if not pa.types.is_nested(field.type)
+    ]
+    if not flat:
+        return table
+
+    typed = infer_json_types(table.select(flat).to_pandas())
+
+    for position, (_, column) in zip(flat, typed.items()):
+        table = table.set_column(
+            position,
+            table.field(position).name,
+            pa.Array.from_pandas(column),
+        )
+
+    return table
+
+
+def _without_timestamps(kind: pa.DataType) -> pa.DataType:
+    """kind with every timestamp, nested ones too, made a string"""
+
+    if pa.types.is_timestamp(kind):
+        return pa.string()
+    if pa.types.is_struct(kind):
+        return pa.struct(
+            [
+                kind.field(i).with_type(
+                    _without_timestamps(kind.field(i).type)
+                )
+                for i in range(kind.num_fields)
+            ]
+        )
+    if pa.types.is_list(kind):
+        return pa.list_(_without_timestamps(kind.value_type))
+
+    return kind
+
+
+def _read_parquet_projected(source, skip_columns) -> pa.Table:
+    """
+    reads a parquet file, columns listed in skip_columns are not
+    decoded and are replaced by null placeholders of the same length
+    """
+
+    if not skip_columns:
+        return pq.read_table(source)
+
+    parquet_file = pq.ParquetFile(source)
+    names = parquet_file.schema_arrow.names
+    columns = [c for c in names if c not in skip_columns]
+
+    table = parquet_file.read(columns=columns)
+    num_rows = parquet_file.metadata.num_rows
+
+    for position, name in enumerate(names):
+        if name in skip_columns:
+            table = table.add_column(position, name, pa.nulls(num_rows))
+
+    return table
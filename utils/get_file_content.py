@@ -1,29 +1,34 @@
-import re
+from __future__ import annotations
 import logging
-import boto3
-from typing import Optional
-from botocore.response import StreamingBody
+from typing import TYPE_CHECKING, Optional, Union
+from utils.ranged_stream import RangedStream, PART_SIZE
+from utils.s3_url import parse_s3_url
+from utils.s3_client import get_s3_client
 
-
-logging.basicConfig(
-    filename="app.log",
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    force=True,
-)
+if TYPE_CHECKING:
+    from botocore.response import StreamingBody
 
 logger = logging.getLogger(__name__)
 
+# objects smaller than this are fetched with a single GET
+# even when ranged GETs are requested
+RANGED_MIN_SIZE = 2 * PART_SIZE
+
 
-def get_file_content(flocation: str) -> Optional[StreamingBody]:
+def get_file_content(
+    flocation: str, ranged: bool = False
+) -> Optional[Union[StreamingBody, RangedStream]]:
     """
     retrieve file content from the bucket
 
     Args:
         flocation: url of the file in s3 bucket
+        ranged: fetch objects of at least RANGED_MIN_SIZE bytes
+        as concurrent ranged GETs instead of a single stream
 
     Return:
-        boto StreamingBody contaning the file content if file found
+        boto StreamingBody contaning the file content if file found,
+        a RangedStream reading it the same way for a ranged fetch
         returns None if failed at any point
     """
 
@@ -32,23 +37,29 @@ def get_file_content(flocation: str) -> Optional[StreamingBody]:
         logger.error("wrong input type for 'flocation'")
         return None
 
-    # regex pattern, returns bucket name in group 1
-    # and key in group 2
-    pattern = re.compile(r"^s3://([^/]+)/(.+)$")
-    match_ = pattern.match(flocation)
+    location = parse_s3_url(flocation)
 
-    # ruling out AttributeError if no match found
-    if not match_:
+    if location is None:
         logger.error(f"Invalid S3 URL: {flocation}")
         return None
 
-    # getting bucket name and key from the capture groups
-    bucket = match_.group(1)
-    key = match_.group(2)
+    bucket, key = location
 
     try:
-        # creating boto3 client
-        s3_client = boto3.client("s3")
+        # reusing the shared boto3 client and its connections
+        s3_client = get_s3_client()
+
+        # large objects are split in ranges fetched concurrently
+        if ranged:
+            head = s3_client.head_object(Bucket=bucket, Key=key)
+            if head["ContentLength"] >= RANGED_MIN_SIZE:
+                return RangedStream(
+                    s3_client,
+                    bucket,
+                    key,
+                    head["ContentLength"],
+                    etag=head["ETag"],
+                )
 
         # retrieving the file content from the bucket
         s3_response = s3_client.get_object(Bucket=bucket, Key=key)
@@ -60,3 +71,69 @@ def get_file_content(flocation: str) -> Optional[StreamingBody]:
         return None
 
     return s3_response["Body"]
+
+
+def fetch_if_changed(
+    flocation: str, etag: Optional[str] = None, ranged: bool = False
+) -> Optional[tuple]:
+    """
+    get_file_content as a conditional GET, the body is only
+    downloaded if the object no longer has the given etag
+
+    Args:
+        flocation: url of the file in s3 bucket
+        etag: ETag of the copy the caller already has, the
+        object is always fetched without it
+        ranged: fetch large objects as concurrent ranged GETs,
+        the check is then made with a HEAD
+
+    Return:
+        (body, etag, version id) of the object, body being None
+        when it still has the given etag; None if failed at
+        any point
+    """
+
+    location = parse_s3_url(flocation)
+
+    if location is None:
+        logger.error(f"Invalid S3 URL: {flocation}")
+        return None
+
+    bucket, key = location
+    condition = {} if etag is None else {"IfNoneMatch": etag}
+
+    try:
+        s3_client = get_s3_client()
+
+        if ranged:
+            head = s3_client.head_object(Bucket=bucket, Key=key, **condition)
+            if head["ContentLength"] >= RANGED_MIN_SIZE:
+                body = RangedStream(
+                    s3_client,
+                    bucket,
+                    key,
+                    head["ContentLength"],
+                    etag=head["ETag"],
+                )
+                return body, head["ETag"], head.get("VersionId")
+
+        s3_response = s3_client.get_object(Bucket=bucket, Key=key, **condition)
+
+    except Exception as error:
+        # s3 answers a matching If-None-Match with 304 Not Modified,
+        # raised by botocore as a ClientError
+        response = getattr(error, "response", None) or {}
+        status = response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+        if etag is not None and status == 304:
+            return None, etag, None
+
+        logger.error(
+            f"Failed to retrieve S3 object {bucket}/{key}", exc_info=True
+        )
+        return None
+
+    return (
+        s3_response["Body"],
+        s3_response.get("ETag"),
+        s3_response.get("VersionId"),
+    )
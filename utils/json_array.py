@@ -0,0 +1,331 @@
+from __future__ import annotations
+import codecs
+import functools
+import io
+import json
+from typing import Iterable, Iterator, Optional
+from utils.lazy_import import lazy_import
+from utils.schema import read_options, apply_schema
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+
+# bytes pulled from the body per read
+BLOCK_SIZE = 1024 * 1024
+
+# records parsed into a single dataframe at a time
+DEFAULT_BATCH_SIZE = 100_000
+
+_WHITESPACE = b" \t\r\n"
+_BACKSLASH = ord("\\")
+_QUOTE = ord('"')
+_COMMA = ord(",")
+
+# a value the json reader only turns into a date in a column whose
+# name is like a date's
+_DATE_PROBE = "2020-01-02"
+
+
+def iter_json_array(
+    file_body, batch_size: Optional[int] = None
+) -> Iterator[list]:
+    """
+    splits a top level json array into the source bytes of its
+    elements as they arrive and yields them in lists of batch_size,
+    only the current batch and the unsplit tail of the last read
+    are held in memory
+
+    the elements are not parsed here, a malformed one is only
+    rejected once the caller parses it
+
+    Args:
+        file_body (StreamingBody): A boto3 StreamingBody object
+        batch_size (int): maximum number of elements per list,
+                DEFAULT_BATCH_SIZE by default
+
+    Raise:
+        ValueError: if the body is not a single json array
+    """
+
+    batch_size = batch_size or DEFAULT_BATCH_SIZE
+
+    data, final = _skip_to_array(file_body)
+    batch = []
+    opened = True
+    ended = False
+
+    while not ended:
+        elements, consumed, ended = _split_elements(data, opened)
+        opened = opened and not elements
+
+        start = 0
+        while start < len(elements):
+            end = start + batch_size - len(batch)
+            batch.extend(elements[start:end])
+            start = end
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+
+        if ended:
+            data = data[consumed:]
+        elif final:
+            raise ValueError("Incomplete json array at the end of the file")
+        else:
+            # the read grows with the pending element so a huge one
+            # is rescanned a logarithmic number of times
+            pending = data[consumed:]
+            block = file_body.read(max(BLOCK_SIZE, len(pending)))
+            final = not block
+            data = pending + block
+
+    # nothing but whitespace may follow the array
+    while data:
+        if data.strip(_WHITESPACE):
+            raise ValueError("Unexpected data after the json array")
+        data = file_body.read(BLOCK_SIZE)
+
+    if batch:
+        yield batch
+
+
+def _skip_to_array(file_body):
+    """
+    reads past the leading whitespace and the opening bracket,
+    returns the data that follows it and whether the body is done
+    """
+
+    data = b""
+    final = False
+
+    while True:
+        block = file_body.read(BLOCK_SIZE)
+        final = not block
+        data = (data + block).removeprefix(codecs.BOM_UTF8)
+        data = data.lstrip(_WHITESPACE)
+
+        if data.startswith(b"["):
+            return data[1:], final
+        if data or final:
+            raise ValueError("Expected a json array")
+
+
+@functools.cache
+def _lookup_tables() -> tuple:
+    """
+    (structural, depth change) lookup tables indexed by byte value,
+    built on first use so numpy is only imported by json arrays
+    """
+
+    structural = np.zeros(256, dtype=bool)
+    structural[list(b"{}[],")] = True
+    depth_change = np.zeros(256, dtype=np.int64)
+    depth_change[list(b"{[")] = 1
+    depth_change[list(b"}]")] = -1
+
+    return structural, depth_change
+
+
+def _split_elements(data: bytes, opened: bool):
+    """
+    finds the elements of the array in data, which starts right
+    after the opening bracket (opened) or a separating comma, from
+    the commas and brackets sitting outside of strings in a few
+    vectorized passes
+
+    Return:
+        (list of element bytes, number of bytes consumed, whether
+        the closing bracket of the array was reached)
+    """
+
+    block = np.frombuffer(data, dtype=np.uint8)
+
+    # a quote is escaped when an odd number of backslashes precedes it
+    quotes = np.flatnonzero(block == _QUOTE)
+    backslashes = block == _BACKSLASH
+    if backslashes.any() and len(quotes):
+        positions = np.arange(len(block))
+        last_other = np.where(backslashes, -1, positions)
+        last_other = np.maximum.accumulate(last_other)
+        before = np.maximum(quotes - 1, 0)
+        run = np.where(quotes > 0, before - last_other[before], 0)
+        quotes = quotes[run % 2 == 0]
+
+    # a bracket or comma is structural when an even number of
+    # quotes comes before it
+    structural_bytes, depth_change = _lookup_tables()
+    structural = np.flatnonzero(structural_bytes[block])
+    if len(quotes):
+        outside = np.searchsorted(quotes, structural) % 2 == 0
+        structural = structural[outside]
+
+    chars = block[structural]
+    depth = np.cumsum(depth_change[chars])
+
+    # the array closes where the depth first drops below its own
+    closing = np.flatnonzero(depth < 0)
+    ended = bool(len(closing))
+    stop = int(structural[closing[0]]) if ended else len(block)
+
+    separators = structural[(chars == _COMMA) & (depth == 0)]
+    separators = separators[separators < stop].tolist()
+
+    bounds = [-1] + separators
+    if ended:
+        bounds.append(stop)
+
+    elements = [
+        data[start + 1 : end]  # noqa: E203
+        for start, end in zip(bounds[:-1], bounds[1:])
+    ]
+
+    for element in elements:
+        if not element.strip(_WHITESPACE):
+            # an array opened and closed right away holds nothing
+            if opened and ended and len(elements) == 1:
+                return [], stop + 1, True
+            raise ValueError("Empty element in the json array")
+
+    consumed = stop + 1 if ended else bounds[-1] + 1
+
+    return elements, consumed, ended
+
+
+def read_json_batches(
+    file_body,
+    batch_size: Optional[int] = None,
+    schema=None,
+    paths=None,
+    infer: bool = True,
+) -> Iterator[pd.DataFrame]:
+    """
+    reads a top level json array of records as dataframes of at
+    most batch_size rows, every batch goes through pd.read_json so
+    its types are inferred as pd.read_json would, unless a schema
+    (see utils.schema) replaces the inference; the inference only
+    sees the batch, a column can get another type in each of them
+
+    with infer=False and no schema the values are kept as parsed,
+    see read_json_frame
+
+    the nested values of paths (utils.json_paths.JsonPaths) are
+    masked in every batch as soon as it is parsed
+    """
+
+    options = read_options("json", schema)
+    if not infer and not options:
+        options = {
+            "dtype": False,
+            "convert_dates": False,
+            "convert_axes": False,
+        }
+
+    for batch in iter_json_array(file_body, batch_size):
+        records = b"[" + b",".join(batch) + b"]"
+        df = pd.read_json(io.BytesIO(records), orient="records", **options)
+        if paths is not None:
+            df = paths.redact_frame(df)
+        yield apply_schema(df, "json", schema)
+
+
+def read_json_frame(file_body, schema=None, paths=None) -> pd.DataFrame:
+    """
+    reads a whole top level json array of records a batch at a
+    time, the raw text and every parsed record are never in memory
+    at once; without a schema the batches are parsed as they are
+    and the types are inferred once on the whole frame, so they are
+    the same as pd.read_json on the file whatever the batch size
+    """
+
+    batches = list(read_json_batches(file_body, None, schema, paths, False))
+    df = pd.concat(batches, ignore_index=True) if batches else pd.DataFrame()
+
+    if read_options("json", schema):
+        return df
+
+    return infer_json_types(df)
+
+
+def infer_json_types(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    the type inference of pd.read_json (numbers, ints held as
+    floats, dates in columns named like dates, column labels) run
+    on a frame read with dtype=False, convert_dates=False and
+    convert_axes=False
+
+    pandas only runs it inside its reader, so every column is
+    written back as a json list and read again as a series, only
+    the text of one column is held at a time
+    """
+
+    # a record holding every label tells how the reader converts
+    # them (a "1" key can become the column 1) and which of them
+    # are named like dates
+    probe = pd.read_json(
+        io.StringIO(
+            json.dumps([dict.fromkeys(map(str, df.columns), _DATE_PROBE)])
+        ),
+        orient="records",
+    )
+    dates = [
+        pd.api.types.is_datetime64_any_dtype(dtype) for dtype in probe.dtypes
+    ]
+
+    columns = []
+
+    for (_, column), convert_dates in zip(df.items(), dates):
+        # the values were parsed from the file already, they are
+        # read back exactly
+        typed = pd.read_json(
+            io.StringIO(json.dumps(column.tolist())),
+            typ="series",
+            orient="records",
+            convert_dates=convert_dates,
+            precise_float=True,
+        )
+
+        # a key missing from a record is NaN in an object column
+        # and a null None, the reader makes both None
+        if typed.dtype == object and column.dtype == object:
+            missing = [isinstance(value, float) for value in column]
+            typed[column.isna().to_numpy() & missing] = np.nan
+
+        columns.append(typed.set_axis(df.index))
+
+    if not columns:
+        return df.set_axis(probe.columns, axis=1)
+
+    return pd.concat(columns, axis=1).set_axis(probe.columns, axis=1)
+
+
+def frame_batches(
+    df: pd.DataFrame, batch_size: Optional[int] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    slices a dataframe into views of at most batch_size rows,
+    DEFAULT_BATCH_SIZE by default
+    """
+
+    batch_size = batch_size or DEFAULT_BATCH_SIZE
+    for start in range(0, len(df), batch_size):
+        yield df.iloc[start : start + batch_size]  # noqa: E203
+
+
+def write_json_array(frames: Iterable[pd.DataFrame], buffer):
+    """
+    writes dataframes as one json array of records by stripping
+    the brackets of every frame and joining them with commas, so
+    only one frame is rendered to text at a time
+    """
+
+    buffer.write(b"[")
+    first = True
+    for frame in frames:
+        if len(frame) == 0:
+            continue
+        records = frame.to_json(orient="records")[1:-1]
+        if not first:
+            buffer.write(b",")
+        buffer.write(records.encode("utf-8"))
+        first = False
+    buffer.write(b"]")
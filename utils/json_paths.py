@@ -0,0 +1,187 @@
+from __future__ import annotations
+import logging
+import re
+from typing import Iterable
+from utils.strategies import MASK
+from utils.lazy_import import lazy_import
+
+pd = lazy_import("pandas")
+
+logger = logging.getLogger(__name__)
+
+# step matching every value of an object or item of a list
+ANY = "*"
+
+# a key after the start or a ".", or a "[index]" / "[*]"
+_STEP = re.compile(r"(?:^|\.)([^.\[\]]+)|\[(\*|-?\d+)\]")
+
+
+def is_path(field: str) -> bool:
+    """whether a pii field names a nested json value, not a column"""
+
+    return "." in field or "[" in field
+
+
+def parse_path(path: str) -> tuple:
+    """
+    splits a path such as "customer.address.street" or
+    "contacts[*].email" into its steps: keys, list indexes and ANY
+    for "*" (every value of an object) or "[*]" (every list item)
+
+    Raises:
+        ValueError: if the path is malformed
+    """
+
+    steps = []
+    position = 0
+
+    while position < len(path):
+        match = _STEP.match(path, position)
+        if match is None or (position == 0 and match.group(1) is None):
+            raise ValueError(f"Invalid path: {path}")
+
+        key, index = match.groups()
+        if key is not None:
+            steps.append(key)
+        else:
+            steps.append(ANY if index == ANY else int(index))
+        position = match.end()
+
+    if not steps or path.startswith("."):
+        raise ValueError(f"Invalid path: {path}")
+
+    return tuple(steps)
+
+
+class JsonPaths:
+    """
+    paths to nested json values compiled once into a function per
+    top level key, so the paths sharing a prefix walk it once per
+    record, and applied in place to the records parsed by the json
+    readers
+
+    the first step of a path is the top level key (the DataFrame
+    column, "*" for all of them), the value at the end of a path is
+    replaced with "***" whatever it holds; records missing a step
+    along the way are left as they are
+
+    a column named like the whole path (a flat "user.email" key) is
+    masked as a column rather than walked into
+
+    Args:
+        paths: paths accepted by parse_path
+
+    Raises:
+        ValueError: if a path is malformed
+    """
+
+    def __init__(self, paths: Iterable[str]):
+        # {step: child trie}, None where a path ends
+        trie = {}
+        # {path: its top level key}
+        self._paths = {}
+
+        for path in paths:
+            node = trie
+            *steps, last = parse_path(path)
+            self._paths[path] = steps[0] if steps else last
+            for step in steps:
+                child = node.setdefault(step, {})
+                # a shorter path already masks the whole value
+                if child is None:
+                    break
+                node = child
+            else:
+                node[last] = None
+
+        self._redact = _compile(trie)
+        # {top level key: function masking its value, None to mask
+        # the whole value}
+        self._columns = {
+            step: None if child is None else _compile(child)
+            for step, child in trie.items()
+        }
+
+    def redact(self, record):
+        """masks the paths of one parsed json record, in place"""
+
+        self._redact(record)
+
+    def redact_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        masks the paths in the object columns of a DataFrame read
+        by pd.read_json, whose nested values are python dicts and
+        lists; they are changed in place and df is returned
+        """
+
+        for path, step in self._paths.items():
+            if path in df.columns:
+                df[path] = MASK
+            elif step != ANY and step not in df.columns:
+                logger.warning(f"pii field: {path} was not found")
+
+        for step, redact in self._columns.items():
+            columns = df.columns if step == ANY else [step]
+            for column in columns:
+                if column not in df.columns:
+                    continue
+                if redact is None:
+                    df[column] = MASK
+                elif df[column].dtype == object:
+                    for value in df[column].to_numpy():
+                        redact(value)
+
+        return df
+
+
+def _compile(node: dict):
+    """
+    turns a trie node into a function masking, in place, the
+    values its steps lead to under the value it is given; the steps
+    are sorted by kind here so a record only pays for the lookups
+    """
+
+    keys = []
+    indexes = []
+    every = []
+
+    for step, child in node.items():
+        redact = None if child is None else _compile(child)
+        if step == ANY:
+            every.append(redact)
+        elif isinstance(step, int):
+            indexes.append((step, redact))
+        else:
+            keys.append((step, redact))
+
+    def apply(value):
+        if type(value) is dict:
+            for key, redact in keys:
+                if key in value:
+                    if redact is None:
+                        value[key] = MASK
+                    else:
+                        redact(value[key])
+            for redact in every:
+                for key in value:
+                    if redact is None:
+                        value[key] = MASK
+                    else:
+                        redact(value[key])
+
+        elif type(value) is list:
+            size = len(value)
+            for index, redact in indexes:
+                if -size <= index < size:
+                    if redact is None:
+                        value[index] = MASK
+                    else:
+                        redact(value[index])
+            for redact in every:
+                if redact is None:
+                    value[:] = [MASK] * size
+                else:
+                    for item in value:
+                        redact(item)
+
+    return apply
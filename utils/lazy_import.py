@@ -0,0 +1,36 @@
+import importlib
+
+
+class LazyModule:
+    """
+    stands in for a module until one of its attributes is used, it
+    is imported then; keeps pandas, pyarrow, numpy and boto3 out of
+    the import of the package so each call only loads what its
+    format and engine need
+
+    Args:
+        name: dotted name of the module, e.g. "pyarrow.parquet"
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr: str):
+        module = self._module
+        if module is None:
+            module = self._module = importlib.import_module(self._name)
+
+        return getattr(module, attr)
+
+    def __repr__(self) -> str:
+        return f"<lazy module {self._name!r}>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """
+    module-level replacement for "import name", the module is
+    imported the first time one of its attributes is used
+    """
+
+    return LazyModule(name)
@@ -0,0 +1,74 @@
+import logging
+from typing import Iterator, Optional
+from utils.get_file_content import get_file_content
+from utils.s3_client import get_s3_client
+from utils.s3_url import parse_s3_prefix
+
+logger = logging.getLogger(__name__)
+
+
+def list_s3_objects(
+    bucket: str, prefix: str, page_size: Optional[int] = None
+) -> Iterator[str]:
+    """
+    lists the keys under prefix one page at a time, the next page
+    is only requested once the keys of the current one are consumed
+    so the caller can start on the first keys straight away
+
+    folder markers (keys ending with "/") are skipped
+
+    Args:
+        bucket: name of the bucket
+        prefix: key prefix of the listed objects
+        page_size: keys per listing request, 1000 by default
+    """
+
+    paginator = get_s3_client().get_paginator("list_objects_v2")
+    pagination = {"PageSize": page_size} if page_size else {}
+
+    for page in paginator.paginate(
+        Bucket=bucket, Prefix=prefix, PaginationConfig=pagination
+    ):
+        for obj in page.get("Contents", []):
+            if not obj["Key"].endswith("/"):
+                yield obj["Key"]
+
+
+def read_manifest(flocation: str) -> Iterator[tuple]:
+    """
+    reads a manifest listing one object per line, either as a full
+    s3 url or as a key of the bucket holding the manifest; blank
+    lines and lines starting with # are skipped
+
+    the manifest is streamed line by line
+
+    Return:
+        iterator of (bucket, key)
+
+    Raise:
+        ValueError: if the manifest cannot be read or holds
+        an invalid line
+    """
+
+    body = get_file_content(flocation)
+
+    if body is None:
+        raise ValueError(f"Failed to read the manifest {flocation}")
+
+    manifest_bucket, _ = parse_s3_prefix(flocation)
+
+    for number, line in enumerate(body.iter_lines(), start=1):
+        entry = line.decode("utf-8").strip()
+
+        if not entry or entry.startswith("#"):
+            continue
+
+        if entry.startswith("s3://"):
+            location = parse_s3_prefix(entry)
+            if location is None or not location[1]:
+                raise ValueError(
+                    f"Invalid manifest entry on line {number}: {entry}"
+                )
+            yield location
+        else:
+            yield manifest_bucket, entry
@@ -0,0 +1,151 @@
+import io
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+# bytes fetched per ranged GET
+PART_SIZE = 8 * 1024 * 1024
+
+# ranged GETs running at the same time
+MAX_WORKERS = 8
+
+# parts fetched ahead of the reader, bounds the memory held by the
+# stream to READ_AHEAD * PART_SIZE
+READ_AHEAD = 8
+
+
+class RangedStream(io.RawIOBase):
+    """
+    readable binary stream over an s3 object fetched as concurrent
+    ranged GETs, parts are downloaded by a thread pool ahead of the
+    reader and handed out in order so it reads like a StreamingBody
+
+    Args:
+        s3_client: boto3 s3 client
+        bucket: name of the bucket holding the object
+        key: key of the object
+        size: ContentLength of the object
+        etag: ETag of the object, every range is fetched with
+        IfMatch so a change mid download fails instead of mixing
+        two versions
+        part_size: bytes per ranged GET, PART_SIZE by default
+        max_workers: concurrent GETs, MAX_WORKERS by default
+        read_ahead: parts fetched ahead of the reader,
+        READ_AHEAD by default
+    """
+
+    def __init__(
+        self,
+        s3_client,
+        bucket: str,
+        key: str,
+        size: int,
+        etag: Optional[str] = None,
+        part_size: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        read_ahead: Optional[int] = None,
+    ):
+        super().__init__()
+        self.bucket = bucket
+        self.key = key
+        self.size = size
+        self._client = s3_client
+        self._etag = etag
+        self._part_size = part_size or PART_SIZE
+        self._read_ahead = max(read_ahead or READ_AHEAD, 1)
+
+        self._executor = ThreadPoolExecutor(max_workers or MAX_WORKERS)
+        self._next_start = 0
+        self._pending = deque()
+        self._part = memoryview(b"")
+        self._position = 0
+
+        self._schedule()
+
+    def readable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        if not self._part:
+            if not self._pending:
+                return 0
+            self._part = memoryview(self._pending.popleft().result())
+            self._schedule()
+
+        size = min(len(buffer), len(self._part))
+        buffer[:size] = self._part[:size]
+        self._part = self._part[size:]
+        self._position += size
+
+        return size
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            return self.readall()
+
+        # joining whole parts instead of copying through readinto
+        pieces = []
+        while size > 0:
+            if not self._part:
+                if not self._pending:
+                    break
+                self._part = memoryview(self._pending.popleft().result())
+                self._schedule()
+
+            piece = self._part[:size]
+            self._part = self._part[len(piece) :]  # noqa: E203
+            pieces.append(piece)
+            size -= len(piece)
+
+        data = b"".join(pieces)
+        self._position += len(data)
+
+        return data
+
+    def readall(self) -> bytes:
+        return self.read(self.size - self._position)
+
+    def close(self):
+        if not self.closed:
+            for future in self._pending:
+                future.cancel()
+            self._executor.shutdown(wait=True)
+            self._pending.clear()
+            self._part = memoryview(b"")
+        super().close()
+
+    def _schedule(self):
+        """keeps read_ahead ranged GETs queued after the current part"""
+
+        while (
+            len(self._pending) < self._read_ahead
+            and self._next_start < self.size
+        ):
+            start = self._next_start
+            end = min(start + self._part_size, self.size)
+            self._pending.append(
+                self._executor.submit(self._fetch, start, end)
+            )
+            self._next_start = end
+
+    def _fetch(self, start: int, end: int) -> bytes:
+        kwargs = {"IfMatch": self._etag} if self._etag else {}
+        response = self._client.get_object(
+            Bucket=self.bucket,
+            Key=self.key,
+            Range=f"bytes={start}-{end - 1}",
+            **kwargs,
+        )
+
+        data = response["Body"].read()
+
+        if len(data) != end - start:
+            raise ValueError(
+                f"Got {len(data)} bytes for range {start}-{end - 1} "
+                f"of {self.bucket}/{self.key}"
+            )
+
+        return data
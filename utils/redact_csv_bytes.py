@@ -0,0 +1,313 @@
+import codecs
+import io
+import re
+import logging
+from utils.lazy_import import lazy_import
+
+np = lazy_import("numpy")
+
+logger = logging.getLogger(__name__)
+
+# bytes pulled from the body per read
+BLOCK_SIZE = 1024 * 1024
+
+REDACTED = b"***"
+
+# one RFC 4180 field, either quoted (with "" escapes) or bare
+_FIELD = re.compile(rb'"(?:[^"]|"")*"|[^,"\r\n]*')
+_LINE_END = re.compile(rb"\r?\n")
+
+_COMMA = ord(",")
+_NEWLINE = ord("\n")
+_CARRIAGE_RETURN = ord("\r")
+_QUOTE = ord('"')
+_FIELD_START = list(b',\n"')
+_FIELD_END = list(b',\r\n"')
+
+
+def redact_csv_bytes(file_body, pii_fields: list, output=None):
+    """
+    redact the pii columns of a csv without parsing it into a
+    dataframe, the byte range of every pii field is swapped for
+    the redaction token and every other byte is copied unchanged
+
+    quoted fields, "" escapes, embedded newlines and \\r\\n line
+    endings are handled as described in RFC 4180
+
+    Args:
+        file_body (StreamingBody): A boto3 StreamingBody object
+        pii_fields: list contaning fields to be redaced
+        output: optional writable binary file-like object
+        to write into, a new BytesIO is used if not provided
+
+    Return:
+        the output stream the content was written to,
+        rewound and ready to read when it was created here;
+        None if the csv could not be redacted
+    """
+
+    # writing into a fresh buffer unless the caller provided a sink
+    buffer = io.BytesIO() if output is None else output
+
+    try:
+        _redact_stream(file_body, pii_fields, buffer)
+    except Exception:
+        logger.error("Something went wrong ", exc_info=True)
+        return None
+
+    if output is None:
+        buffer.seek(0)
+
+    return buffer
+
+
+def _redact_stream(file_body, pii_fields: list, buffer):
+    """
+    reads the body block by block, records split across two
+    blocks are carried over to the next one
+    """
+
+    pending = b""
+    pii_indices = None
+    n_columns = 0
+    final = False
+
+    while not final:
+        block = file_body.read(BLOCK_SIZE)
+        final = not block
+        data = pending + block
+        pos = 0
+
+        if pii_indices is None:
+            record = _next_record(data, 0, final)
+            if record is None:
+                pending = data
+                continue
+
+            spans, pos = record
+            names = [_unquote(data[start:end]) for start, end in spans]
+            pii_indices = _pii_indices(names, pii_fields)
+            n_columns = len(names)
+
+            # the header is copied as is
+            buffer.write(data[:pos])
+
+        if not pii_indices:
+            buffer.write(data[pos:])
+            pending = b""
+            continue
+
+        pos = _redact_records(data, pos, final, n_columns, pii_indices, buffer)
+        pending = data[pos:]
+
+    if pending:
+        raise ValueError("Incomplete csv record at the end of the file")
+
+
+def _pii_indices(names: list, pii_fields: list) -> set:
+    """positions of the pii columns in the header"""
+
+    for field in pii_fields:
+        if field not in names:
+            logger.warning(f"pii field: {field} was not found")
+
+    return {i for i, name in enumerate(names) if name in pii_fields}
+
+
+def _unquote(field: bytes) -> str:
+    """header field as a column name"""
+
+    field = field.removeprefix(codecs.BOM_UTF8)
+
+    if field.startswith(b'"'):
+        field = field[1:-1].replace(b'""', b'"')
+
+    return field.decode("utf-8")
+
+
+def _redact_block(data: bytes, pos: int, final: bool, n_columns, pii_indices):
+    """
+    redacts every complete record of data starting at pos in a few
+    vectorized passes, the field boundaries of all the records are
+    found at once from the positions of the commas and newlines
+    sitting outside of quotes
+
+    Return:
+        (redacted bytes, number of bytes consumed) or None when the
+        block is not regular (blank, short or long lines, stray
+        quotes) and has to go through the tokenizer instead
+    """
+
+    if n_columns < 2 or pos == len(data):
+        return None
+
+    block = np.frombuffer(data, dtype=np.uint8, offset=pos)
+
+    # a comma or newline is a separator when an even number of
+    # quotes comes before it, "" escapes cancel each other out
+    quotes = np.flatnonzero(block == _QUOTE)
+    newlines = np.flatnonzero(block == _NEWLINE)
+    if len(quotes):
+        newlines = newlines[np.searchsorted(quotes, newlines) % 2 == 0]
+
+    line_ends = newlines
+    consumed = int(newlines[-1]) + 1 if len(newlines) else 0
+    if final and consumed < len(block):
+        line_ends = np.append(newlines, len(block))
+        consumed = len(block)
+    if not len(line_ends):
+        return None
+
+    quotes = quotes[quotes < consumed]
+    if len(quotes) % 2 or not _quotes_are_valid(block, quotes):
+        return None
+
+    commas = np.flatnonzero(block[:consumed] == _COMMA)
+    if len(quotes):
+        commas = commas[np.searchsorted(quotes, commas) % 2 == 0]
+    if len(commas) != len(line_ends) * (n_columns - 1):
+        return None
+
+    # the commas are sorted, so when each line starts before its
+    # first comma and ends after its last one every line holds
+    # exactly n_columns - 1 of them
+    line_starts = np.concatenate(([0], line_ends[:-1] + 1))
+    commas = commas.reshape(len(line_ends), n_columns - 1)
+    if (commas[:, 0] < line_starts).any() or (
+        commas[:, -1] >= line_ends
+    ).any():
+        return None
+
+    # the last field stops before the \r of a \r\n line ending
+    carriage_return = block[line_ends - 1] == _CARRIAGE_RETURN
+
+    columns = sorted(pii_indices)
+    starts = np.column_stack((line_starts, commas + 1))[:, columns].ravel()
+    ends = np.column_stack((commas, line_ends - carriage_return))
+    ends = ends[:, columns].ravel()
+
+    # the bytes alternate between kept runs and pii fields, the
+    # fields are dropped and the token inserted where each one was
+    bounds = np.empty(2 * len(starts) + 2, dtype=np.int64)
+    bounds[0] = 0
+    bounds[1:-1:2] = starts
+    bounds[2:-1:2] = ends
+    bounds[-1] = consumed
+    runs = np.diff(bounds)
+
+    keep = np.ones(len(runs), dtype=bool)
+    keep[1::2] = False
+    kept = block[:consumed][np.repeat(keep, runs)]
+
+    positions = np.cumsum(runs[0:-1:2])
+    redacted = np.insert(
+        kept,
+        np.repeat(positions, len(REDACTED)),
+        np.tile(np.frombuffer(REDACTED, dtype=np.uint8), len(positions)),
+    )
+
+    return redacted.tobytes(), consumed
+
+
+def _quotes_are_valid(block, quotes) -> bool:
+    """
+    an opening quote has to start a field and a closing quote has to
+    end one, anything else is left for the tokenizer to reject
+    """
+
+    if not len(quotes):
+        return True
+
+    opening = quotes[0::2]
+    closing = quotes[1::2]
+
+    # an escaped "" is seen as a closing quote directly followed by
+    # an opening one, so a quote is a legal neighbour on both sides
+    before = block[np.maximum(opening - 1, 0)]
+    after = block[np.minimum(closing + 1, len(block) - 1)]
+
+    starts_field = np.isin(before, _FIELD_START) | (opening == 0)
+    ends_field = np.isin(after, _FIELD_END) | (closing == len(block) - 1)
+
+    return bool(starts_field.all() and ends_field.all())
+
+
+def _redact_records(data, pos, final, n_columns, pii_indices, buffer) -> int:
+    """
+    redacts every complete record of data starting at pos
+    and returns the position of the first unprocessed byte
+    """
+
+    block = _redact_block(data, pos, final, n_columns, pii_indices)
+    if block is not None:
+        redacted, consumed = block
+        buffer.write(redacted)
+        return pos + consumed
+
+    while pos < len(data):
+        # blank lines are copied through
+        line_end = _LINE_END.match(data, pos)
+        if line_end:
+            buffer.write(line_end.group())
+            pos = line_end.end()
+            continue
+        if pos == len(data) - 1 and data[pos] == ord("\r") and not final:
+            break
+
+        record = _next_record(data, pos, final)
+        if record is None:
+            break
+
+        spans, end = record
+        pieces = []
+        last = pos
+        for i, (start, stop) in enumerate(spans):
+            if i in pii_indices:
+                pieces.append(data[last:start])
+                pieces.append(REDACTED)
+                last = stop
+        pieces.append(data[last:end])
+
+        buffer.write(b"".join(pieces))
+        pos = end
+
+    return pos
+
+
+def _next_record(data: bytes, pos: int, final: bool):
+    """
+    tokenizes one record starting at pos
+
+    Return:
+        (list of (start, end) field spans, end of the record
+        including its line ending) or None if the record is not
+        complete yet and more data is needed
+    """
+
+    spans = []
+    while True:
+        field_start = pos
+        end = _FIELD.match(data, pos).end()
+        spans.append((pos, end))
+
+        if end == len(data):
+            return (spans, end) if final else None
+
+        if data.startswith(b",", end):
+            pos = end + 1
+            continue
+
+        line_end = _LINE_END.match(data, end)
+        if line_end:
+            return spans, line_end.end()
+
+        if not final:
+            # a quoted field cut by the end of the block, the rest of
+            # it (closing quote, "" escapes) has not arrived yet, or
+            # a last \r waiting for its \n
+            if data[field_start] == ord('"') or end == len(data) - 1:
+                return None
+        elif end == len(data) - 1 and data[end] == ord("\r"):
+            return spans, len(data)
+
+        raise ValueError(f"Malformed csv record at byte {field_start}")
@@ -1,37 +1,103 @@
-import pandas as pd
+from __future__ import annotations
 import logging
-
-logging.basicConfig(
-    filename="app.log",
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    force=True,
+from typing import Optional
+from utils.tokenizer import Tokenizer
+from utils.strategies import (
+    MASK,
+    compact_series,
+    parse_pii_fields,
+    partially_mask_series,
 )
+from utils.lazy_import import lazy_import
+
+pd = lazy_import("pandas")
 
 logger = logging.getLogger(__name__)
 
 
-def redact_pii(df_file: pd.DataFrame, pii_fields: list) -> pd.DataFrame:
+def redact_pii(
+    df_file: pd.DataFrame,
+    pii_fields: list,
+    tokenizer: Optional[Tokenizer] = None,
+) -> pd.DataFrame:
     """
     redact the pii field in the df based on the
     pii_field input
 
+    fields that were skipped while reading the file are listed
+    in df.attrs["source_columns"], they are added back as
+    redacted columns at their original position; the redacted
+    fields are dropped from the schema in df.attrs["source_schema"]
+    as their values no longer have its types
+
     Args:
         df_file: DataFrame contaning file content
-        pii_fields: list contaning fields to be redaced
+        pii_fields: list contaning fields to be redaced, names
+        are replaced with "***" and objects such as
+        {"field": "email", "strategy": "email_domain"} are
+        redacted with their strategy, see utils.strategies;
+        only masked fields can have been skipped
+        tokenizer: makes the tokens of the "token" fields
 
     Return:
-        Dataframe with pii fields being redacted
+        Dataframe with pii fields being redacted, its other
+        columns share their data with df_file: writing into
+        them (e.g. result.loc[0, "id"] = 1) changes df_file too
+        unless pandas copy-on-write is enabled
+
+    Raises:
+        ValueError: for an invalid field, or a "token" field
+        without tokenizer
     """
 
-    # taking a deep copy to avoid mutating original df
-    copy_df = df_file.copy(deep=True)
+    strategies = parse_pii_fields(pii_fields)
+
+    # taking a shallow copy, the untouched columns keep pointing
+    # at the original data and every redacted column is replaced
+    # by a new array, so redacting never writes into df_file
+    copy_df = df_file.copy(deep=False)
+
+    # columns of the file before any were skipped at read time
+    source_columns = copy_df.attrs.get("source_columns", [])
 
     # looping though pii list and redacing each column
-    for field in pii_fields:
+    for field, (strategy, keep) in strategies.items():
         if field in copy_df.columns:
-            copy_df[field] = "***"
-        else:
+            copy_df[field] = _redacted(
+                copy_df[field], strategy, keep, tokenizer
+            )
+        elif field not in source_columns:
             logger.warning(f"pii field: {field} was not found")
 
+    # putting back the skipped columns in their original position
+    for position, field in enumerate(source_columns):
+        if field not in copy_df.columns and field in strategies:
+            copy_df.insert(position, field, MASK)
+
+    source_schema = copy_df.attrs.get("source_schema")
+    if source_schema is not None:
+        for field in strategies:
+            if field in source_schema.names:
+                source_schema = source_schema.remove(
+                    source_schema.get_field_index(field)
+                )
+        copy_df.attrs["source_schema"] = source_schema
+
     return copy_df
+
+
+def _redacted(series, strategy: str, keep, tokenizer):
+    """the redacted values of one column"""
+
+    if strategy == "mask":
+        return MASK
+
+    if strategy == "token":
+        if tokenizer is None:
+            raise ValueError(f"No tokenizer for {series.name}")
+        return tokenizer.tokenize_series(series)
+
+    if strategy == "compact":
+        return compact_series(series)
+
+    return partially_mask_series(series, strategy, keep)
@@ -0,0 +1,70 @@
+from __future__ import annotations
+import logging
+from typing import Optional
+from utils.tokenizer import Tokenizer
+from utils.strategies import (
+    MASK,
+    compact_array,
+    parse_pii_fields,
+    partially_mask,
+)
+from utils.lazy_import import lazy_import
+
+np = lazy_import("numpy")
+pa = lazy_import("pyarrow")
+
+logger = logging.getLogger(__name__)
+
+
+def redact_table(
+    table: pa.Table, pii_fields: list, tokenizer: Optional[Tokenizer] = None
+) -> pa.Table:
+    """
+    redact the pii field in the arrow table based on the
+    pii_field input, tables are immutable so the untouched
+    columns are shared with the input instead of copied
+
+    Args:
+        table: pyarrow Table contaning file content
+        pii_fields: list contaning fields to be redaced, as names
+        or objects with a strategy, see redact_pii
+        tokenizer: makes the tokens of the "token" fields
+
+    Return:
+        Table with pii fields being redacted
+
+    Raises:
+        ValueError: for an invalid field, or a "token" field
+        without tokenizer
+    """
+
+    strategies = parse_pii_fields(pii_fields)
+
+    # a single "***" value taken once per row, built by arrow
+    # without creating a python object per row
+    redacted = pa.array([MASK], type=pa.string()).take(
+        np.zeros(table.num_rows, dtype=np.int32)
+    )
+
+    for field, (strategy, keep) in strategies.items():
+        position = table.schema.get_field_index(field)
+        if position == -1:
+            logger.warning(f"pii field: {field} was not found")
+            continue
+
+        column = table.column(position)
+
+        if strategy == "mask":
+            column = redacted
+        elif strategy == "token":
+            if tokenizer is None:
+                raise ValueError(f"No tokenizer for {field}")
+            column = tokenizer.tokenize_array(column)
+        elif strategy == "compact":
+            column = compact_array(column)
+        else:
+            column = partially_mask(column, strategy, keep)
+
+        table = table.set_column(position, field, column)
+
+    return table
@@ -0,0 +1,285 @@
+import os
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# bytes of redacted output kept on disk before the least recently
+# used entries are deleted
+MAX_BYTES = 1024 * 1024 * 1024
+
+# extension of the entry files, anything else in the directory
+# is left alone
+SUFFIX = ".result"
+
+# payload keys that don't change the bytes of the output
+_IGNORED_KEYS = (
+    "file_to_obfuscate",
+    "pii_fields",
+    "ranged_get",
+    "destination",
+    "cache",
+)
+
+
+class ResultCache:
+    """
+    size bounded LRU of redacted outputs stored in a local
+    directory, one file per entry named after result_key()
+
+    every entry keeps the ETag and VersionId of the object it was
+    made from, the ETag is sent back as a conditional GET so an
+    unchanged object is answered from disk without its body
+    being downloaded; the least recently used entries are deleted
+    once the outputs take more than max_bytes
+
+    the directory can be shared by processes, each keeps its own
+    index and byte count, rebuilt from the files when it starts
+
+    Args:
+        directory: where the entries are written, created if needed
+        max_bytes: size of the outputs kept, MAX_BYTES by default
+    """
+
+    def __init__(self, directory: str, max_bytes: Optional[int] = None):
+        self.directory = directory
+        self.max_bytes = max_bytes or MAX_BYTES
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def etag(self, key: str) -> Optional[str]:
+        """the ETag the output cached under key was made from"""
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            return None if entry is None else entry["etag"]
+
+    def get(self, key: str, etag: str) -> Optional[bytes]:
+        """
+        the output cached under key if it was made from the object
+        with this etag, None (a miss) otherwise
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None or entry["etag"] != etag:
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+
+        try:
+            with open(self._path(key), "rb") as f:
+                f.readline()
+                data = f.read()
+            # keeps the order for the next process loading the index
+            os.utime(self._path(key))
+        except OSError:
+            logger.error(f"Failed to read cached result {key}", exc_info=True)
+            self._forget(key)
+            with self._lock:
+                self._misses += 1
+            return None
+
+        with self._lock:
+            self._hits += 1
+
+        return data
+
+    def miss(self):
+        """counts a lookup that couldn't be answered from the cache"""
+
+        with self._lock:
+            self._misses += 1
+
+    def put(
+        self,
+        key: str,
+        data,
+        etag: Optional[str],
+        version_id: Optional[str] = None,
+    ):
+        """
+        stores the output data (bytes or a buffer) made from the
+        object with this etag, replacing the previous one; outputs
+        larger than the whole cache or without etag are not kept
+        """
+
+        size = len(memoryview(data))
+
+        if etag is None or size > self.max_bytes:
+            return
+
+        entry = {"etag": etag, "version_id": version_id, "size": size}
+
+        try:
+            # written aside first so a reader never sees half of it
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(json.dumps(entry).encode("utf-8") + b"\n")
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            logger.error(f"Failed to cache result {key}", exc_info=True)
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous["size"]
+            self._entries[key] = entry
+            self._size += size
+            evicted = self._evict()
+
+        for old_key in evicted:
+            self._remove(old_key)
+
+    def stats(self) -> dict:
+        """
+        Return:
+            {"entries", "bytes", "hits", "misses", "evictions",
+            "hit_rate"} since the cache was created
+        """
+
+        with self._lock:
+            lookups = self._hits + self._misses
+
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+            }
+
+    def _evict(self) -> list:
+        """drops the least recently used entries from the index"""
+
+        evicted = []
+
+        while self._size > self.max_bytes:
+            old_key, old_entry = self._entries.popitem(last=False)
+            self._size -= old_entry["size"]
+            self._evictions += 1
+            evicted.append(old_key)
+
+        return evicted
+
+    def _forget(self, key: str):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._size -= entry["size"]
+
+    def _remove(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def _load(self):
+        """indexes the entries already on disk, oldest used first"""
+
+        found = []
+
+        for name in os.listdir(self.directory):
+            if not name.endswith(SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, "rb") as f:
+                    entry = json.loads(f.readline())
+                found.append((os.path.getmtime(path), name, entry))
+            except (OSError, ValueError):
+                logger.warning(f"Skipping unreadable cached result {name}")
+
+        for _, name, entry in sorted(found, key=lambda item: item[0]):
+            self._entries[name[: -len(SUFFIX)]] = entry
+            self._size += entry["size"]
+
+        for old_key in self._evict():
+            self._remove(old_key)
+
+
+_lock = threading.Lock()
+_cache = None
+
+
+def configure_result_cache(directory: str, max_bytes: Optional[int] = None):
+    """
+    turns the result cache on for every following call of the
+    process, obfuscator_main leaves it off by default
+
+    Args:
+        directory: where the outputs are kept
+        max_bytes: size of the outputs kept, MAX_BYTES by default
+    """
+
+    global _cache
+
+    cache = ResultCache(directory, max_bytes)
+
+    with _lock:
+        _cache = cache
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """the result cache of the process, None when it is off"""
+
+    return _cache
+
+
+def reset_result_cache():
+    """turns the result cache off, the files stay on disk"""
+
+    global _cache
+
+    with _lock:
+        _cache = None
+
+
+def result_key(payload: dict, format: str) -> str:
+    """
+    digest naming the output of a single file payload: its bucket
+    and key, the set of pii fields and their strategies (order
+    and duplicates don't matter), the format and every option
+    that changes the bytes written (engine, schema, streaming, ...)
+    """
+
+    options = {
+        name: value
+        for name, value in payload.items()
+        if name not in _IGNORED_KEYS
+    }
+    identity = [
+        payload["file_to_obfuscate"],
+        sorted(
+            {
+                json.dumps(field, sort_keys=True)
+                for field in payload["pii_fields"]
+            }
+        ),
+        format,
+        options,
+    ]
+    text = json.dumps(identity, sort_keys=True, default=str)
+
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
@@ -0,0 +1,79 @@
+import threading
+from typing import Optional
+from utils.lazy_import import lazy_import
+
+boto3 = lazy_import("boto3")
+botocore_config = lazy_import("botocore.config")
+
+# connections kept open per client, enough for the ranged GET and
+# multipart upload pools of a few files processed at the same time
+MAX_POOL_CONNECTIONS = 50
+
+# keeps idle connections alive between files of a batch
+TCP_KEEPALIVE = True
+
+_lock = threading.Lock()
+_client = None
+_config = {
+    "max_pool_connections": MAX_POOL_CONNECTIONS,
+    "tcp_keepalive": TCP_KEEPALIVE,
+}
+
+
+def get_s3_client():
+    """
+    returns the s3 client shared by every s3 call of the package,
+    it is created on first use so credentials, endpoints and the
+    connection pool are set up once per process
+
+    boto3 clients are thread safe, the lock only makes sure two
+    threads asking for the first client do not both create one
+    """
+
+    global _client
+
+    client = _client
+    if client is not None:
+        return client
+
+    with _lock:
+        if _client is None:
+            # sessions are not thread safe, each client gets its own
+            session = boto3.session.Session()
+            config = botocore_config.Config(**_config)
+            _client = session.client("s3", config=config)
+        return _client
+
+
+def configure_s3_client(
+    max_pool_connections: Optional[int] = None,
+    tcp_keepalive: Optional[bool] = None,
+):
+    """
+    changes the settings of the shared client, the next
+    get_s3_client() call creates a client using them
+
+    Args:
+        max_pool_connections: connections kept open by the client
+        tcp_keepalive: whether idle connections send keep-alives
+    """
+
+    with _lock:
+        if max_pool_connections is not None:
+            _config["max_pool_connections"] = max_pool_connections
+        if tcp_keepalive is not None:
+            _config["tcp_keepalive"] = tcp_keepalive
+        _reset()
+
+
+def reset_s3_client():
+    """drops the shared client, e.g. once credentials changed"""
+
+    with _lock:
+        _reset()
+
+
+def _reset():
+    global _client
+
+    _client = None
@@ -0,0 +1,190 @@
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from utils.s3_client import get_s3_client
+
+logger = logging.getLogger(__name__)
+
+# bytes per uploaded part, s3 needs at least 5 MB for all but the last
+PART_SIZE = 8 * 1024 * 1024
+
+# parts uploaded at the same time, also the number of parts held
+# in memory on top of the one being filled
+MAX_WORKERS = 4
+
+
+class S3MultipartWriter:
+    """
+    writable binary file-like object sending everything written to
+    it to s3 as a multipart upload, every full part is handed to a
+    thread pool so it uploads while the next one is being written
+
+    an output smaller than a single part is sent with one put_object
+
+    close() completes the upload, abort() throws it away; a failed
+    close aborts the upload before raising
+
+    Args:
+        bucket: name of the destination bucket
+        key: key of the destination object
+        s3_client: boto3 s3 client, the shared one if not provided
+        part_size: bytes per uploaded part, PART_SIZE by default
+        max_workers: number of parts uploaded concurrently,
+        MAX_WORKERS by default
+    """
+
+    # makes pandas write bytes instead of text into it
+    mode = "wb"
+
+    def __init__(
+        self,
+        bucket: str,
+        key: str,
+        s3_client=None,
+        part_size: Optional[int] = None,
+        max_workers: Optional[int] = None,
+    ):
+        self.bucket = bucket
+        self.key = key
+        self._client = s3_client or get_s3_client()
+        self._part_size = part_size or PART_SIZE
+        self._max_workers = max_workers or MAX_WORKERS
+
+        self._buffer = bytearray()
+        self._position = 0
+        self._closed = False
+
+        self._upload_id = None
+        self._executor = None
+        self._pending = deque()
+        self._parts = []
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def write(self, data) -> int:
+        if self._closed:
+            raise ValueError("write to a closed S3MultipartWriter")
+
+        size = memoryview(data).nbytes
+        self._buffer += data
+        self._position += size
+
+        while len(self._buffer) >= self._part_size:
+            part = bytes(self._buffer[: self._part_size])
+            del self._buffer[: self._part_size]
+            self._submit_part(part)
+
+        return size
+
+    def close(self):
+        """uploads what is left and completes the upload"""
+
+        if self._closed:
+            return
+
+        try:
+            if self._upload_id is None:
+                self._client.put_object(
+                    Bucket=self.bucket, Key=self.key, Body=bytes(self._buffer)
+                )
+            else:
+                if self._buffer:
+                    self._submit_part(bytes(self._buffer))
+                while self._pending:
+                    self._parts.append(self._pending.popleft().result())
+
+                self._client.complete_multipart_upload(
+                    Bucket=self.bucket,
+                    Key=self.key,
+                    UploadId=self._upload_id,
+                    MultipartUpload={"Parts": self._parts},
+                )
+        except Exception:
+            self.abort()
+            raise
+
+        self._shutdown()
+
+    def abort(self):
+        """stops the upload, the parts already sent are deleted"""
+
+        if self._closed:
+            return
+
+        for future in self._pending:
+            future.cancel()
+        self._shutdown()
+
+        if self._upload_id is not None:
+            try:
+                self._client.abort_multipart_upload(
+                    Bucket=self.bucket, Key=self.key, UploadId=self._upload_id
+                )
+            except Exception:
+                logger.error(
+                    f"Failed to abort the upload to {self.bucket}/{self.key}",
+                    exc_info=True,
+                )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _submit_part(self, part: bytes):
+        """
+        queues one part for upload, waiting for the oldest upload
+        when max_workers of them are already running
+        """
+
+        if self._upload_id is None:
+            response = self._client.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key
+            )
+            self._upload_id = response["UploadId"]
+            self._executor = ThreadPoolExecutor(self._max_workers)
+
+        if len(self._pending) >= self._max_workers:
+            self._parts.append(self._pending.popleft().result())
+
+        part_number = len(self._parts) + len(self._pending) + 1
+        self._pending.append(
+            self._executor.submit(self._upload_part, part_number, part)
+        )
+
+    def _upload_part(self, part_number: int, part: bytes) -> dict:
+        response = self._client.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            Body=part,
+        )
+
+        return {"PartNumber": part_number, "ETag": response["ETag"]}
+
+    def _shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        self._pending.clear()
+        self._buffer = bytearray()
+        self._closed = True
@@ -0,0 +1,39 @@
+import re
+from typing import Optional
+
+_S3_URL = re.compile(r"^s3://([^/]+)/(.+)$")
+
+_S3_PREFIX = re.compile(r"^s3://([^/]+)/(.*)$")
+
+
+def parse_s3_url(url: str) -> Optional[tuple]:
+    """
+    splits an s3 url into its bucket and key
+
+    Return:
+        (bucket, key) or None if url is not an s3 url
+    """
+
+    match_ = _S3_URL.match(url) if isinstance(url, str) else None
+
+    if not match_:
+        return None
+
+    return match_.group(1), match_.group(2)
+
+
+def parse_s3_prefix(url: str) -> Optional[tuple]:
+    """
+    splits an s3 url into its bucket and key prefix, the
+    prefix may be empty for the root of the bucket
+
+    Return:
+        (bucket, prefix) or None if url is not an s3 url
+    """
+
+    match_ = _S3_PREFIX.match(url) if isinstance(url, str) else None
+
+    if not match_:
+        return None
+
+    return match_.group(1), match_.group(2)
@@ -0,0 +1,93 @@
+from __future__ import annotations
+from typing import Optional
+from utils.lazy_import import lazy_import
+
+pd = lazy_import("pandas")
+
+# schema reading every column of a csv as text, exactly as written
+ALL_STRING = "string"
+
+# schema inferred once per s3 prefix, see utils.schema_cache
+CACHED = "cached"
+
+JSON_FORMATS = ("json", "jsonl", "ndjson")
+
+
+def is_valid_schema(schema) -> bool:
+    """
+    checks the "schema" of a payload, either ALL_STRING, CACHED or
+    a dict of column names to pandas dtype names, e.g.
+    {"id": "str", "age": "int64", "joined": "datetime64[ns]"}
+    """
+
+    if schema in (ALL_STRING, CACHED):
+        return True
+
+    return (
+        isinstance(schema, dict)
+        and len(schema) > 0
+        and all(
+            isinstance(column, str) and isinstance(dtype, str)
+            for column, dtype in schema.items()
+        )
+    )
+
+
+def read_options(format: str, schema: Optional[dict | str]) -> dict:
+    """
+    keyword arguments of the pandas reader of format that replace
+    its type inference with the schema
+
+    csv columns are parsed straight into their dtype, with
+    ALL_STRING every value is kept as text and no NA marker is
+    turned into a missing value; json values are kept as parsed
+    (a "007" string stays a string, no date detection) and the
+    columns of a dict schema are cast by apply_schema
+
+    Return:
+        {} without a schema, for CACHED (read_csv_cached
+        infers it) or for parquet, whose files carry their own
+    """
+
+    if schema is None or schema == CACHED:
+        return {}
+
+    if format == "csv":
+        if schema == ALL_STRING:
+            return {"dtype": str, "keep_default_na": False}
+
+        # the csv parser can't build datetimes from a dtype
+        dates = [c for c, t in schema.items() if t.startswith("datetime64")]
+        options = {
+            "dtype": {c: t for c, t in schema.items() if c not in dates}
+        }
+        if dates:
+            options["parse_dates"] = dates
+
+        return options
+
+    if format in JSON_FORMATS:
+        options = {"dtype": False, "convert_dates": False}
+        if schema == ALL_STRING:
+            options["precise_float"] = True
+
+        return options
+
+    return {}
+
+
+def apply_schema(
+    df: pd.DataFrame, format: str, schema: Optional[dict | str]
+) -> pd.DataFrame:
+    """
+    casts the json columns named by a dict schema, the other
+    readers already applied it through read_options; columns
+    the file doesn't hold are ignored
+    """
+
+    if format not in JSON_FORMATS or not isinstance(schema, dict):
+        return df
+
+    dtypes = {c: t for c, t in schema.items() if c in df.columns}
+
+    return df.astype(dtypes) if dtypes else df
@@ -0,0 +1,261 @@
+from __future__ import annotations
+import io
+import csv
+import threading
+from collections import OrderedDict
+from typing import Optional
+from utils.body_stream import BodyStream
+from utils.s3_url import parse_s3_url
+from utils.schema import read_options
+from utils.lazy_import import lazy_import
+
+pd = lazy_import("pandas")
+
+# prefixes whose schema is kept, the least recently used goes first
+MAX_ENTRIES = 1024
+
+# bytes pulled from the body per read while looking for the header
+BLOCK_SIZE = 64 * 1024
+
+_QUOTE = ord('"')
+
+
+class SchemaCache:
+    """
+    bounded LRU of the csv schemas inferred by pandas, keyed by
+    (bucket, prefix, format) so the files under a prefix are read
+    with the header and types found in the previous ones
+
+    an entry holds the header of the file it was inferred from and
+    is only used for files with the same header
+
+    Args:
+        max_entries: number of prefixes kept, MAX_ENTRIES by default
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or MAX_ENTRIES
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    def get(self, key: tuple, columns: list) -> Optional[dict]:
+        """
+        the schema cached for key, None (a miss) if there is none or
+        it was inferred from a file with a different header
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[0] != columns:
+                del self._entries[key]
+                self._invalidations += 1
+                entry = None
+
+            if entry is None:
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+
+            return entry[1]
+
+    def put(self, key: tuple, columns: list, schema: dict):
+        with self._lock:
+            self._entries[key] = (columns, schema)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        """
+        Return:
+            {"entries", "hits", "misses", "invalidations",
+            "hit_rate"} since the cache was created, a lookup
+            whose header changed counts as a miss
+        """
+
+        with self._lock:
+            lookups = self._hits + self._misses
+
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "invalidations": self._invalidations,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+            }
+
+
+_lock = threading.Lock()
+_cache = None
+
+
+def get_schema_cache() -> SchemaCache:
+    """the schema cache shared by every call of the process"""
+
+    global _cache
+
+    with _lock:
+        if _cache is None:
+            _cache = SchemaCache()
+        return _cache
+
+
+def reset_schema_cache():
+    """drops the shared cache along with its stats"""
+
+    global _cache
+
+    with _lock:
+        _cache = None
+
+
+def schema_key(url: str, format: str) -> Optional[tuple]:
+    """
+    (bucket, prefix, format) of an s3 url, the prefix being
+    everything up to the last "/" of the key; None if url
+    is not an s3 url
+    """
+
+    location = parse_s3_url(url)
+
+    if location is None:
+        return None
+
+    bucket, key = location
+
+    return bucket, key[: key.rfind("/") + 1], format
+
+
+def inferred_schema(df: pd.DataFrame) -> dict:
+    """
+    the text columns of df as a schema that utils.schema can read,
+    numeric columns are left to inference: a pinned int64 reads
+    "3.0" as 3 and a pinned float64 writes "3" back as "3.0"
+    """
+
+    return {
+        column: "str" for column, dtype in df.dtypes.items() if dtype == object
+    }
+
+
+def read_csv_cached(
+    file_body,
+    key: tuple,
+    skip_columns=None,
+    cache: Optional[SchemaCache] = None,
+) -> pd.DataFrame:
+    """
+    reads a csv with the schema cached for key, inferring and
+    caching it on a miss
+
+    the header is read first and checked against the cached one,
+    the skipped columns are then not parsed at all; the full
+    column order is kept in df.attrs["source_columns"] so
+    redact_pii puts them back
+
+    Args:
+        file_body (StreamingBody): A boto3 StreamingBody object
+        key: the schema_key of the file
+        skip_columns: columns that do not need to be decoded
+        cache: the shared cache if not provided
+    """
+
+    if cache is None:
+        cache = get_schema_cache()
+
+    columns, body = _read_header(file_body)
+    schema = cache.get(key, columns)
+
+    # pandas renames duplicated names and needs a column to count rows
+    usecols = [c for c in columns if c not in (skip_columns or ())]
+    project = 0 < len(usecols) < len(columns)
+    project = project and len(set(columns)) == len(columns)
+
+    options = {}
+    if schema is not None:
+        options = read_options(
+            "csv", {c: t for c, t in schema.items() if c in usecols}
+        )
+    if project:
+        options["usecols"] = usecols
+
+    df = pd.read_csv(body, **options)
+
+    if project:
+        df.attrs["source_columns"] = columns
+
+    if schema is None:
+        cache.put(key, columns, inferred_schema(df))
+
+    return df
+
+
+def _read_header(file_body) -> tuple:
+    """
+    reads the body up to the end of its first record
+
+    Return:
+        (column names, stream replaying the bytes read
+        followed by the rest of the body)
+    """
+
+    head = b""
+    end = -1
+
+    while end < 0:
+        block = file_body.read(BLOCK_SIZE)
+        if not block:
+            break
+        start = len(head)
+        head += block
+        end = _record_end(head, start)
+
+    # only the header is decoded, the block may end within a
+    # multibyte character of a later record
+    header = head if end < 0 else head[: end + 1]
+    text = io.StringIO(header.decode("utf-8-sig"), newline="")
+    columns = next(csv.reader(text), [])
+
+    return columns, _ReplayStream(head, file_body)
+
+
+def _record_end(head: bytes, start: int) -> int:
+    """position of the first newline outside of quotes, -1 if none"""
+
+    position = head.find(b"\n", start)
+
+    while position >= 0:
+        if head.count(_QUOTE, 0, position) % 2 == 0:
+            return position
+        position = head.find(b"\n", position + 1)
+
+    return -1
+
+
+class _ReplayStream(BodyStream):
+    """readable stream returning head and then the rest of body"""
+
+    # the body belongs to the caller of read_csv_cached
+    closes_body = False
+
+    def __init__(self, head: bytes, body):
+        super().__init__(body)
+        self._head = head
+
+    def read(self, size: int = -1) -> bytes:
+        if not self._head:
+            return super().read(size)
+
+        if size is None or size < 0:
+            data, self._head = self._head + super().read(), b""
+        else:
+            data, self._head = self._head[:size], self._head[size:]
+
+        return data
@@ -0,0 +1,270 @@
+import io
+import os
+import logging
+import tempfile
+from collections import deque
+from utils.redact_pii import redact_pii
+from utils.redact_csv_bytes import redact_csv_bytes
+from utils.strategies import parse_pii_fields, field_names
+from utils.schema import read_options
+from utils.lazy_import import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+multiprocessing = lazy_import("multiprocessing")
+process_pool = lazy_import("concurrent.futures.process")
+
+logger = logging.getLogger(__name__)
+
+# largest byte range redacted by a single process at once
+SHARD_SIZE = 64 * 1024 * 1024
+
+# bytes copied to the spool file and scanned for boundaries per read
+BLOCK_SIZE = 1024 * 1024
+
+_QUOTE = ord('"')
+_NEWLINE = ord("\n")
+
+
+def shard_csv(
+    file_body,
+    pii_fields: list,
+    processes: int,
+    engine: str = "pandas",
+    output=None,
+    schema=None,
+    tokenizer=None,
+):
+    """
+    redacts a csv on several cores, the file is split into byte
+    ranges ending on record boundaries (newlines outside of quoted
+    fields), every range is redacted in its own process together
+    with a copy of the header and the results are written back in
+    the original order under a single header
+
+    with the pandas engine types are inferred per shard, the same
+    way they are per chunk in streaming mode, unless a schema is
+    given
+
+    Args:
+        file_body (StreamingBody): A boto3 StreamingBody object
+        pii_fields: list contaning fields to be redaced
+        processes: number of worker processes
+        engine: "pandas" or "bytes", the pipeline run on every shard
+        output: optional writable binary file-like object
+        to write into, a new BytesIO is used if not provided
+        schema: column dtypes (or "string") the pandas engine
+        parses the shards with, see utils.schema
+        tokenizer: utils.tokenizer.Tokenizer replacing the values
+        of the pandas engine with tokens, copied to every worker
+
+    Return:
+        the output stream the content was written to,
+        rewound and ready to read when it was created here;
+        None if the csv could not be redacted
+    """
+
+    if not isinstance(processes, int) or processes < 1:
+        logger.error(f"Invalid number of processes: {processes}")
+        return None
+
+    # writing into a fresh buffer unless the caller provided a sink
+    buffer = io.BytesIO() if output is None else output
+
+    # the workers read their range straight from a file on disk
+    spool = tempfile.NamedTemporaryFile(suffix=".csv", delete=False)
+
+    try:
+        with spool:
+            quote_counts = _spool(file_body, spool)
+
+        header_end, shards = _shard_bounds(spool.name, quote_counts, processes)
+        _run_shards(
+            spool.name,
+            header_end,
+            shards,
+            pii_fields,
+            processes,
+            engine,
+            buffer,
+            schema,
+            tokenizer,
+        )
+    except Exception:
+        logger.error("Something went wrong ", exc_info=True)
+        return None
+    finally:
+        os.remove(spool.name)
+
+    if output is None:
+        buffer.seek(0)
+
+    return buffer
+
+
+def _spool(file_body, spool) -> list:
+    """
+    copies the body to the spool file, returns the number of
+    quotes found before the start of every block
+    """
+
+    quote_counts = [0]
+
+    while block := file_body.read(BLOCK_SIZE):
+        spool.write(block)
+        quotes = np.count_nonzero(
+            np.frombuffer(block, dtype=np.uint8) == _QUOTE
+        )
+        quote_counts.append(quote_counts[-1] + quotes)
+
+    return quote_counts
+
+
+def _shard_bounds(path: str, quote_counts: list, processes: int):
+    """
+    splits the records after the header into about processes byte
+    ranges of at most SHARD_SIZE, every range ends after a newline
+    that sits outside of quotes
+
+    Return:
+        (end of the header, list of (start, end) ranges)
+    """
+
+    size = os.path.getsize(path)
+
+    with open(path, "rb") as f:
+        header_end = _record_end(f, 0, size, quote_counts)
+
+        data_size = size - header_end
+        shard_size = max(min(SHARD_SIZE, -(-data_size // processes)), 1)
+
+        bounds = [header_end]
+        while bounds[-1] < size:
+            target = bounds[-1] + shard_size - 1
+            bounds.append(_record_end(f, target, size, quote_counts))
+
+    # a csv holding only its header still gets the header written
+    shards = list(zip(bounds[:-1], bounds[1:])) or [(header_end, header_end)]
+
+    return header_end, shards
+
+
+def _record_end(f, position: int, size: int, quote_counts: list) -> int:
+    """
+    end (exclusive) of the record holding the byte at position,
+    i.e. one past the first newline at or after position that is
+    preceded by an even number of quotes; size if there is none
+    """
+
+    block_index = position // BLOCK_SIZE
+
+    while block_index * BLOCK_SIZE < size:
+        block_start = block_index * BLOCK_SIZE
+        f.seek(block_start)
+        block = np.frombuffer(f.read(BLOCK_SIZE), dtype=np.uint8)
+
+        newlines = np.flatnonzero(block == _NEWLINE)
+        newlines = newlines[newlines >= position - block_start]
+
+        if len(newlines):
+            quotes = np.flatnonzero(block == _QUOTE)
+            parity = quote_counts[block_index] + np.searchsorted(
+                quotes, newlines
+            )
+            outside = newlines[parity % 2 == 0]
+            if len(outside):
+                return block_start + int(outside[0]) + 1
+
+        block_index += 1
+
+    return size
+
+
+def _run_shards(
+    path,
+    header_end,
+    shards,
+    pii_fields,
+    processes,
+    engine,
+    buffer,
+    schema,
+    tokenizer=None,
+):
+    """
+    redacts the shards on a process pool and writes them in order,
+    at most two shards per process are queued or waiting to be
+    written so memory stays bounded by the shard size
+    """
+
+    context = multiprocessing.get_context("spawn")
+
+    with process_pool.ProcessPoolExecutor(
+        processes, mp_context=context
+    ) as executor:
+        pending = deque()
+        remaining = iter(enumerate(shards))
+
+        def submit():
+            for i, (start, end) in remaining:
+                pending.append(
+                    executor.submit(
+                        _redact_shard,
+                        path,
+                        header_end,
+                        start,
+                        end,
+                        pii_fields,
+                        engine,
+                        i == 0,
+                        schema,
+                        tokenizer,
+                    )
+                )
+                if len(pending) >= 2 * processes:
+                    return
+
+        submit()
+        while pending:
+            buffer.write(pending.popleft().result())
+            submit()
+
+
+def _redact_shard(
+    path: str,
+    header_end: int,
+    start: int,
+    end: int,
+    pii_fields: list,
+    engine: str,
+    with_header: bool,
+    schema=None,
+    tokenizer=None,
+) -> bytes:
+    """
+    redacts the records between start and end in a worker process,
+    the header is read in front of them so every shard parses like
+    a csv of its own and is only written back for the first shard
+    """
+
+    with open(path, "rb") as f:
+        header = f.read(header_end)
+        f.seek(start)
+        records = f.read(end - start)
+
+    content = io.BytesIO(header + records)
+
+    if engine == "bytes":
+        names = field_names(parse_pii_fields(pii_fields))
+        redacted = redact_csv_bytes(content, names)
+        if redacted is None:
+            raise ValueError(f"Failed to redact bytes {start}-{end}")
+        data = redacted.getvalue()
+        return data if with_header else data[len(header) :]  # noqa: E203
+
+    df = pd.read_csv(content, **read_options("csv", schema))
+    buffer = io.BytesIO()
+    redacted = redact_pii(df, pii_fields, tokenizer)
+    redacted.to_csv(buffer, index=False, header=with_header)
+
+    return buffer.getvalue()
@@ -0,0 +1,257 @@
+import io
+import mmap
+import time
+import logging
+from typing import Callable, Optional
+from utils.body_stream import BodyStream
+
+logger = logging.getLogger(__name__)
+
+# keys of every record handed to a stage callback
+RECORD_KEYS = (
+    "stage",
+    "file",
+    "ok",
+    "wall_seconds",
+    "cpu_seconds",
+    "memory_delta_bytes",
+    "bytes_in",
+    "bytes_out",
+    "rows_in",
+    "rows_out",
+)
+
+
+class StageRecorder:
+    """
+    measures the stages of one obfuscation (get_file_content,
+    file_to_df, redact_pii, to_byte_stream, ...) and hands one dict
+    per stage to callback once the stage is over:
+        stage: name of the function run by the stage
+        file: the file_to_obfuscate of the payload
+        ok: False if the stage failed or raised
+        wall_seconds: elapsed time
+        cpu_seconds: CPU time of the calling thread, the reader
+        threads of arrow and of ranged GETs are not included
+        memory_delta_bytes: change of the process RSS, None where
+        /proc is not available
+        bytes_in: bytes read from the file body during the stage
+        bytes_out: bytes written to the output
+        rows_in, rows_out: rows handed to and returned by the stage
+    metrics a stage can't tell are None
+
+    without a callback stage() returns a shared no-op context, so
+    a disabled recorder costs the pipeline a few calls per stage
+
+    Args:
+        callback: called with every record, on the thread running
+        the stage; exceptions it raises are logged and ignored
+        file: the file_to_obfuscate the records are about
+    """
+
+    def __init__(
+        self,
+        callback: Optional[Callable[[dict], None]] = None,
+        file: Optional[str] = None,
+    ):
+        self.callback = callback
+        self.file = file
+
+    @property
+    def enabled(self) -> bool:
+        return self.callback is not None
+
+    def stage(self, name: str, source=None, repeated: bool = False, **rows):
+        """
+        context measuring one stage, the stage fills in what only it
+        knows with update(ok=..., rows_out=...) or, when repeated,
+        sums it with add(rows_in=...)
+
+        Args:
+            name: name of the stage
+            source: the stream returned by count_reads, the bytes
+            read from it inside the stage become bytes_in
+            repeated: the stage is entered once per chunk and its
+            metrics are summed until done() is called
+            rows: initial values of the record, e.g. rows_in=10
+        """
+
+        if self.callback is None:
+            return _DISABLED
+
+        return _Stage(self, name, source, repeated, rows)
+
+    def count_reads(self, file_body):
+        """file_body, wrapped to count its bytes when enabled"""
+
+        if self.callback is None:
+            return file_body
+
+        return CountingStream(file_body)
+
+    def emit(self, record: dict):
+        try:
+            self.callback(record)
+        except Exception:
+            logger.error(
+                f"Stage callback failed on {record['stage']}", exc_info=True
+            )
+
+
+class CountingStream(BodyStream):
+    """
+    readable binary stream wrapping a file body and counting
+    the bytes read through it in bytes_read
+
+    Args:
+        file_body: StreamingBody (or any object with read(size))
+    """
+
+    def __init__(self, file_body):
+        super().__init__(file_body)
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = super().read(size)
+        self.bytes_read += len(data)
+
+        return data
+
+
+def output_size(stream) -> Optional[int]:
+    """
+    bytes written to an output stream of the pipeline, None if it
+    is not a stream (e.g. the {"status": 400} of a failed stage)
+    """
+
+    if isinstance(stream, io.BytesIO):
+        return stream.getbuffer().nbytes
+
+    tell = getattr(stream, "tell", None)
+
+    return tell() if tell is not None else None
+
+
+def log_stage(record: dict):
+    """stage callback writing every record to the logs"""
+
+    logger.info(
+        f"{record['file']} {record['stage']}: "
+        f"{record['wall_seconds']:.3f}s wall, "
+        f"{record['cpu_seconds']:.3f}s cpu, "
+        f"{_or_dash(record['memory_delta_bytes'])} bytes rss, "
+        f"{_or_dash(record['bytes_in'])} bytes in, "
+        f"{_or_dash(record['bytes_out'])} bytes out, "
+        f"{_or_dash(record['rows_in'])} rows in, "
+        f"{_or_dash(record['rows_out'])} rows out"
+        f"{'' if record['ok'] else ', failed'}"
+    )
+
+
+def _or_dash(value) -> str:
+    return "-" if value is None else str(value)
+
+
+def _rss_bytes() -> Optional[int]:
+    """resident set size of the process, None without /proc"""
+
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * mmap.PAGESIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+class _Stage:
+    """context of an enabled StageRecorder.stage"""
+
+    def __init__(self, recorder, name, source, repeated, rows):
+        self._recorder = recorder
+        self._source = source
+        self._repeated = repeated
+        self.record = dict.fromkeys(RECORD_KEYS)
+        self.record.update(
+            stage=name,
+            file=recorder.file,
+            ok=True,
+            wall_seconds=0.0,
+            cpu_seconds=0.0,
+            **rows,
+        )
+
+    def __enter__(self):
+        self._rss = _rss_bytes()
+        self._read = getattr(self._source, "bytes_read", None)
+        self._cpu = time.thread_time()
+        self._wall = time.perf_counter()
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        wall = time.perf_counter() - self._wall
+        cpu = time.thread_time() - self._cpu
+        record = self.record
+
+        record["wall_seconds"] += wall
+        record["cpu_seconds"] += cpu
+        record["memory_delta_bytes"] = _add(
+            record["memory_delta_bytes"], _delta(_rss_bytes(), self._rss)
+        )
+        record["bytes_in"] = _add(
+            record["bytes_in"],
+            _delta(getattr(self._source, "bytes_read", None), self._read),
+        )
+
+        if exc_type is not None:
+            record["ok"] = False
+
+        if not self._repeated:
+            self.done()
+
+    def update(self, **metrics):
+        self.record.update(metrics)
+
+    def add(self, **metrics):
+        for key, value in metrics.items():
+            self.record[key] = _add(self.record[key], value)
+
+    def done(self):
+        """hands the record to the callback, for repeated stages"""
+
+        self._recorder.emit(self.record)
+
+
+class _DisabledStage:
+    """stage context of a recorder without a callback"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def update(self, **metrics):
+        pass
+
+    def add(self, **metrics):
+        pass
+
+    def done(self):
+        pass
+
+
+_DISABLED = _DisabledStage()
+
+
+def _delta(after, before):
+    if after is None or before is None:
+        return None
+
+    return after - before
+
+
+def _add(total, value):
+    if value is None:
+        return total
+
+    return value if total is None else total + value
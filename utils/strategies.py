@@ -0,0 +1,231 @@
+from __future__ import annotations
+from typing import Optional
+from utils.lazy_import import lazy_import
+
+np = lazy_import("numpy")
+pa = lazy_import("pyarrow")
+pc = lazy_import("pyarrow.compute")
+pd = lazy_import("pandas")
+
+# what a pii field is replaced with:
+#   mask: "***"
+#   token: a keyed hash of the value, see utils.tokenizer
+#   email_domain: "***@" followed by the domain of the address
+#   last_digits: "***" followed by the last keep digits
+#   truncate: the first keep characters followed by "***"
+#   compact: nulls of the column's type for numbers, dates and
+#   booleans, a "***" stored once (categorical or dictionary) for
+#   the other columns
+STRATEGIES = (
+    "mask",
+    "token",
+    "email_domain",
+    "last_digits",
+    "truncate",
+    "compact",
+)
+
+# characters kept by the strategies taking a "keep" option
+DEFAULT_KEEP = {"last_digits": 4, "truncate": 3}
+
+MASK = "***"
+
+
+def parse_pii_fields(pii_fields: list, default: str = "mask") -> dict:
+    """
+    the strategy of every pii field, the fields are either names,
+    redacted with default, or objects such as
+    {"field": "email", "strategy": "email_domain"} or
+    {"field": "postcode", "strategy": "truncate", "keep": 4}
+
+    Return:
+        {field: (strategy, keep)} in the order of pii_fields,
+        keep being None for the strategies that don't take it
+
+    Raises:
+        ValueError: if a field or its strategy is not valid
+    """
+
+    if not isinstance(pii_fields, list):
+        raise ValueError(f"Invalid pii_fields: {pii_fields}")
+
+    strategies = {}
+
+    for entry in pii_fields:
+        if isinstance(entry, str):
+            entry = {"field": entry, "strategy": default}
+
+        if not isinstance(entry, dict) or not isinstance(
+            entry.get("field"), str
+        ):
+            raise ValueError(f"Invalid pii field: {entry}")
+
+        strategy = entry.get("strategy", default)
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy: {strategy}")
+
+        keep = entry.get("keep", DEFAULT_KEEP.get(strategy))
+        if strategy in DEFAULT_KEEP and (
+            not isinstance(keep, int) or isinstance(keep, bool) or keep < 1
+        ):
+            raise ValueError(f"Invalid keep for {entry['field']}: {keep}")
+
+        strategies[entry["field"]] = (strategy, keep)
+
+    return strategies
+
+
+def field_names(strategies: dict, strategy: Optional[str] = None) -> list:
+    """names of the fields, only those redacted with strategy if given"""
+
+    return [
+        field
+        for field, (field_strategy, _) in strategies.items()
+        if strategy is None or field_strategy == strategy
+    ]
+
+
+def partially_mask(column, strategy: str, keep: Optional[int] = None):
+    """
+    applies email_domain, last_digits or truncate to an arrow
+    array with the arrow compute string kernels, without a python
+    call per value; other types are compared as text, integral
+    floats without their ".0"; nulls stay null
+
+    values the strategy would reveal in full (an email without
+    "@", keep digits or fewer, keep characters or fewer) are
+    replaced with "***"
+
+    Args:
+        column: pyarrow Array or ChunkedArray
+        strategy: one of the partial strategies of STRATEGIES
+        keep: digits or characters kept, DEFAULT_KEEP by default
+
+    Return:
+        pyarrow string array of the same length
+    """
+
+    text = _as_text(column)
+    keep = DEFAULT_KEEP.get(strategy) if keep is None else keep
+
+    if strategy == "email_domain":
+        # everything up to the last "@" goes, splitting once from the
+        # right is cheaper than a "^.*@" regex; the domain is the last
+        # of the (one or two) parts of every value
+        parts = pc.split_pattern(text, "@", max_splits=1, reverse=True)
+        lengths = pc.list_value_length(parts)
+        last = pc.subtract(pc.add(parts.offsets[:-1], lengths), 1)
+        domains = pc.binary_join_element_wise(
+            MASK + "@", parts.values.take(last), ""
+        )
+        return pc.if_else(pc.equal(lengths, 2), domains, MASK)
+
+    if strategy == "last_digits":
+        digits = pc.replace_substring_regex(
+            text, pattern=r"\D", replacement=""
+        )
+        kept = pc.binary_join_element_wise(
+            MASK, pc.utf8_slice_codeunits(digits, start=-keep), ""
+        )
+        return pc.if_else(pc.greater(pc.utf8_length(digits), keep), kept, MASK)
+
+    if strategy == "truncate":
+        kept = pc.binary_join_element_wise(
+            pc.utf8_slice_codeunits(text, start=0, stop=keep), MASK, ""
+        )
+        return pc.if_else(pc.greater(pc.utf8_length(text), keep), kept, MASK)
+
+    raise ValueError(f"Not a partial strategy: {strategy}")
+
+
+def partially_mask_series(
+    series: pd.Series, strategy: str, keep: Optional[int] = None
+) -> pd.Series:
+    """partially_mask for a DataFrame column, missing values stay None"""
+
+    # object columns can mix numbers and strings (a json phone field)
+    # but an arrow array has a single type, they are made text first
+    if series.dtype == object:
+        series = series.astype("string")
+
+    masked = partially_mask(pa.array(series, from_pandas=True), strategy, keep)
+
+    return pd.Series(
+        masked.to_numpy(zero_copy_only=False),
+        index=series.index,
+        name=series.name,
+    )
+
+
+def compact_series(series: pd.Series) -> pd.Series:
+    """
+    the compact redaction of a DataFrame column: numbers, dates,
+    durations and booleans become missing values of the same
+    width instead of python objects (ints and booleans use the
+    pandas nullable types), everything else a categorical whose
+    only category is "***", one byte per row
+    """
+
+    dtype = series.dtype
+
+    if pd.api.types.is_bool_dtype(dtype):
+        dtype = "boolean"
+    elif pd.api.types.is_integer_dtype(dtype) and isinstance(dtype, np.dtype):
+        # int32 -> Int32, uint8 -> UInt8, ...
+        dtype = dtype.name.capitalize().replace("Uint", "UInt")
+    elif not (
+        pd.api.types.is_numeric_dtype(dtype)
+        or pd.api.types.is_datetime64_any_dtype(dtype)
+        or pd.api.types.is_timedelta64_dtype(dtype)
+    ):
+        masked = pd.Categorical.from_codes(
+            np.zeros(len(series), dtype=np.int8), categories=[MASK]
+        )
+        return pd.Series(masked, index=series.index, name=series.name)
+
+    return pd.Series(None, index=series.index, name=series.name, dtype=dtype)
+
+
+def compact_array(column) -> pa.Array:
+    """
+    compact_series for an arrow column: a null array of the same
+    type for numbers, dates, durations and booleans, otherwise a
+    dictionary array of int8 indices all pointing at "***"
+    """
+
+    kind = column.type
+
+    if (
+        pa.types.is_integer(kind)
+        or pa.types.is_floating(kind)
+        or pa.types.is_decimal(kind)
+        or pa.types.is_temporal(kind)
+        or pa.types.is_boolean(kind)
+    ):
+        return pa.nulls(len(column), type=kind)
+
+    return pa.DictionaryArray.from_arrays(
+        pa.array(np.zeros(len(column), dtype=np.int8)),
+        pa.array([MASK], type=pa.string()),
+    )
+
+
+def _as_text(column):
+    """the values of column as an arrow string array"""
+
+    if isinstance(column, pa.ChunkedArray):
+        column = column.combine_chunks()
+
+    if pa.types.is_string(column.type) or pa.types.is_large_string(
+        column.type
+    ):
+        return column
+
+    # pandas reads integer columns with gaps as floats
+    if pa.types.is_floating(column.type):
+        try:
+            column = pc.cast(column, pa.int64())
+        except pa.ArrowInvalid:
+            pass
+
+    return pc.cast(column, pa.string())
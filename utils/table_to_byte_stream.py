@@ -0,0 +1,90 @@
+from __future__ import annotations
+import io
+import logging
+from utils.json_array import write_json_array
+from utils.lazy_import import lazy_import
+
+pa = lazy_import("pyarrow")
+pq = lazy_import("pyarrow.parquet")
+
+logger = logging.getLogger(__name__)
+
+# rows converted to pandas at a time when rendering text formats
+TEXT_BATCH_SIZE = 100_000
+
+
+def table_to_byte_stream(table: pa.Table, format: str, output=None):
+    """
+    convert an arrow table into byte stream of the provided format
+
+    parquet is written by arrow directly, csv and json are rendered
+    by the pandas writers one record batch at a time so the output
+    is byte for byte the same as the pandas engine
+
+    Args:
+        table: pyarrow Table contaning file content
+        format: the format the byte stream should be in
+        output: optional writable binary file-like object
+        to write into, a new BytesIO is used if not provided
+
+    Return:
+        the output stream the content was written to,
+        rewound and ready to read when it was created here;
+        None if writing failed
+    """
+
+    # writing into a fresh buffer unless the caller provided a sink
+    buffer = io.BytesIO() if output is None else output
+
+    try:
+        match format:
+            case "csv":
+                for i, batch in enumerate(_text_batches(table)):
+                    batch.to_csv(buffer, index=False, header=i == 0)
+            case "json":
+                write_json_array(_text_batches(table), buffer)
+            case "jsonl" | "ndjson":
+                for batch in _text_batches(table):
+                    # pandas writes a blank line for a frame without rows
+                    if not batch.empty:
+                        batch.to_json(buffer, orient="records", lines=True)
+            case "parquet":
+                pq.write_table(table, buffer)
+            case _:
+                logger.error(f"No Byte stream format matches {format}")
+                return None
+
+    except Exception:
+        logger.error("Something went wrong ,", exc_info=True)
+        return None
+
+    if output is None:
+        buffer.seek(0)
+
+    return buffer
+
+
+def _text_batches(table: pa.Table):
+    """
+    yields the table as pandas dataframes of TEXT_BATCH_SIZE rows,
+    always at least one so an empty table still gets its header
+    """
+
+    # pandas turns int columns holding nulls into floats, doing it
+    # on the whole table keeps every batch rendered the same way
+    for position, field in enumerate(table.schema):
+        if (
+            pa.types.is_integer(field.type)
+            and table.column(position).null_count
+        ):
+            table = table.set_column(
+                position, field.name, table.column(position).cast(pa.float64())
+            )
+
+    batches = table.to_batches(max_chunksize=TEXT_BATCH_SIZE)
+    if not batches:
+        yield table.to_pandas()
+        return
+
+    for batch in batches:
+        yield batch.to_pandas()
@@ -1,18 +1,15 @@
+from __future__ import annotations
 import io
-import pandas as pd
 import logging
+from utils.json_array import frame_batches, write_json_array
+from utils.lazy_import import lazy_import
 
-logging.basicConfig(
-    filename="app.log",
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    force=True,
-)
+pd = lazy_import("pandas")
 
 logger = logging.getLogger(__name__)
 
 
-def to_byte_stream(df: pd.DataFrame, format: str) -> io.BytesIO:
+def to_byte_stream(df: pd.DataFrame, format: str, output=None):
     """
     convert df into byte stream of the provided format
 
@@ -20,22 +17,25 @@ def to_byte_stream(df: pd.DataFrame, format: str) -> io.BytesIO:
         df: dataframe contaning file content
         format: the format the byte esteam
         should be in
+        output: optional writable binary file-like object
+        to write into, a new BytesIO is used if not provided
 
     Return:
         Ready to read byte stream of the same
-        content as the df
+        content as the df, or the provided output
     """
-    # taking a deep copy not not mutate the original
-    df_copy = df.copy(deep=True)
-
     # creating a buffer to store df content on
-    buffer = io.BytesIO()
+    buffer = io.BytesIO() if output is None else output
     try:
         match format:
             case "csv":
-                df_copy.to_csv(buffer, index=False)
+                df.to_csv(buffer, index=False)
             case "json":
-                df_copy.to_json(buffer, orient="records")
+                write_json_array(frame_batches(df), buffer)
+            case "jsonl" | "ndjson":
+                # pandas writes a blank line for a frame without rows
+                if not df.empty:
+                    df.to_json(buffer, orient="records", lines=True)
             case "parquet":
                 df.to_parquet(buffer, index=False, engine="pyarrow")
             case _:
@@ -46,6 +46,7 @@ def to_byte_stream(df: pd.DataFrame, format: str) -> io.BytesIO:
         logger.error("Something went wrong ,", exc_info=True)
         return None
 
-    buffer.seek(0)
+    if output is None:
+        buffer.seek(0)
 
     return buffer
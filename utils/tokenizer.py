@@ -0,0 +1,142 @@
+from __future__ import annotations
+import os
+import hmac
+import hashlib
+import threading
+from typing import Optional, Union
+from utils.lazy_import import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+pa = lazy_import("pyarrow")
+
+# hex characters kept from the HMAC-SHA256 of a value, 64 bits
+TOKEN_LENGTH = 16
+
+# values whose token is remembered by a Tokenizer, once full the
+# values not seen yet are hashed every time they come up
+MAX_MEMO = 1_000_000
+
+# environment variable holding the key when none was configured
+KEY_ENV = "OBFUSCATOR_TOKEN_KEY"
+
+_lock = threading.Lock()
+_key = None
+
+
+class Tokenizer:
+    """
+    replaces values with deterministic pseudonyms, the first
+    TOKEN_LENGTH hex characters of the HMAC-SHA256 of the value
+    under key, so the same value gets the same token in every file
+    and joins on tokenized columns still work
+
+    columns are factorized first and only their unique values are
+    hashed, the tokens are then taken by code; tokens are remembered
+    across the chunks of a file in a memo of up to max_memo values
+
+    values are hashed as their text, integral floats without their
+    ".0" since pandas holds int columns with a gap as floats: 1,
+    1.0 and "1" share a token but 1.5 doesn't; missing values stay
+    missing
+
+    Args:
+        key: secret of the HMAC, see token_key()
+        max_memo: values remembered, MAX_MEMO by default
+    """
+
+    def __init__(self, key: bytes, max_memo: Optional[int] = None):
+        self._key = key
+        self.max_memo = MAX_MEMO if max_memo is None else max_memo
+        self._memo = {}
+
+    def tokens(self, values: list) -> list:
+        """the token of every value, in order"""
+
+        memo = self._memo
+        tokens = []
+
+        for value in values:
+            text = _text(value)
+            token = memo.get(text)
+            if token is None:
+                token = hmac.new(
+                    self._key, text.encode("utf-8"), hashlib.sha256
+                ).hexdigest()[:TOKEN_LENGTH]
+                if len(memo) < self.max_memo:
+                    memo[text] = token
+            tokens.append(token)
+
+        return tokens
+
+    def tokenize_series(self, series: pd.Series) -> pd.Series:
+        """tokenized copy of a DataFrame column"""
+
+        codes, uniques = pd.factorize(series)
+
+        # the missing values have the code -1, they take the None
+        # appended after the tokens of the uniques
+        tokens = np.array(self.tokens(uniques.tolist()) + [None], dtype=object)
+
+        return pd.Series(
+            tokens.take(codes), index=series.index, name=series.name
+        )
+
+    def tokenize_array(
+        self, column: Union[pa.Array, pa.ChunkedArray]
+    ) -> pa.Array:
+        """tokenized copy of an arrow column, nulls stay null"""
+
+        if isinstance(column, pa.ChunkedArray):
+            column = column.combine_chunks()
+
+        encoded = column.dictionary_encode()
+        tokens = pa.array(
+            self.tokens(encoded.dictionary.to_pylist()), type=pa.string()
+        )
+
+        return tokens.take(encoded.indices)
+
+
+def _text(value) -> str:
+    """the text a value is hashed as"""
+
+    if isinstance(value, (float, np.floating)) and value.is_integer():
+        return str(int(value))
+
+    return str(value)
+
+
+def configure_token_key(key: Union[str, bytes]):
+    """
+    sets the HMAC key of every following tokenization of the
+    process, taking precedence over the KEY_ENV variable
+    """
+
+    global _key
+
+    with _lock:
+        _key = key.encode("utf-8") if isinstance(key, str) else key
+
+
+def reset_token_key():
+    """forgets the configured key, KEY_ENV is used again"""
+
+    global _key
+
+    with _lock:
+        _key = None
+
+
+def token_key() -> Optional[bytes]:
+    """
+    the configured HMAC key, else the KEY_ENV environment
+    variable, None if neither is set
+    """
+
+    if _key is not None:
+        return _key
+
+    key = os.environ.get(KEY_ENV)
+
+    return key.encode("utf-8") if key else None